@@ -70,6 +70,10 @@ while [[ $# -gt 0 ]]; do
       RUN_RWROUTE_TEST=1
       shift # past argument
       ;;
+    --serve-anchor-placement)
+      SERVE_ANCHOR_PLACEMENT=1
+      shift # past argument
+      ;;
     --setup-only)
       SETUP_ONLY=1
       shift # past argument
@@ -98,6 +102,7 @@ echo "USER_NAME                 = ${USER_NAME}"
 echo "SETUP_ONLY                = ${SETUP_ONLY[@]}"
 echo "OPT_ITER                  = ${OPT_ITER}"
 echo "USE_RWROUTE_TO_STITCH     = ${USE_RWROUTE_TO_STITCH}"
+echo "SERVE_ANCHOR_PLACEMENT    = ${SERVE_ANCHOR_PLACEMENT}"
 
 if [[ -n $1 ]]; then
     echo "Last line of file specified as non-opt/last argument:"
@@ -150,6 +155,7 @@ for iter in $(seq 0 ${OPT_ITER}); do
         --option SETUP \
         --which_iteration ${iter} \
         --test_random_anchor_placement 0 \
+        --use_anchor_placement_service ${SERVE_ANCHOR_PLACEMENT:-0} \
         --user_name ${USER_NAME} \
         --server_list_in_str "${SERVER_LIST[*]}"
 
@@ -160,6 +166,7 @@ for iter in $(seq 0 ${OPT_ITER}); do
         --option SETUP \
         --which_iteration ${iter} \
         --test_random_anchor_placement 1 \
+        --use_anchor_placement_service ${SERVE_ANCHOR_PLACEMENT:-0} \
         --user_name ${USER_NAME} \
         --server_list_in_str "${SERVER_LIST[*]}"
 
@@ -0,0 +1,165 @@
+import logging
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from mip import Model, minimize, CONTINUOUS, xsum, OptimizationStatus
+
+from rapidstream.BE.AnchorPlacement.TransportationSolver import TransportationSolver
+
+ASSIGNMENT_SOLVERS = ('TRANSPORTATION', 'CBC')
+DEFAULT_ASSIGNMENT_SOLVER = 'TRANSPORTATION'
+
+# number of the cheapest bins of each anchor kept in the first sparse solve
+DEFAULT_CANDIDATE_NUM = 64
+
+# the column of each row, the row potentials and the column potentials
+AssignmentResult = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def solveAssignmentByTransportation(cost: np.ndarray, capacity: np.ndarray) -> Optional[AssignmentResult]:
+  solver = TransportationSolver(cost, capacity)
+  if not solver.solve():
+    return None
+  return solver.row_to_col, solver.row_potential, solver.col_potential
+
+
+def solveAssignmentByCBC(cost: np.ndarray, capacity: np.ndarray) -> Optional[AssignmentResult]:
+  """
+  the original LP formulation with one variable for each allowed (anchor, bin) pair
+  Note that we use the CONTINOUS type because the LP of a transportation problem
+  with integral capacities has an integral optimal solution
+  """
+  row_num, col_num = cost.shape
+  m = Model()
+
+  row_to_col_to_var = [
+    {j : m.add_var(var_type=CONTINUOUS, lb=0, ub=1) for j in np.flatnonzero(np.isfinite(cost[i])).tolist()} \
+      for i in range(row_num)]
+
+  col_to_row_to_var = [{} for _ in range(col_num)]
+  for i, col_to_var in enumerate(row_to_col_to_var):
+    for j, var in col_to_var.items():
+      col_to_row_to_var[j][i] = var
+
+  # each anchor is placed once
+  row_constrs = [m.add_constr(xsum(col_to_var.values()) == 1) for col_to_var in row_to_col_to_var]
+
+  # limit on bin size
+  col_constrs = {j : m.add_constr(xsum(row_to_var.values()) <= int(capacity[j])) \
+    for j, row_to_var in enumerate(col_to_row_to_var) if row_to_var}
+
+  m.objective = minimize(xsum(
+    float(cost[i][j]) * var for i, col_to_var in enumerate(row_to_col_to_var) for j, var in col_to_var.items()))
+
+  status = m.optimize()
+  if row_num and status != OptimizationStatus.OPTIMAL and status != OptimizationStatus.FEASIBLE:
+    return None
+
+  row_to_col = np.full(row_num, -1)
+  for i, col_to_var in enumerate(row_to_col_to_var):
+    for j, var in col_to_var.items():
+      var_value = round(var.x)
+      assert abs(var.x - var_value) < 0.000001, var.x # check that we are correctly treating each ILP var as CONTINOUS
+
+      if var_value == 1:
+        row_to_col[i] = j
+
+  row_potential = np.array([constr.pi for constr in row_constrs], dtype=float)
+  col_potential = np.zeros(col_num)
+  for j, constr in col_constrs.items():
+    col_potential[j] = min(constr.pi, 0)
+
+  return row_to_col, row_potential, col_potential
+
+
+def _solveDense(cost: np.ndarray, capacity: np.ndarray, solver: str) -> Optional[AssignmentResult]:
+  if solver == 'TRANSPORTATION':
+    return solveAssignmentByTransportation(cost, capacity)
+  elif solver == 'CBC':
+    return solveAssignmentByCBC(cost, capacity)
+  else:
+    assert False, f'unrecognized assignment solver {solver}'
+
+
+def _getCandidateCost(cost: np.ndarray, candidate_num: int) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  keep the candidate_num cheapest columns of each row
+  return the columns used by any row and the cost on those columns, inf for the columns that are cut
+  """
+  row_num = cost.shape[0]
+  candidates = np.argpartition(cost, candidate_num - 1, axis=1)[:, :candidate_num]
+
+  used_cols = np.unique(candidates)
+  sparse_cost = np.full((row_num, len(used_cols)), np.inf)
+  sparse_candidates = np.searchsorted(used_cols, candidates)
+  rows = np.arange(row_num)[:, None]
+  sparse_cost[rows, sparse_candidates] = cost[rows, candidates]
+
+  return used_cols, sparse_cost
+
+
+def _solveSparse(cost: np.ndarray, capacity: np.ndarray, solver: str, candidate_num: int) -> Optional[np.ndarray]:
+  """
+  solve on the candidate_num cheapest bins of each anchor.
+  Double candidate_num and re-solve if
+  (1) the sparse problem is infeasible because of the bin capacity, or
+  (2) the duals of the sparse problem show that a cut bin has a negative reduced cost,
+  i.e., the sparse optimum is not proven optimal for the full problem
+  """
+  row_num, col_num = cost.shape
+
+  while True:
+    if candidate_num >= col_num:
+      result = _solveDense(cost, capacity, solver)
+      return result[0] if result else None
+
+    used_cols, sparse_cost = _getCandidateCost(cost, candidate_num)
+    logging.info(f'solve with {candidate_num} candidate bins per anchor: {row_num * candidate_num} of {row_num * col_num} pairs')
+
+    result = _solveDense(sparse_cost, capacity[used_cols], solver)
+    if result is None:
+      logging.info(f'the sparse problem with {candidate_num} candidates is infeasible')
+      candidate_num *= 2
+      continue
+
+    row_to_used_col, row_potential, used_col_potential = result
+
+    # the bins that are not candidates of any anchor are empty, thus their potential is 0
+    col_potential = np.zeros(col_num)
+    col_potential[used_cols] = used_col_potential
+
+    # the LP optimality certificate of the full problem
+    min_reduced_cost = (cost - row_potential[:, None] - col_potential).min()
+    tolerance = 1e-6 * max(1, np.abs(cost[np.isfinite(cost)]).max(initial=0))
+    if min_reduced_cost >= -tolerance:
+      return used_cols[row_to_used_col]
+
+    logging.info(f'a cut bin has a reduced cost of {min_reduced_cost} with {candidate_num} candidates')
+    candidate_num *= 2
+
+
+def solveAssignment(
+    cost: np.ndarray,
+    capacity: np.ndarray,
+    solver: str = DEFAULT_ASSIGNMENT_SOLVER,
+    candidate_num: Optional[int] = None
+) -> Optional[np.ndarray]:
+  """
+  assign each row (anchor) to one column (bin) with at most capacity[j] rows in column j
+  minimize the total cost
+  If candidate_num is given, first solve with only the candidate_num cheapest bins of each anchor,
+  the result is still optimal for the full problem
+  return the column of each row, or None if there is no feasible assignment
+  """
+  start_time = time.perf_counter()
+
+  if candidate_num and cost.shape[0]:
+    row_to_col = _solveSparse(cost, capacity, solver, candidate_num)
+  else:
+    result = _solveDense(cost, capacity, solver)
+    row_to_col = result[0] if result else None
+
+  logging.info(f'{solver} assignment of {cost.shape[0]} anchors to {cost.shape[1]} bins took {time.perf_counter() - start_time} seconds')
+
+  return row_to_col
@@ -0,0 +1,70 @@
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from rapidstream.BE.AnchorPlacement.AssignmentSolver import ASSIGNMENT_SOLVERS, solveAssignment
+
+
+def loadRecordedCost(cost_path: str):
+  """
+  load the debug_anchor_to_bin_to_cost.json recorded by the anchor placement of a pair
+  with --dump_anchor_placement_cost
+  return the anchors, the bins and the cost matrix of shape (num_anchor, num_bin)
+  """
+  anchor_to_bin_to_cost = json.loads(open(cost_path, 'r').read())
+  anchors = list(anchor_to_bin_to_cost.keys())
+  bins = list(anchor_to_bin_to_cost[anchors[0]].keys()) if anchors else []
+  cost = np.array([[anchor_to_bin_to_cost[anchor][bin] for bin in bins] for anchor in anchors]).reshape(len(anchors), len(bins))
+  return anchors, bins, cost
+
+
+def runBenchmark(cost_path: str, capacity_per_bin: int, solvers, candidate_num=None) -> dict:
+  """
+  solve the recorded problem with each solver and compare the total cost
+  """
+  anchors, bins, cost = loadRecordedCost(cost_path)
+  capacity = np.full(len(bins), capacity_per_bin)
+
+  report = {'anchor_num': len(anchors), 'bin_num': len(bins), 'capacity_per_bin': capacity_per_bin, 'candidate_num': candidate_num}
+  for solver in solvers:
+    start_time = time.perf_counter()
+    row_to_col = solveAssignment(cost, capacity, solver, candidate_num)
+    runtime = time.perf_counter() - start_time
+
+    if row_to_col is None:
+      report[solver] = {'runtime': runtime, 'feasible': False}
+    else:
+      report[solver] = {
+        'runtime': runtime,
+        'feasible': True,
+        'total_cost': float(cost[np.arange(len(anchors)), row_to_col].sum()),
+        'max_bin_usage': int(np.bincount(row_to_col, minlength=len(bins)).max(initial=0)),
+      }
+
+  total_costs = [report[solver]['total_cost'] for solver in solvers if report[solver]['feasible']]
+  if len(total_costs) > 1 and max(total_costs) - min(total_costs) > 1e-6 * max(1, abs(min(total_costs))):
+    logging.warning(f'{cost_path}: the solvers reach different total cost {total_costs}')
+
+  return report
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--cost_paths", type=str, nargs="+", required=True, help="debug_anchor_to_bin_to_cost.json of each pair, written with --dump_anchor_placement_cost")
+  parser.add_argument("--capacity_per_bin", type=int, required=True, help="allowed_usage_per_bin in ILP-placement.log, or 20 for SLL channels")
+  parser.add_argument("--solvers", type=str, nargs="+", choices=ASSIGNMENT_SOLVERS, default=list(ASSIGNMENT_SOLVERS))
+  parser.add_argument("--candidate_num", type=int, default=None, help="solve on the cheapest bins of each anchor first")
+  parser.add_argument("--report_path", type=str, default="assignment_solver_benchmark.json")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+
+  path_to_report = {}
+  for cost_path in args.cost_paths:
+    path_to_report[cost_path] = runBenchmark(cost_path, args.capacity_per_bin, args.solvers, args.candidate_num)
+    logging.info(f'{cost_path}: {path_to_report[cost_path]}')
+
+  open(args.report_path, 'w').write(json.dumps(path_to_report, indent=2))
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from rapidstream.BE.Device import U250
+
+# bump when the buffer regions or the calibration in U250 change
+BIN_CACHE_VERSION = 1
+
+
+def _getBinCachePath(cache_dir: str, key: Tuple) -> str:
+  sha = hashlib.sha256(json.dumps([BIN_CACHE_VERSION, *key]).encode())
+  return os.path.join(cache_dir, f'{sha.hexdigest()}.json')
+
+
+def _computeSliceBins(key: Tuple) -> List[Tuple[int, int]]:
+  """
+  quantize the SLICEs in the buffer region into bins with the calibrated coordinates
+  """
+  slot1_name, slot2_name, col_width, row_width, include_laguna, bin_size_x, bin_size_y = key
+  rectangles = U250.getBufferRegionRectanglesBetweenSlotPair(slot1_name, slot2_name, col_width, row_width, include_laguna)
+
+  bins = []
+  for type, down_left_x, down_left_y, up_right_x, up_right_y in rectangles:
+    if type != 'SLICE':
+      continue
+
+    # note that the boundaries are inclusive
+    # the bins are ordered by x first then y
+    orig_x, orig_y = np.meshgrid(
+      np.arange(down_left_x, up_right_x + 1, bin_size_x),
+      np.arange(down_left_y, up_right_y + 1, bin_size_y),
+      indexing='ij')
+
+    calibrated_x, calibrated_y = U250.getCalibratedCoordinatesArray('SLICE', orig_x.ravel(), orig_y.ravel())
+    bins += zip(calibrated_x.tolist(), calibrated_y.tolist())
+
+  return bins
+
+
+def _loadBins(cache_path: str) -> Optional[List[Tuple[int, int]]]:
+  if not os.path.isfile(cache_path):
+    return None
+  try:
+    return [tuple(bin) for bin in json.loads(open(cache_path, 'r').read())]
+  except ValueError:
+    logging.warning(f'ignore the corrupted bin cache {cache_path}')
+    return None
+
+
+def _saveBins(cache_path: str, bins: List[Tuple[int, int]]) -> None:
+  os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+  # write to a temp file first so that concurrent workers never see a partial file
+  temp_path = f'{cache_path}.tmp{os.getpid()}'
+  open(temp_path, 'w').write(json.dumps(bins))
+  os.replace(temp_path, cache_path)
+
+
+@lru_cache(maxsize=None)
+def getSliceBinsBetweenSlotPair(
+    slot1_name: str,
+    slot2_name: str,
+    col_width: int,
+    row_width: int,
+    include_laguna: bool,
+    bin_size_x: int,
+    bin_size_y: int,
+    cache_dir: Optional[str] = None
+) -> List[Tuple[int, int]]:
+  """
+  the calibrated coordinates of the SLICE bins in the buffer region between a slot pair
+  The bins only depend on the geometry, thus they are shared by all pairs and iterations:
+  memoized in the process and, if cache_dir is given, on the disk for all workers
+  Do not modify the returned list
+  """
+  key = (slot1_name, slot2_name, col_width, row_width, include_laguna, bin_size_x, bin_size_y)
+  if cache_dir is None:
+    return _computeSliceBins(key)
+
+  cache_path = _getBinCachePath(cache_dir, key)
+  bins = _loadBins(cache_path)
+  if bins is not None:
+    logging.info(f'reuse the bins in {cache_path}')
+    return bins
+
+  bins = _computeSliceBins(key)
+  _saveBins(cache_path, bins)
+  return bins
@@ -2,13 +2,14 @@ import itertools
 import logging
 import json
 import operator
-import time
 
 from collections import defaultdict
 from typing import List, Tuple, Dict
-from mip import Model, minimize, CONTINUOUS, xsum, OptimizationStatus
 
-from rapidstream.BE.Utilities import isPairSLRCrossing
+import numpy as np
+
+from rapidstream.BE.AnchorPlacement.AssignmentSolver import solveAssignment, DEFAULT_ASSIGNMENT_SOLVER
+from rapidstream.BE.Utilities import isPairSLRCrossing, getWireOfAnchor
 from rapidstream.BE.Device.U250 import idx_of_left_side_slice_of_laguna_column
 from autobridge.Device.DeviceManager import DeviceU250
 from autobridge.Opt.Slot import Slot
@@ -180,7 +181,7 @@ def _get_anchor_2_sll_dir(hub, slot1_name, slot2_name, anchor_connections: Dict[
 
   anchor_2_sll_dir = {}
   for anchor in anchor_connections.keys():
-    hls_var_name = anchor.split('_q0_reg')[0]
+    hls_var_name = getWireOfAnchor(anchor)
     anchor_2_sll_dir[anchor] = slot_io_2_sll_dir[hls_var_name]
 
   return anchor_2_sll_dir
@@ -241,56 +242,26 @@ def getSLLChannels(slot1_name: str, slot2_name: str) -> List[SLLChannel]:
   return sll_channels
 
 
-def placeAnchorToSLLChannel(anchor_to_sll_to_cost, pair_name) -> Dict[str, SLLChannel]:
+def placeAnchorToSLLChannel(anchor_to_sll_to_cost, pair_name, solver=DEFAULT_ASSIGNMENT_SOLVER) -> Dict[str, SLLChannel]:
   """
-  run ILP to map anchor to channels
+  map anchor to channels
+  each anchor is placed once and the usage of each channel is limited by its capacity
   """
-  start_time = time.perf_counter()
-  get_time_stamp = lambda : time.perf_counter() - start_time
-
-  m = Model()
+  if not anchor_to_sll_to_cost:
+    return {}
 
-  anchor_to_sll_to_var = {}
-  for anchor, sll_to_cost in anchor_to_sll_to_cost.items():
-    sll_to_var = {sll : m.add_var(var_type=CONTINUOUS, lb=0, ub=1) for sll in sll_to_cost.keys()}
-    anchor_to_sll_to_var[anchor] = sll_to_var
+  anchors = list(anchor_to_sll_to_cost.keys())
+  sll_channels = list(anchor_to_sll_to_cost[anchors[0]].keys())
 
-  sll_to_anchor_to_var = defaultdict(dict)
-  for anchor, sll_to_var in anchor_to_sll_to_var.items():
-    for sll, var in sll_to_var.items():
-      sll_to_anchor_to_var[sll][anchor] = var
-
-  # each anchor is placed once
-  for anchor, sll_to_var in anchor_to_sll_to_var.items():
-    m += xsum(var for var in sll_to_var.values()) == 1
+  cost = np.array([[anchor_to_sll_to_cost[anchor][sll] for sll in sll_channels] for anchor in anchors])
 
   # limit on sll capacity, currently set to 20/24
-  for sll, anchor_to_var in sll_to_anchor_to_var.items():
-    m += xsum(var for var in anchor_to_var.values()) <= sll.capacity
-
-  # objective
-  var_and_cost = []
-  for anchor, sll_to_cost in anchor_to_sll_to_cost.items():
-    sll_to_var = anchor_to_sll_to_var[anchor]
-    for sll in sll_to_cost.keys():
-      var_and_cost.append((sll_to_var[sll], sll_to_cost[sll]))
-  m.objective = minimize(xsum(var * cost for var, cost in var_and_cost))
-
-  status = m.optimize()
-
-  if anchor_to_sll_to_var:
-    assert status == OptimizationStatus.OPTIMAL or status == OptimizationStatus.FEASIBLE, f'failed in ILP placement for {pair_name}'
-
-  anchor_to_sll = {}
-  for anchor, sll_to_var in anchor_to_sll_to_var.items():
-    for sll, var in sll_to_var.items():
-      var_value = round(var.x)
-      assert abs(var.x - var_value) < 0.000001, var.x
+  capacity = np.array([sll.capacity for sll in sll_channels])
 
-      if var_value == 1:
-        anchor_to_sll[anchor] = sll
+  anchor_to_sll_idx = solveAssignment(cost, capacity, solver)
+  assert anchor_to_sll_idx is not None, f'failed in ILP placement for {pair_name}'
 
-  return anchor_to_sll
+  return {anchor : sll_channels[anchor_to_sll_idx[i]] for i, anchor in enumerate(anchors)}
 
 
 def saveAnchorToSLLToCost(anchor_to_sll_to_cost):
@@ -335,7 +306,12 @@ def _analyzeILPResults(anchor_to_sll_to_cost, anchor_to_selected_bin):
   open('ilp_quality_report.json', 'w').write(json.dumps(ilp_report, indent=2))
 
 
-def placeLagunaAnchors(hub, pair_name: str, anchor_connections: Dict[str, List[Dict[str, str]]]) -> Dict[str, str]:
+def placeLagunaAnchors(
+    hub,
+    pair_name: str,
+    anchor_connections: Dict[str, List[Dict[str, str]]],
+    solver: str = DEFAULT_ASSIGNMENT_SOLVER
+) -> Dict[str, str]:
   """
   separally handle the anchor placement for SLR crossing pairs
   The source cannot be too close to the chose SLL
@@ -359,7 +335,7 @@ def placeLagunaAnchors(hub, pair_name: str, anchor_connections: Dict[str, List[D
 
   _, anchor_to_sll_to_cost = getSLLChannelToAnchorCost(sll_channels, anchor_connections, anchor_to_sll_dir)
 
-  anchor_to_sll = placeAnchorToSLLChannel(anchor_to_sll_to_cost, pair_name)
+  anchor_to_sll = placeAnchorToSLLChannel(anchor_to_sll_to_cost, pair_name, solver)
 
   _analyzeILPResults(anchor_to_sll_to_cost, anchor_to_sll)
 
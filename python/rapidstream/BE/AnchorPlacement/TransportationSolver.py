@@ -0,0 +1,126 @@
+import logging
+from typing import List
+
+import numpy as np
+
+
+class TransportationSolver:
+  """
+  assign each row (anchor) to exactly one column (bin) with at most capacity[j] rows per column
+  and minimize the total cost. Non-allowed (row, col) pairs have an infinite cost.
+
+  Solved by successive shortest paths with potentials on the dense cost matrix.
+  The rows are added one by one. Each time a Dijkstra search over the columns finds the cheapest
+  way to fit the new row in, possibly by moving already assigned rows to other columns.
+  In most cases the best column of the new row still has room and the search stops at once.
+
+  The potentials are the optimal duals of the LP relaxation:
+    min sum(cost * x)
+    sum_j x[i][j] == 1           dual row_potential[i]
+    sum_i x[i][j] <= capacity[j]  dual col_potential[j] <= 0
+  thus for every (i, j): cost[i][j] - row_potential[i] - col_potential[j] >= 0
+  and it equals 0 for every assigned pair. A column with spare capacity has a potential of 0.
+  """
+
+  def __init__(self, cost: np.ndarray, capacity: np.ndarray) -> None:
+    self.cost = np.asarray(cost, dtype=float)
+    self.capacity = np.asarray(capacity, dtype=int)
+    assert self.cost.ndim == 2 and self.capacity.shape == (self.cost.shape[1],)
+
+    self.row_num, self.col_num = self.cost.shape
+    self.row_potential = np.zeros(self.row_num)
+    self.col_potential = np.zeros(self.col_num)
+    self.row_to_col = np.full(self.row_num, -1)
+
+  def solve(self) -> bool:
+    """
+    return False if there is no feasible assignment
+    """
+    col_to_rows: List[List[int]] = [[] for _ in range(self.col_num)]
+    spare = self.capacity.copy()
+
+    for row in range(self.row_num):
+      end_col = self.__augment(row, col_to_rows, spare)
+      if end_col < 0:
+        logging.warning(f'no feasible assignment for row {row}')
+        return False
+      spare[end_col] -= 1
+
+    return True
+
+  def __augment(self, new_row: int, col_to_rows: List[List[int]], spare: np.ndarray) -> int:
+    """
+    Dijkstra from the new row until reaching a column with spare capacity
+    return the column at the end of the augmenting path, or -1 if not reachable
+    """
+    cost, u, v = self.cost, self.row_potential, self.col_potential
+
+    dist = cost[new_row] - v
+    u[new_row] = dist.min()
+    if not np.isfinite(u[new_row]):
+      return -1
+    dist -= u[new_row]
+
+    # -v for the columns not reached yet and inf for the reached ones
+    # so that the distance of a reached column is never updated again
+    open_col_offset = -v
+    done_cols = []
+    done_col_dist = []
+
+    # the last row on the shortest path to each column
+    pred_row = np.full(self.col_num, new_row)
+    visited_rows = [new_row]
+    visited_row_dist = [0.]
+
+    while True:
+      col = int(dist.argmin())
+      col_dist = dist[col]
+      if not np.isfinite(col_dist):
+        return -1
+      if spare[col] > 0:
+        break
+
+      done_cols.append(col)
+      done_col_dist.append(col_dist)
+      open_col_offset[col] = np.inf
+      dist[col] = np.inf
+
+      # a full column: continue the search from the rows assigned to it
+      for row in col_to_rows[col]:
+        visited_rows.append(row)
+        visited_row_dist.append(col_dist)
+        new_dist = cost[row] + open_col_offset
+        new_dist += col_dist - u[row]
+        is_better = new_dist < dist
+        np.minimum(dist, new_dist, out=dist)
+        pred_row[is_better] = row
+
+    # update the potentials so that the reduced costs stay non-negative
+    # and become 0 along the augmenting path
+    v[done_cols] -= col_dist - np.array(done_col_dist)
+    u[visited_rows] += col_dist - np.array(visited_row_dist)
+
+    # shift the assignment along the path
+    end_col = col
+    while True:
+      row = pred_row[col]
+      prev_col = self.row_to_col[row]
+      if prev_col >= 0:
+        col_to_rows[prev_col].remove(row)
+      col_to_rows[col].append(row)
+      self.row_to_col[row] = col
+      if row == new_row:
+        break
+      col = prev_col
+
+    return end_col
+
+  def getTotalCost(self) -> float:
+    assigned = self.row_to_col >= 0
+    return float(self.cost[np.flatnonzero(assigned), self.row_to_col[assigned]].sum())
+
+  def getReducedCost(self) -> np.ndarray:
+    """
+    negative entries are pairs that would improve the assignment
+    """
+    return self.cost - self.row_potential[:, None] - self.col_potential
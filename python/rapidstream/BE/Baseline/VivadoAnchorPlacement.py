@@ -1,6 +1,5 @@
 import argparse
 import logging
-import json
 import math
 import os
 import sys
@@ -9,6 +8,7 @@ from typing import Set, Dict, Tuple
 from rapidstream.BE.GenAnchorConstraints import createAnchorPlacementExtractScript, __getBufferRegionSize
 from rapidstream.BE.Device import U250
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -279,7 +279,7 @@ if __name__ == '__main__':
   user_name = args.user_name
   server_list = args.server_list_in_str.split()
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   synth_dir = f'{base_dir}/slot_synth'
 
@@ -1,10 +1,10 @@
 import argparse
-import json
 import logging
 import os
 import re
 
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -111,7 +111,7 @@ if __name__ == '__main__':
   hub_path = args.hub_path
   base_dir = args.base_dir
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   NEW_TOP_MODULE_SUFFIX = '_hw_test'
   top_rtl = hub['NewTopRTL']
@@ -1,8 +1,9 @@
-import json
 import sys
 import os
 from collections import OrderedDict
 
+from rapidstream.BE.Hub import Hub
+
 def organizeHier(sample_route : str):
   """
   Helper function to print the clock route in more readable way
@@ -244,7 +245,7 @@ if __name__ == '__main__':
   base_dir = sys.argv[2]
   option = sys.argv[3]
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   # anchor_net_extractions_script = '/home/einsx7/auto-parallel/src/tcl/extractBoundaryNets.tcl'
   current_path = os.path.dirname(os.path.realpath(__file__))
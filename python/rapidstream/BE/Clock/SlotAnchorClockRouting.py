@@ -2,10 +2,10 @@ import argparse
 import logging
 import math
 import os
-import json
 from typing import List
 
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -130,7 +130,7 @@ if __name__ == '__main__':
   user_name = args.user_name
   server_list = args.server_list_in_str.split()
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
   pair_list = hub["AllSlotPairs"]
   pair_name_list = ['_AND_'.join(pair) for pair in pair_list]
 
@@ -1,4 +1,7 @@
 import re
+from typing import List, Tuple
+
+import numpy as np
 from autobridge.Opt.Slot import Slot
 from autobridge.Device.DeviceManager import DeviceU250
 
@@ -8,7 +11,15 @@ def getAllLagunaRange():
   return 'LAGUNA_X0Y0:LAGUNA_X31Y839'
 
 
-def __getBufferRegionOfSLRCrossingSlotPair(slot1, slot2, include_laguna: bool):
+# a rectangle of sites: (site_type, down_left_x, down_left_y, up_right_x, up_right_y), the boundaries are inclusive
+SiteRectangle = Tuple[str, int, int, int, int]
+
+
+def getPblockOfRectangles(rectangles: List[SiteRectangle]) -> str:
+  return '\n'.join(f'{type}_X{x0}Y{y0}:{type}_X{x1}Y{y1}' for type, x0, y0, x1, y1 in rectangles)
+
+
+def __getBufferRegionOfSLRCrossingSlotPair(slot1, slot2, include_laguna: bool) -> List[SiteRectangle]:
   assert slot1.down_left_x == slot2.down_left_x
   assert slot1.up_right_x == slot2.up_right_x
 
@@ -37,7 +48,7 @@ def __getBufferRegionOfSLRCrossingSlotPair(slot1, slot2, include_laguna: bool):
   else:
     assert False
 
-  laguna_region = f' LAGUNA_X{laguna_down_left_x}Y{laguna_down_left_y}:LAGUNA_X{laguna_up_right_x}Y{laguna_up_right_y} '
+  laguna_region = ('LAGUNA', laguna_down_left_x, laguna_down_left_y, laguna_up_right_x, laguna_up_right_y)
   slice_around_laguna = __getSliceAroundLagunaSides(
       laguna_down_left_x=laguna_down_left_x, 
       laguna_up_right_x=laguna_up_right_x, 
@@ -45,7 +56,7 @@ def __getBufferRegionOfSLRCrossingSlotPair(slot1, slot2, include_laguna: bool):
       slice_up_right_y=slice_up_right_y)
 
   if include_laguna:
-    return laguna_region + '\n' + slice_around_laguna
+    return [laguna_region] + slice_around_laguna
   else:
     return slice_around_laguna
 
@@ -168,11 +179,36 @@ def getCalibratedCoordinates(type, orig_x, orig_y):
     assert False, f'unsupported type {type}'
 
 
+def getCalibratedCoordinatesArray(type, orig_x: np.ndarray, orig_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  the vectorized version of getCalibratedCoordinates() for many sites of the same type
+  """
+  orig_x = np.asarray(orig_x, dtype=int)
+  orig_y = np.asarray(orig_y)
+
+  if type == 'SLICE':
+    return np.asarray(calibrated_x_pos_of_slice)[orig_x], orig_y.copy()
+  elif type == 'DSP48E2':
+    return np.asarray(calibrated_x_pos_of_dsp)[orig_x], orig_y * 2.5
+  elif type == 'RAMB36':
+    return np.asarray(calibrated_x_pos_of_bram)[orig_x], orig_y * 5
+  elif type == 'RAMB18':
+    return np.asarray(calibrated_x_pos_of_bram)[orig_x], orig_y * 2.5
+  elif type == 'LAGUNA':
+    assert np.all((120 <= orig_y) & (orig_y <= 839)), 'laguna out of range'
+    # the same as getSLICEYFromLagunaY()
+    laguna_y_beg = np.where(orig_y <= 359, 120, np.where(orig_y <= 599, 360, 600))
+    slice_y_beg = np.where(orig_y <= 359, 180, np.where(orig_y <= 599, 420, 660))
+    return np.asarray(calibrated_x_pos_of_laguna)[orig_x], (orig_y - laguna_y_beg) // 2 + slice_y_beg
+  else:
+    assert False, f'unsupported type {type}'
+
+
 def __getSliceAroundLagunaSides(
     laguna_down_left_x, 
     laguna_up_right_x, 
     slice_down_left_y,
-    slice_up_right_y):
+    slice_up_right_y) -> List[SiteRectangle]:
   # note that each laguna column actually spans 2 in X dimension.
   # e.g. LAGUNA_X0Y... and LAGUNA_X1Y... are in the same physical column
   start_from_ith_laguna_column = int((laguna_down_left_x+1) / 2) # round to floor
@@ -203,8 +239,8 @@ def __getSliceAroundLagunaSides(
 
     # note that the Y coordinate of laguna and SLICE is NOT the same
     # select the SLICE column to the right of the laguna column.
-    SLICE_around_laguna.append(f'SLICE_X{idx_SLICE_to_the_right}Y{slice_down_left_y}:SLICE_X{idx_SLICE_to_the_right}Y{slice_up_right_y}')
-  return '\n'.join(SLICE_around_laguna)
+    SLICE_around_laguna.append(('SLICE', idx_SLICE_to_the_right, slice_down_left_y, idx_SLICE_to_the_right, slice_up_right_y))
+  return SLICE_around_laguna
 
 
 def getBufferRegionBetweenSlotPair(slot_name1, slot_name2, col_width_each_side, row_width_each_side, include_laguna: bool):
@@ -213,6 +249,16 @@ def getBufferRegionBetweenSlotPair(slot_name1, slot_name2, col_width_each_side,
   to help constrain the anchor placement  
   For cross-SLR pairs, return the included laguna sites along with the neighbor SLICEs
   """
+  return getPblockOfRectangles(getBufferRegionRectanglesBetweenSlotPair(
+    slot_name1, slot_name2, col_width_each_side, row_width_each_side, include_laguna))
+
+
+def getBufferRegionRectanglesBetweenSlotPair(
+    slot_name1, slot_name2, col_width_each_side, row_width_each_side, include_laguna: bool
+) -> List[SiteRectangle]:
+  """
+  the buffer region of getBufferRegionBetweenSlotPair() as a list of site rectangles
+  """
 
   idx_1st_col_CR_X = [0] * 9
   idx_1st_col_CR_X[0] = 0 # index of the first SLICE column in the 0-th CR column
@@ -271,7 +317,7 @@ def getBufferRegionBetweenSlotPair(slot_name1, slot_name2, col_width_each_side,
     else:
       assert False
 
-    return f'SLICE_X{x_range_beg}Y{y_range_beg_delta}:SLICE_X{x_range_end}Y{y_range_end_delta} '
+    return [('SLICE', x_range_beg, y_range_beg_delta, x_range_end, y_range_end_delta)]
   
   elif orient == 'VERTICAL':
     # the buffer region for cross-SLR vertical pairs should only include the buffer around laguna sites
@@ -284,9 +330,7 @@ def getBufferRegionBetweenSlotPair(slot_name1, slot_name2, col_width_each_side,
     mid_SLICE_row_idx = max(slot1.down_left_y, slot2.down_left_y) *  CR_SLICE_height
     y_range_beg = mid_SLICE_row_idx - row_width_each_side
     y_range_end = mid_SLICE_row_idx + row_width_each_side - 1
-    slice_buffer_region = f'SLICE_X{x_range_beg}Y{y_range_beg}:SLICE_X{x_range_end}Y{y_range_end} '
-
-    return slice_buffer_region
+    return [('SLICE', x_range_beg, y_range_beg, x_range_end, y_range_end)]
 
   else:
     assert False
@@ -0,0 +1,136 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Set
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+
+EVENT_HEADER_FORMAT = 'iIII'
+EVENT_HEADER_LEN = struct.calcsize(EVENT_HEADER_FORMAT)
+
+
+def _getLibc():
+  try:
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    libc.inotify_init1
+    libc.inotify_add_watch
+  except (OSError, AttributeError):
+    return None
+  return libc
+
+
+class FileWatcher:
+  """
+  wait for a set of files to appear
+  On Linux, use inotify so that a file is noticed as soon as it is created or moved in, e.g. by rsync.
+  A directory that does not exist yet is watched through its parent.
+  Otherwise fall back to checking the files periodically.
+  """
+
+  def __init__(self, paths: Iterable[str], fallback_interval: float = 2) -> None:
+    self.pending: Set[str] = {os.path.abspath(path) for path in paths}
+    self.fallback_interval = fallback_interval
+    self.wd_to_dir: Dict[int, str] = {}
+    self.watched_dirs: Set[str] = set()
+
+    self.libc = _getLibc()
+    self.fd = self.libc.inotify_init1(IN_CLOEXEC) if self.libc else -1
+    if self.fd < 0:
+      logging.warning('inotify is not available, check the files periodically')
+      self.fd = None
+      return
+
+    for path in self.pending:
+      self.__watchDir(os.path.dirname(path))
+
+  def __watchDir(self, dir: str) -> None:
+    """
+    watch the dir, or its nearest existing ancestor until the dir is created
+    """
+    while not os.path.isdir(dir):
+      dir = os.path.dirname(dir)
+    if dir in self.watched_dirs:
+      return
+
+    wd = self.libc.inotify_add_watch(self.fd, dir.encode(), IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE)
+    if wd < 0:
+      raise OSError(ctypes.get_errno(), f'failed to watch {dir}')
+    self.wd_to_dir[wd] = dir
+    self.watched_dirs.add(dir)
+
+  def __readEvents(self, timeout) -> None:
+    """
+    block until some events arrive or timeout, then add watches for the newly created dirs
+    """
+    ready, _, _ = select.select([self.fd], [], [], timeout)
+    if not ready:
+      return
+
+    data = os.read(self.fd, 64 * 1024)
+    offset = 0
+    rescan = False
+    while offset < len(data):
+      wd, mask, _, name_len = struct.unpack_from(EVENT_HEADER_FORMAT, data, offset)
+      name = data[offset + EVENT_HEADER_LEN : offset + EVENT_HEADER_LEN + name_len].rstrip(b'\0').decode()
+      offset += EVENT_HEADER_LEN + name_len
+
+      # the watched dir is removed, watch its ancestor again at the rescan
+      if mask & IN_IGNORED and wd in self.wd_to_dir:
+        self.watched_dirs.discard(self.wd_to_dir.pop(wd))
+        rescan = True
+        continue
+
+      # events are lost when the queue overflows (wd is -1), the dirs created meanwhile are unknown
+      if mask & IN_Q_OVERFLOW or wd not in self.wd_to_dir:
+        logging.debug(f'rescan the pending files after the inotify event {mask:#x} of wd {wd}')
+        rescan = True
+        continue
+
+      path = os.path.join(self.wd_to_dir[wd], name)
+      if os.path.isdir(path):
+        for pending_path in self.pending:
+          if pending_path.startswith(path + os.sep):
+            self.__watchDir(os.path.dirname(pending_path))
+
+    # the files themselves are checked by wait, only the watches need to be refreshed
+    if rescan:
+      for pending_path in self.pending:
+        self.__watchDir(os.path.dirname(pending_path))
+
+  def wait(self, timeout=None) -> List[str]:
+    """
+    return the pending files that exist now
+    block until at least one of them appears, or until timeout (in seconds)
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while self.pending:
+      ready = [path for path in self.pending if os.path.exists(path)]
+      if ready:
+        self.pending.difference_update(ready)
+        return ready
+
+      remaining = None if deadline is None else max(0, deadline - time.monotonic())
+      if remaining == 0:
+        break
+
+      if self.fd is None:
+        time.sleep(self.fallback_interval if remaining is None else min(self.fallback_interval, remaining))
+      else:
+        self.__readEvents(remaining)
+
+    return []
+
+  def close(self) -> None:
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
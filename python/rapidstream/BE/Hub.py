@@ -0,0 +1,117 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Any, Dict
+
+
+# binary hub layout:
+#   MAGIC
+#   uint32 (little endian) length of the index
+#   index: json of {section name: [offset, length]}, the offset is relative to the data
+#   data: the compact json of each section
+MAGIC = b'RSHUB\x01\n\x00'
+HEADER_LEN_FORMAT = '<I'
+
+
+def getBinaryHubPath(json_hub_path: str) -> str:
+  return os.path.splitext(json_hub_path)[0] + '.hub'
+
+
+def writeBinaryHub(result: Dict[str, Any], path: str) -> None:
+  """
+  save each top-level entry of the front end result as a separate section
+  so that a reader only decodes the sections it uses
+  """
+  index = {}
+  data = []
+  offset = 0
+  for name, value in result.items():
+    section = json.dumps(value, separators=(',', ':')).encode()
+    index[name] = [offset, len(section)]
+    data.append(section)
+    offset += len(section)
+
+  index_bytes = json.dumps(index).encode()
+
+  # write to a temp file first so that a reader never sees a partial hub
+  temp_path = path + f'.tmp{os.getpid()}'
+  with open(temp_path, 'wb') as f:
+    f.write(MAGIC)
+    f.write(struct.pack(HEADER_LEN_FORMAT, len(index_bytes)))
+    f.write(index_bytes)
+    for section in data:
+      f.write(section)
+  os.replace(temp_path, path)
+
+
+def isBinaryHub(path: str) -> bool:
+  with open(path, 'rb') as f:
+    return f.read(len(MAGIC)) == MAGIC
+
+
+class Hub(Mapping):
+  """
+  read-only access to the front end result
+  If hub_path is a json file and the binary hub next to it is up to date, use the binary hub.
+  The sections of a binary hub are decoded on first access.
+  Otherwise fall back to loading the entire json file.
+  """
+
+  def __init__(self, hub_path: str) -> None:
+    self.hub_path = hub_path
+    self.section_to_value: Dict[str, Any] = {}
+    self.section_to_range: Dict[str, list] = {}
+    self.data = None
+
+    binary_path = self.__getUpToDateBinaryHub(hub_path)
+    if binary_path:
+      self.__openBinaryHub(binary_path)
+    else:
+      self.section_to_value = json.loads(open(hub_path, 'r').read())
+
+  def __getUpToDateBinaryHub(self, hub_path: str):
+    if isBinaryHub(hub_path):
+      return hub_path
+
+    binary_path = getBinaryHubPath(hub_path)
+    if os.path.isfile(binary_path) and os.path.getmtime(binary_path) >= os.path.getmtime(hub_path):
+      return binary_path
+
+    logging.debug(f'no up-to-date binary hub for {hub_path}, load the json')
+    return None
+
+  def __openBinaryHub(self, binary_path: str) -> None:
+    with open(binary_path, 'rb') as f:
+      self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    index_len, = struct.unpack_from(HEADER_LEN_FORMAT, self.data, len(MAGIC))
+    index_beg = len(MAGIC) + struct.calcsize(HEADER_LEN_FORMAT)
+    self.section_to_range = json.loads(self.data[index_beg : index_beg + index_len].decode())
+    self.data_beg = index_beg + index_len
+
+  def __getitem__(self, name: str) -> Any:
+    if name not in self.section_to_value:
+      if name not in self.section_to_range:
+        raise KeyError(name)
+      offset, length = self.section_to_range[name]
+      beg = self.data_beg + offset
+      self.section_to_value[name] = json.loads(self.data[beg : beg + length].decode())
+
+    return self.section_to_value[name]
+
+  def __contains__(self, name) -> bool:
+    # do not decode the section
+    return name in self.section_to_value or name in self.section_to_range
+
+  def __iter__(self):
+    if self.data is not None:
+      return iter(self.section_to_range)
+    return iter(self.section_to_value)
+
+  def __len__(self) -> int:
+    if self.data is not None:
+      return len(self.section_to_range)
+    return len(self.section_to_value)
@@ -1,12 +1,12 @@
 import argparse
 import logging
-import json
 import math
 import os
 
 from rapidstream.BE.Utilities import getAnchorTimingReportScript
 from rapidstream.BE.GenAnchorConstraints import getSlotInitPlacementPblock
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -117,7 +117,7 @@ if __name__ == '__main__':
     get_synth_dcp = lambda slot_name : f'{synth_dir}/{slot_name}/{slot_name}_synth.dcp'
     get_guard = lambda slot_name : f'until [[ -f {synth_dir}/{slot_name}/{slot_name}_synth.dcp.done.flag ]] ; do sleep 10; done'
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   synth_dir = f'{base_dir}/slot_synth'
   init_place_dir = f'{base_dir}/init_slot_placement'
@@ -1,12 +1,12 @@
 import argparse
 import logging
-import json
 import sys
 import os
 import math
 
 from rapidstream.BE.Utilities import getAnchorTimingReportScript
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -154,7 +154,7 @@ if __name__ == '__main__':
   user_name = args.user_name
   server_list = args.server_list_in_str.split()
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
   pair_list = hub["AllSlotPairs"]
   pair_name_list = ['_AND_'.join(pair) for pair in pair_list]
 
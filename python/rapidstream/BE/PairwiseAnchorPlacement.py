@@ -5,21 +5,26 @@ import re
 import sys
 import os
 import logging
+import multiprocessing
 import random
+import subprocess
 import time
 import itertools
-import operator
 from typing import List, Dict, Any
 from collections import defaultdict
 
-from mip import Model, minimize, CONTINUOUS, xsum, OptimizationStatus
+import numpy as np
 from rapidstream.BE.GenAnchorConstraints import __getBufferRegionSize
 from rapidstream.BE.Utilities import loggingSetup, getPairingLagunaTXOfRX, getSLRIndexOfLaguna
 from rapidstream.BE.Device import U250
-from rapidstream.BE.Utilities import isPairSLRCrossing, getDirectionOfSlotname, loggingSetup
+from rapidstream.BE.Utilities import isPairSLRCrossing, getDirectionOfSlotname, loggingSetup, getHubQuery, getWireOfAnchor
 from rapidstream.BE.AnchorPlacement.PairwiseAnchorPlacementForSLRCrossing import placeLagunaAnchors
+from rapidstream.BE.AnchorPlacement.AssignmentSolver import solveAssignment, ASSIGNMENT_SOLVERS, DEFAULT_ASSIGNMENT_SOLVER, DEFAULT_CANDIDATE_NUM
 from autobridge.Device.DeviceManager import DeviceU250
 from autobridge.Opt.Slot import Slot
+from rapidstream.BE.Hub import Hub
+from rapidstream.BE.FileWatcher import FileWatcher
+from rapidstream.BE.AnchorPlacement.BinCache import getSliceBinsBetweenSlotPair
 
 U250_inst = DeviceU250()
 
@@ -28,7 +33,7 @@ loggingSetup('ILP-placement.log')
 
 ######################### ILP placement ############################################
 
-def __getWeightMatchingBins(slot1_name, slot2_name, bin_size_x, bin_size_y):
+def __getWeightMatchingBins(slot1_name, slot2_name, bin_size_x, bin_size_y, bin_cache_dir=None):
   """
   quantize the buffer region into disjoint bins
   """
@@ -36,24 +41,9 @@ def __getWeightMatchingBins(slot1_name, slot2_name, bin_size_x, bin_size_y):
 
   # this version of ILP placement could only place the anchors onto the SLICE nearby the laguna
   # thus we must not include the lagunas to become bins
-  buffer_pblock = U250.getBufferRegionBetweenSlotPair(slot1_name, slot2_name, col_width, row_width, include_laguna=False)
-
-  # convert the pblock representation of the buffer region into individul bins
-  bins = []
-  slice_regions = re.findall(r'SLICE_X\d+Y\d+[ ]*:[ ]*SLICE_X\d+Y\d+', buffer_pblock)
-  for slice_region in slice_regions:
-    match_res = re.findall(r'SLICE_X(\d+)Y(\d+)[ ]*:[ ]*SLICE_X(\d+)Y(\d+)', slice_region) # output format is [(val1, val2, val3, val4)]
-    left_down_x, left_down_y, up_right_x, up_right_y = map(int, match_res[0])
-
-    # note that the boundaries in pblocks are inclusive
-    bins += [(x, y) for x in range(left_down_x, up_right_x + 1, bin_size_x) \
-                    for y in range(left_down_y, up_right_y + 1, bin_size_y) ]
-
-  # calibrate the positions
-  bins_calibrated = [U250.getCalibratedCoordinates('SLICE', orig_x, orig_y) \
-            for orig_x, orig_y in bins]
-
-  return bins_calibrated
+  # the bins are calibrated
+  return getSliceBinsBetweenSlotPair(
+    slot1_name, slot2_name, col_width, row_width, False, bin_size_x, bin_size_y, bin_cache_dir)
 
 
 def __getEdgeCost(properties_of_end_cells_list: List[Dict], FDRE_loc):
@@ -93,22 +83,77 @@ def __getEdgeCost(properties_of_end_cells_list: List[Dict], FDRE_loc):
   return final_score
 
 
-def __getILPResults(anchor2bin2var):
+def __getEndCellArrays(anchor_connections):
   """
-  interpret the ILP solving results. Map anchor to locations
+  pack the end cells of each anchor into arrays of shape (num_anchor, max_num_end_cell)
+  anchors with fewer end cells are padded and the padding is masked out
   """
+  anchors = list(anchor_connections.keys())
+  max_cell_num = max((len(props) for props in anchor_connections.values()), default=0)
 
-  # get the mapping from anchor to bin
-  anchor_to_selected_bin = {}
-  for anchor, bin2var in anchor2bin2var.items():
-    for bin, var in bin2var.items():
-      var_value = round(var.x)
-      assert abs(var.x - var_value) < 0.000001, var.x # check that we are correctly treating each ILP var as CONTINOUS
+  cell_x = np.zeros((len(anchors), max_cell_num))
+  cell_y = np.zeros((len(anchors), max_cell_num))
+  lut_penalty = np.zeros((len(anchors), max_cell_num))
+  is_cell = np.zeros((len(anchors), max_cell_num), dtype=bool)
 
-      if var_value == 1:
-        anchor_to_selected_bin[anchor] = bin
-  
-  return anchor_to_selected_bin
+  for i, anchor in enumerate(anchors):
+    properties_of_end_cells_list = anchor_connections[anchor]
+    assert properties_of_end_cells_list, f'anchor {anchor} has no end cells'
+    num = len(properties_of_end_cells_list)
+    cell_x[i, :num] = [prop["normalized_coordinate"][0] for prop in properties_of_end_cells_list]
+    cell_y[i, :num] = [prop["normalized_coordinate"][1] for prop in properties_of_end_cells_list]
+    lut_penalty[i, :num] = [1 + 0.3 * prop["num_lut_on_path"] for prop in properties_of_end_cells_list]
+    is_cell[i, :num] = True
+
+  return anchors, cell_x, cell_y, lut_penalty, is_cell
+
+
+def __getCostMatrix(anchor_connections, bins, chunk_size=256):
+  """
+  the same cost as __getEdgeCost for all (anchor, bin) pairs
+  return the anchors and the cost matrix of shape (num_anchor, num_bin)
+  anchors are processed in chunks to bound the memory of the intermediate arrays
+  The end cells are accumulated one by one in the same order as __getEdgeCost,
+  thus the results are identical to the scalar version
+  """
+  anchors, cell_x, cell_y, lut_penalty, is_cell = __getEndCellArrays(anchor_connections)
+  bin_x = np.array([bin[0] for bin in bins], dtype=float)
+  bin_y = np.array([bin[1] for bin in bins], dtype=float)
+
+  # bounding box of the end cells of each anchor
+  down_left_x = np.where(is_cell, cell_x, np.inf).min(axis=1, initial=np.inf)
+  down_left_y = np.where(is_cell, cell_y, np.inf).min(axis=1, initial=np.inf)
+  up_right_x = np.where(is_cell, cell_x, -np.inf).max(axis=1, initial=-np.inf)
+  up_right_y = np.where(is_cell, cell_y, -np.inf).max(axis=1, initial=-np.inf)
+  cell_num = is_cell.sum(axis=1)
+
+  cost = np.empty((len(anchors), len(bins)))
+  for beg in range(0, len(anchors), chunk_size):
+    end = min(beg + chunk_size, len(anchors))
+
+    dist_sum = np.zeros((end - beg, len(bins)))
+    dist_max = np.full((end - beg, len(bins)), -np.inf)
+    dist_min = np.full((end - beg, len(bins)), np.inf)
+    for j in range(cell_x.shape[1]):
+      dist = (np.abs(cell_x[beg:end, j, None] - bin_x) + np.abs(cell_y[beg:end, j, None] - bin_y)) \
+        * lut_penalty[beg:end, j, None]
+      valid = is_cell[beg:end, j, None]
+      dist_sum += np.where(valid, dist, 0)
+      np.maximum(dist_max, np.where(valid, dist, -np.inf), out=dist_max)
+      np.minimum(dist_min, np.where(valid, dist, np.inf), out=dist_min)
+
+    # the average wire length
+    dist_score = dist_sum / cell_num[beg:end, None]
+
+    # want the anchor to be near the mid point
+    unbalance_penalty = dist_max - dist_min
+
+    in_bounding_box = (down_left_x[beg:end, None] <= bin_x) & (bin_x <= up_right_x[beg:end, None]) \
+                    & (down_left_y[beg:end, None] <= bin_y) & (bin_y <= up_right_y[beg:end, None])
+
+    cost[beg:end] = np.where(in_bounding_box, dist_score, 2 * dist_score) + unbalance_penalty
+
+  return anchors, cost
 
 
 def __getPlacementResults(anchor_to_selected_bin):
@@ -124,124 +169,96 @@ def __getPlacementResults(anchor_to_selected_bin):
   return anchor_2_slice_xy
 
 
-def __analyzeILPResults(anchor2bin2cost, anchor_to_selected_bin):
+def __analyzeILPResults(anchors, bins, cost_matrix, anchor_to_bin_idx):
   """
   get how optimal is the final position for each anchor
   """
+  rows = np.arange(len(anchors))
+  curr_cost = cost_matrix[rows, anchor_to_bin_idx]
+  optimal_bin_idx = cost_matrix.argmin(axis=1) if len(bins) else anchor_to_bin_idx
+
+  # the rank is the number of bins cheaper than the chosen one
+  ranks = (cost_matrix < curr_cost[:, None]).sum(axis=1)
 
   ilp_report = {}
+  for i, anchor in enumerate(anchors):
+    chosen_bin = bins[anchor_to_bin_idx[i]]
+    optimal_bin = bins[optimal_bin_idx[i]]
+    ilp_report[anchor] = {
+      'curr_cost' : float(curr_cost[i]),
+      'min_cost' : float(cost_matrix[i, optimal_bin_idx[i]]),
+      'max_cost' : float(cost_matrix[i].max()),
+      'rank_of_chosen_bin' : int(ranks[i]),
+      'total_bin_num' : len(bins),
+      'bin_location' : [chosen_bin[0], chosen_bin[1]],
+      'optimal_location' : [optimal_bin[0], optimal_bin[1]],
+    }
 
-  for anchor, chosen_bin in anchor_to_selected_bin.items():
-    ilp_report[anchor] = {}
-
-    bin2cost = anchor2bin2cost[anchor]
-    all_cost_list = [[cost, bin] for bin, cost in bin2cost.items()]
-    all_cost_list = sorted(all_cost_list, key=operator.itemgetter(0))
-    cost_value_list = [x[0] for x in all_cost_list]
-
-    ilp_report[anchor]['curr_cost'] = bin2cost[chosen_bin]
-    ilp_report[anchor]['min_cost'] = all_cost_list[0][0]
-    ilp_report[anchor]['max_cost'] = all_cost_list[-1][0]
-    ilp_report[anchor]['rank_of_chosen_bin'] = cost_value_list.index(bin2cost[chosen_bin])
-    ilp_report[anchor]['total_bin_num'] = len(all_cost_list)
-    ilp_report[anchor]['bin_location'] = [chosen_bin[0], chosen_bin[1]]
-    optimal_bin = all_cost_list[0][1]
-    ilp_report[anchor]['optimal_location'] = [optimal_bin[0], optimal_bin[1]]
-    
-  ranks = [anchor_info['rank_of_chosen_bin'] for anchor_info in ilp_report.values()]
   if len(ranks):
-    logging.info(f'average rank of the final placed bins: {sum(ranks) / len(ranks)}')
-    logging.info(f'worst rank of the final placed bins: {max(ranks)}')
+    logging.info(f'average rank of the final placed bins: {ranks.mean()}')
+    logging.info(f'worst rank of the final placed bins: {ranks.max()}')
   else:
     logging.warning(f'no anchors between the pair')
 
   open('ilp_quality_report.json', 'w').write(json.dumps(ilp_report, indent=2))
 
 
-def __debug_logging(anchor2bin2cost, anchor_connections):
+def __debug_logging(anchors, bins, cost_matrix):
+  """
+  dump the cost of every (anchor, bin) pair, e.g., for BenchmarkAssignmentSolver
+  this is slow and large for big pairs, thus only enabled by --dump_anchor_placement_cost
+  """
   logging.info('start dumping anchor_to_bin_to_cost')
 
-  anchor2loc2cost = {}
-  for anchor, bin2score in anchor2bin2cost.items():
-    loc2score = {f'SLICE_X{U250.getSliceOrigXCoordinates(bin[0])}Y{bin[1]}' : score for bin, score in bin2score.items()}
-    anchor2loc2cost[anchor] = loc2score
+  locs = [f'SLICE_X{U250.getSliceOrigXCoordinates(bin[0])}Y{bin[1]}' for bin in bins]
+  anchor2loc2cost = {anchor : dict(zip(locs, cost_matrix[i].tolist())) for i, anchor in enumerate(anchors)}
   open('debug_anchor_to_bin_to_cost.json', 'w').write(json.dumps(anchor2loc2cost, indent=2))
 
   logging.info('finish dumping anchor_to_bin_to_cost')
 
 
-def __ILPSolving(anchor_connections, bins, allowed_usage_per_bin):
+def __ILPSolving(anchor_connections, bins, allowed_usage_per_bin, solver, dump_cost=False):
   """
-  set up and solve the weight matching ILP
+  set up and solve the weight matching problem
   """
   start_time = time.perf_counter()
   get_time_stamp = lambda : time.perf_counter() - start_time
 
-  m = Model()
-
   logging.info(f'calculate bin cost... {get_time_stamp()}')
-  anchor2bin2cost = {} # for each anchor, the cost of each bin
-
-  for anchor, properties_of_end_cells_list in anchor_connections.items():
-    bin2cost = {bin : __getEdgeCost(properties_of_end_cells_list, bin) for bin in bins }
-    anchor2bin2cost[anchor] = bin2cost
-
-  __debug_logging(anchor2bin2cost, anchor_connections)
-
-  # create ILP variables.
-  # Note that we use the CONTINOUS type due to this special case
-  logging.info(f'create ILP variables... {get_time_stamp()}')
-  anchor2bin2var = {}
-  for anchor in anchor_connections.keys():
-    bin2var = {bin : m.add_var(var_type=CONTINUOUS, lb=0, ub=1) for bin in bins}
-    anchor2bin2var[anchor] = bin2var
-
-  bin2anchor2var = defaultdict(dict)
-  for anchor, bin2var in anchor2bin2var.items():
-    for bin, var in bin2var.items():
-      bin2anchor2var[bin][anchor] = var
-
-  # each anchor is placed once
-  logging.info(f'adding constraints... {get_time_stamp()}')
-  for anchor in anchor_connections.keys():
-    bin2var = anchor2bin2var[anchor]
-    m += xsum(var for var in bin2var.values()) == 1
-
-  # limit on bin size
-  for bin, anchor2var in bin2anchor2var.items():
-    m += xsum(var for var in anchor2var.values()) <= allowed_usage_per_bin
-
-  # objective
-  var_and_cost = []
-  for anchor, bin2cost in anchor2bin2cost.items():
-    bin2var = anchor2bin2var[anchor]
-    for bin in bin2cost.keys():
-      var_and_cost.append((bin2var[bin], bin2cost[bin]))
-  m.objective = minimize(xsum(var * cost for var, cost in var_and_cost))
-
-  logging.info(f'start the solving process... {get_time_stamp()}')
-  status = m.optimize()
-
-  if anchor2bin2var:
-    assert status == OptimizationStatus.OPTIMAL or status == OptimizationStatus.FEASIBLE, f'failed in ILP placement for {pair_name}'
-  
-  logging.info(f'finish the solving process with status {status} {get_time_stamp()}')
 
-  anchor_to_selected_bin = __getILPResults(anchor2bin2var)
+  # for each anchor, the cost of each bin
+  anchors, cost_matrix = __getCostMatrix(anchor_connections, bins)
+
+  if dump_cost:
+    __debug_logging(anchors, bins, cost_matrix)
+
+  logging.info(f'start the solving process with the {solver} solver... {get_time_stamp()}')
+  # only the bins near the end cells of an anchor will be selected
+  # thus the LP only includes the cheapest bins of each anchor and grows if necessary.
+  # The transportation solver already stops at the cheapest bins and is faster on the dense cost.
+  candidate_num = DEFAULT_CANDIDATE_NUM if solver == 'CBC' else None
+  capacity = np.full(len(bins), allowed_usage_per_bin)
+  anchor_to_bin_idx = solveAssignment(cost_matrix, capacity, solver, candidate_num)
+  assert anchor_to_bin_idx is not None, f'failed in ILP placement for {pair_name}'
+
+  logging.info(f'finish the solving process {get_time_stamp()}')
 
   # analyze the ILP results
-  __analyzeILPResults(anchor2bin2cost, anchor_to_selected_bin)
+  __analyzeILPResults(anchors, bins, cost_matrix, anchor_to_bin_idx)
+
+  anchor_to_selected_bin = {anchor : bins[anchor_to_bin_idx[i]] for i, anchor in enumerate(anchors)}
 
   # get the mapping from anchor to SLICE coordinates
   return __getPlacementResults(anchor_to_selected_bin)
 
 
-def runILPWeightMatchingPlacement(pair_name, anchor_connections):
+def runILPWeightMatchingPlacement(pair_name, anchor_connections, solver=DEFAULT_ASSIGNMENT_SOLVER, bin_cache_dir=None, dump_cost=False):
   """
   formulate the anchor placement algo as a weight matching problem.
   Quantize the buffer region into separate bins and assign a cost for each bin
   minimize the total cost.
   Note that we could use CONTINOUS ILP variables in this special case
+  and it is solved as a transportation problem by default
   anchor_connections: anchor_name -> [ {src_or_sink, site, num_lut, coordiante}, ... ]
   """
   slot1_name, slot2_name = pair_name.split('_AND_')
@@ -255,7 +272,7 @@ def runILPWeightMatchingPlacement(pair_name, anchor_connections):
 
   # note that the coordinates of the bins are calibrated
   # need to convert back to the original coordinates at the end
-  bins = __getWeightMatchingBins(slot1_name, slot2_name, bin_size_x, bin_size_y)
+  bins = __getWeightMatchingBins(slot1_name, slot2_name, bin_size_x, bin_size_y, bin_cache_dir)
 
   # set up allowd
   num_anchor = len(anchor_connections)
@@ -273,7 +290,7 @@ def runILPWeightMatchingPlacement(pair_name, anchor_connections):
   logging.info(f'allowed_usage_per_bin: {allowed_usage_per_bin}')
 
   # run the ILP model and write out the results
-  anchor_2_slice_xy = __ILPSolving(anchor_connections, bins, allowed_usage_per_bin)
+  anchor_2_slice_xy = __ILPSolving(anchor_connections, bins, allowed_usage_per_bin, solver, dump_cost)
   return anchor_2_slice_xy
 
   
@@ -344,7 +361,7 @@ def moveAnchorsOntoLagunaSites(hub, anchor_2_slice_xy, slot1_name, slot2_name):
 
     anchor_2_sll_dir = {}
     for anchor in anchor_2_slice_xy.keys():
-      hls_var_name = anchor.split('_q0_reg')[0]
+      hls_var_name = getWireOfAnchor(anchor)
       anchor_2_sll_dir[anchor] = slot_io_2_sll_dir[hls_var_name]
 
     return anchor_2_sll_dir
@@ -584,15 +601,15 @@ def collectAllConnectionsOfTargetAnchors(pair_name) -> Dict[str, List[Dict[str,
   dir_of_slot2_wrt_slot1 = getDirectionOfSlotname(slot1_name, slot2_name)
 
   try:
-    anchor_wire_names = [ io[-1] for io in hub["PathPlanningWire"][slot1_name][dir_of_slot2_wrt_slot1] ]
+    anchor_wire_names = getHubQuery(hub).getWiresOfSlotInDirection(slot1_name, dir_of_slot2_wrt_slot1)
   except Exception as e:
     logging.critical(f'cannot find {dir_of_slot2_wrt_slot1} in hub["PathPlanningWire"]["{slot1_name}"]')
-    anchor_wire_names = []
+    anchor_wire_names = set()
 
   # get the common anchors
   shared_anchors = set()
   for anchor in list(connection1.keys()) + list(connection2.keys()):
-    if any(f'{anchor_wire_name}_q0_reg' in anchor for anchor_wire_name in anchor_wire_names):
+    if getWireOfAnchor(anchor) in anchor_wire_names:
       shared_anchors.add(anchor)
       if anchor not in connection1:
         logging.critical(f'anchor {anchor} not found in the timing report of slot {slot1_name}')
@@ -608,17 +625,31 @@ def collectAllConnectionsOfTargetAnchors(pair_name) -> Dict[str, List[Dict[str,
   # obtained the shared anchors in anothe way to double check
   for anchor in connection1.keys():
     if anchor in connection2:
-      if not any(f'{anchor_wire_name}_q0_reg' in anchor for anchor_wire_name in anchor_wire_names):
+      if getWireOfAnchor(anchor) not in anchor_wire_names:
         logging.error(f'shared anchor {anchor} not found in front_end_result.json')
         assert False
   
   return common_anchor_connections
 
 
+def getDoneFlagsOfPair(pair_name) -> List[str]:
+  return [
+    f'{anchor_placement_dir}/{pair_name}/place_anchors.tcl.done.flag',
+    f'{anchor_placement_dir}/{pair_name}/create_and_place_anchors_for_clock_routing.tcl.done.flag',
+  ]
+
+
+def getTransferCommandsOfPair(pair_name) -> List[str]:
+  return [f'rsync_with_retry.sh --target-server {server} --user-name {user_name} --dir-to-sync {anchor_placement_dir}/{pair_name}/' \
+    for server in server_list]
+
+
 def setupAnchorPlacement(hub):
   """
   poll on if the initial placement of each slot has finished
   If two slots of a pair are both ready, start the ILP anchor placement
+  With --use_anchor_placement_service, a single SERVE task on the first server
+  places all pairs instead of one polling task per pair
   """
   tasks = []
   for slot1_name, slot2_name in hub["AllSlotPairs"]:
@@ -631,19 +662,22 @@ def setupAnchorPlacement(hub):
     ilp_placement = f'python3.6 -m rapidstream.BE.PairwiseAnchorPlacement \
       --hub_path {hub_path} --base_dir {base_dir} --option RUN --which_iteration {iter} \
       --pair_name {pair_name} --test_random_anchor_placement {args.test_random_anchor_placement} \
-      --user_name {args.user_name} --server_list_in_str "{args.server_list_in_str}"'
+      --user_name {args.user_name} --server_list_in_str "{args.server_list_in_str}" \
+      --anchor_placement_solver {args.anchor_placement_solver}'
 
-    touch_flag1 = f'touch {anchor_placement_dir}/{pair_name}/place_anchors.tcl.done.flag'
-    touch_flag2 = f'touch {anchor_placement_dir}/{pair_name}/create_and_place_anchors_for_clock_routing.tcl.done.flag'
-    touch_flag = touch_flag1 + ' && ' + touch_flag2
-    
-    transfer = []
-    for server in server_list:
-      transfer.append(f'rsync_with_retry.sh --target-server {server} --user-name {user_name} --dir-to-sync {anchor_placement_dir}/{pair_name}/')
-    transfer_str = " && ".join(transfer)
+    touch_flag = ' && '.join(f'touch {flag}' for flag in getDoneFlagsOfPair(pair_name))
+    transfer_str = " && ".join(getTransferCommandsOfPair(pair_name))
 
     tasks.append(f'cd {anchor_placement_dir}/{pair_name} && {guard1} && {guard2} && {ilp_placement} && {touch_flag} && {transfer_str}')
 
+  if args.use_anchor_placement_service:
+    # the service touches the done flags and transfers the results of each pair by itself
+    tasks = [f'cd {anchor_placement_dir} && python3.6 -m rapidstream.BE.PairwiseAnchorPlacement \
+      --hub_path {hub_path} --base_dir {base_dir} --option SERVE --which_iteration {iter} \
+      --test_random_anchor_placement {args.test_random_anchor_placement} \
+      --user_name {args.user_name} --server_list_in_str "{args.server_list_in_str}" \
+      --anchor_placement_solver {args.anchor_placement_solver} --worker_num {args.worker_num}']
+
   open(f'{anchor_placement_dir}/parallel-ilp-placement-iter{iter}.txt', 'w').write('\n'.join(tasks))
 
   num_job_server = math.ceil(len(tasks) / len(server_list) ) 
@@ -689,7 +723,8 @@ def setupSlotClockRouting(anchor_2_loc):
 def getRandomAnchorPlacementAndWriteScript(pair_name, common_anchor_connections):
   # to test random anchor placement, first make all anchors on SLICE
   # then shuffle the key: value pair of anchor_2_loc
-  anchor_2_slice_xy = runILPWeightMatchingPlacement(pair_name, common_anchor_connections)
+  anchor_2_slice_xy = runILPWeightMatchingPlacement(
+    pair_name, common_anchor_connections, args.anchor_placement_solver, bin_cache_dir, args.dump_anchor_placement_cost)
   anchor_2_loc = {anchor : f'SLICE_X{xy[0]}Y{xy[1]}' for anchor, xy in anchor_2_slice_xy.items() }
 
   keys_random = list(anchor_2_loc.keys())
@@ -711,6 +746,117 @@ def getRandomAnchorPlacementAndWriteScript(pair_name, common_anchor_connections)
   return anchor_2_loc
 
 
+def runAnchorPlacement(pair_name):
+  """
+  run the anchor placement of one pair in the current directory
+  """
+  logging.info(f'Start of session at: {round(time.time())}')
+
+  common_anchor_connections = collectAllConnectionsOfTargetAnchors(pair_name)
+  open('anchor_connection_of_the_pair.json', 'w').write(json.dumps(common_anchor_connections, indent=2))
+
+  logging.info(f'runing ILP anchor placement for pair {pair_name}')
+
+  slot1_name, slot2_name = pair_name.split('_AND_')
+
+  is_slr_crossing_pair = isPairSLRCrossing(slot1_name, slot2_name)
+
+  # normal flow
+  if not args.test_random_anchor_placement:
+    if is_slr_crossing_pair:
+      anchor_2_loc = placeLagunaAnchors(hub, pair_name, common_anchor_connections, args.anchor_placement_solver)
+    else:
+      anchor_2_slice_xy = runILPWeightMatchingPlacement(
+        pair_name, common_anchor_connections, args.anchor_placement_solver, bin_cache_dir, args.dump_anchor_placement_cost)
+      anchor_2_loc = {anchor : f'SLICE_X{xy[0]}Y{xy[1]}' for anchor, xy in anchor_2_slice_xy.items() }
+
+    writePlacementResults(anchor_2_loc, common_anchor_connections, is_slr_crossing_pair)
+
+  # baseline: random anchor placement
+  else:
+    anchor_2_loc = getRandomAnchorPlacementAndWriteScript(pair_name, common_anchor_connections)
+  
+  setupSlotClockRouting(anchor_2_loc)
+  
+  # FIXME: the exit time tracker use this keyword to locate the exit time
+  logging.info(f'Exiting Vivado at: {round(time.time())}')
+
+
+def _servePair(pair_name):
+  """
+  the worker of serveAnchorPlacement. Same as one task created by setupAnchorPlacement
+  The device model and the hub are inherited from the service through fork
+  """
+  os.chdir(f'{anchor_placement_dir}/{pair_name}')
+
+  root = logging.getLogger()
+  pair_log_handler = logging.FileHandler(filename='ILP-placement.log', mode='w')
+  pair_log_handler.setLevel(logging.INFO)
+  pair_log_handler.setFormatter(logging.Formatter("[%(levelname)s: %(funcName)25s() ] %(message)s"))
+  root.addHandler(pair_log_handler)
+
+  try:
+    runAnchorPlacement(pair_name)
+  finally:
+    root.removeHandler(pair_log_handler)
+    pair_log_handler.close()
+
+  for flag in getDoneFlagsOfPair(pair_name):
+    open(flag, 'w').close()
+
+  for transfer in getTransferCommandsOfPair(pair_name):
+    subprocess.run(transfer, shell=True, check=True)
+
+  return pair_name
+
+
+def serveAnchorPlacement(hub, worker_num):
+  """
+  a long-running alternative to the tasks of setupAnchorPlacement.
+  The device model and the hub are loaded once.
+  Each pair is placed in a worker as soon as the anchor connections of both slots are ready.
+  Wait for the done flags of the slots with a file watcher instead of polling.
+  """
+  os.makedirs(anchor_placement_dir, exist_ok=True)
+
+  flag_to_slot = {}
+  slot_to_pair_names = defaultdict(list)
+  for slot1_name, slot2_name in hub["AllSlotPairs"]:
+    pair_name = f'{slot1_name}_AND_{slot2_name}'
+    os.makedirs(f'{anchor_placement_dir}/{pair_name}', exist_ok=True)
+    for slot_name in (slot1_name, slot2_name):
+      flag_to_slot[os.path.abspath(f'{get_anchor_connection_path(slot_name)}.done.flag')] = slot_name
+      slot_to_pair_names[slot_name].append(pair_name)
+
+  logging.info(f'serving {sum(len(pairs) for pairs in slot_to_pair_names.values()) // 2} pairs on {worker_num} workers')
+
+  ready_slots = set()
+  pair_name_to_result = {}
+  watcher = FileWatcher(flag_to_slot.keys())
+  with multiprocessing.get_context('fork').Pool(worker_num) as pool:
+    while watcher.pending:
+      for flag in watcher.wait():
+        slot_name = flag_to_slot[flag]
+        ready_slots.add(slot_name)
+        for pair_name in slot_to_pair_names[slot_name]:
+          slot1_name, slot2_name = pair_name.split('_AND_')
+          if slot1_name in ready_slots and slot2_name in ready_slots and pair_name not in pair_name_to_result:
+            logging.info(f'both slots of {pair_name} are ready')
+            pair_name_to_result[pair_name] = pool.apply_async(_servePair, (pair_name,))
+    watcher.close()
+
+    failed_pairs = []
+    for pair_name, result in pair_name_to_result.items():
+      try:
+        result.get()
+        logging.info(f'finished anchor placement of {pair_name}')
+      except Exception as e:
+        logging.error(f'anchor placement of {pair_name} failed: {e}')
+        failed_pairs.append(pair_name)
+
+  assert not failed_pairs, f'anchor placement failed for {failed_pairs}'
+
+
 if __name__ == '__main__':
   parser = argparse.ArgumentParser()
   parser.add_argument("--hub_path", type=str, required=True)
@@ -721,10 +867,14 @@ if __name__ == '__main__':
   parser.add_argument("--test_random_anchor_placement", type=int, required=True)
   parser.add_argument("--server_list_in_str", type=str, required=True, help="e.g., \"u5 u15 u17 u18\"")
   parser.add_argument("--user_name", type=str, required=True)
+  parser.add_argument("--worker_num", type=int, default=os.cpu_count(), help="number of parallel pairs with --option SERVE")
+  parser.add_argument("--use_anchor_placement_service", type=int, default=0, help="with --option SETUP, run all pairs in one SERVE task")
+  parser.add_argument("--anchor_placement_solver", type=str, choices=ASSIGNMENT_SOLVERS, default=DEFAULT_ASSIGNMENT_SOLVER)
+  parser.add_argument("--dump_anchor_placement_cost", action="store_true", help="write the cost of all anchor-bin pairs to debug_anchor_to_bin_to_cost.json")
   args = parser.parse_args()
 
   hub_path = args.hub_path
-  base_dir = args.base_dir
+  base_dir = os.path.abspath(args.base_dir)
   user_name = args.user_name
   server_list = args.server_list_in_str.split()
 
@@ -732,7 +882,7 @@ if __name__ == '__main__':
   iter = args.which_iteration
   pair_name = args.pair_name
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   pipeline_style = hub["InSlotPipelineStyle"]
 
@@ -746,6 +896,9 @@ if __name__ == '__main__':
   else:
     anchor_placement_dir = f'{base_dir}/baseline_random_anchor_placement_iter{iter}'
 
+  # the bins of each pair are shared by all iterations
+  bin_cache_dir = f'{base_dir}/anchor_placement_bin_cache'
+
   # run this before the ILP anchor placement, setup for the later steps
   if option == 'SETUP':
     os.mkdir(anchor_placement_dir)    
@@ -753,35 +906,11 @@ if __name__ == '__main__':
 
   # run the ILP placement for the given slot pairs
   elif option == 'RUN':
-    logging.info(f'Start of session at: {round(time.time())}')
-
-    common_anchor_connections = collectAllConnectionsOfTargetAnchors(pair_name)
-    open('anchor_connection_of_the_pair.json', 'w').write(json.dumps(common_anchor_connections, indent=2))
+    runAnchorPlacement(pair_name)
 
-    logging.info(f'runing ILP anchor placement for pair {pair_name}')
-
-    slot1_name, slot2_name = pair_name.split('_AND_')
-
-    is_slr_crossing_pair = isPairSLRCrossing(slot1_name, slot2_name)
-
-    # normal flow
-    if not args.test_random_anchor_placement:
-      if is_slr_crossing_pair:
-        anchor_2_loc = placeLagunaAnchors(hub, pair_name, common_anchor_connections)
-      else:
-        anchor_2_slice_xy = runILPWeightMatchingPlacement(pair_name, common_anchor_connections)
-        anchor_2_loc = {anchor : f'SLICE_X{xy[0]}Y{xy[1]}' for anchor, xy in anchor_2_slice_xy.items() }
-
-      writePlacementResults(anchor_2_loc, common_anchor_connections, is_slr_crossing_pair)
-
-    # baseline: random anchor placement
-    else:
-      anchor_2_loc = getRandomAnchorPlacementAndWriteScript(pair_name, common_anchor_connections)
-    
-    setupSlotClockRouting(anchor_2_loc)
-    
-    # FIXME: the exit time tracker use this keyword to locate the exit time
-    logging.info(f'Exiting Vivado at: {round(time.time())}')
+  # place all pairs in this process as soon as their slots are ready
+  elif option == 'SERVE':
+    serveAnchorPlacement(hub, args.worker_num)
 
   else:
     assert False, f'unrecognized option {option}'
\ No newline at end of file
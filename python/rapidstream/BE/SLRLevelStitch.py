@@ -1,12 +1,12 @@
 import argparse
 import sys
-import json
 import re
 import os
 
 import rapidstream.BE.Constants as Constants
 from rapidstream.BE.SlotRouting import addSomeAnchors, removePlaceholderAnchors
 from rapidstream.BE.Utilities import getSlotsInSLRIndex, loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -144,7 +144,7 @@ if __name__ == '__main__':
   hub_path = args.hub_path
   base_dir = args.base_dir
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   slr_stitch_dir = f'{base_dir}/SLR_level_stitch'
   os.mkdir(slr_stitch_dir)
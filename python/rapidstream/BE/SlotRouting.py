@@ -1,6 +1,5 @@
 import argparse
 import sys
-import json
 import os
 import re
 import math
@@ -14,7 +13,9 @@ from rapidstream.BE.Utilities import (
   loggingSetup,
   getSlotIndicesFromSlotName,
   getSLRCrossingNeighbor,
+  getHubQuery,
 )
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -49,7 +50,7 @@ def addSomeAnchors(hub, base_dir, slot_name_list: List[str]):
   """
   when route a slot, instantiate and place a subset of anchors, so that the tap of row buffers are closer to the real case.
   """
-  pair_name_list = ['_AND_'.join(pair) for pair in hub["AllSlotPairs"]]
+  pair_name_list = getHubQuery(hub).pair_names
   get_create_anchor_script = lambda pair_name : f'{base_dir}/ILP_anchor_placement_iter0/{pair_name}/create_and_place_anchors_for_clock_routing.tcl'
   script = ['set_property DONT_TOUCH 0 [get_nets ap_clk]']
 
@@ -65,7 +66,7 @@ def addAllAnchors(hub, base_dir, slot_name_list: List[str]):
   """
   when route a slot, instantiate and place all anchors, so that the tap of row buffers are closer to the real case.
   """
-  pair_name_list = ['_AND_'.join(pair) for pair in hub["AllSlotPairs"]]
+  pair_name_list = getHubQuery(hub).pair_names
   get_create_anchor_script = lambda pair_name : f'{base_dir}/ILP_anchor_placement_iter0/{pair_name}/create_and_place_anchors_for_clock_routing.tcl'
 
   script = ['set_property DONT_TOUCH 0 [get_nets ap_clk]']
@@ -361,7 +362,7 @@ if __name__ == '__main__':
   opt_dir = f'{base_dir}/opt_placement_iter0'
   anchor_source_dir = f'{base_dir}/ILP_anchor_placement_iter0'
   anchor_clock_routing_dir = f'{base_dir}/slot_anchor_clock_routing'
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   if args.do_not_fix_clock == False:
     routing_dir = f'{base_dir}/slot_routing'
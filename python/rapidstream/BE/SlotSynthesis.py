@@ -1,11 +1,11 @@
 import argparse
-import json
 import logging
 import math
 import os
 
 from rapidstream.BE.UniversalWrapperCreater import addAnchorToNonTopIOs
 from rapidstream.BE.Utilities import loggingSetup
+from rapidstream.BE.Hub import Hub
 
 loggingSetup()
 
@@ -159,7 +159,7 @@ if __name__ == '__main__':
     logging.info('invert clock mode is on!')
   logging.info(f'server list: {server_list}')
 
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
 
   synth_dir = f'{base_dir}/slot_synth'
   os.mkdir(synth_dir)
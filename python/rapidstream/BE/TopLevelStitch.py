@@ -1,6 +1,6 @@
 import os
 from rapidstream.BE.UniversalWrapperCreater import getWrapperOfSlots
-from rapidstream.BE.Utilities import getSlotsInSLRIndex
+from rapidstream.BE.Utilities import getSlotsInSLRIndex, getHubQuery
 
 
 def getTopLevelWrapperForSLRSlots(top_stitch_dir, slr_name_2_dir_and_width_and_io_name):
@@ -15,8 +15,8 @@ def getInterSLRPairs(hub, slr_num):
   """
   find all slot pairs that cross a SLR boundary
   """
-  slr_index_2_slots = [getSlotsInSLRIndex(hub, i) for i in range(slr_num)]
-  pair_list = hub['AllSlotPairs']
+  slr_index_2_slots = [set(getSlotsInSLRIndex(hub, i)) for i in range(slr_num)]
+  pair_list = getHubQuery(hub).pairs
 
   inter_slr_pairs = []
   for i in range(slr_num-1):
@@ -1,11 +1,9 @@
 import logging
 import re
 import sys
-from typing import List, Optional
-
-from autobridge.Opt.Slot import Slot
-from autobridge.Device.DeviceManager import DeviceU250
-U250_inst = DeviceU250()
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 
 
 LAGUNA_REG_Y_RANGE = [
@@ -15,28 +13,114 @@ LAGUNA_REG_Y_RANGE = [
 ]
 
 
-def getSlotIndicesFromSlotName(slot_name):
+@lru_cache(maxsize=None)
+def getSlotCoordinates(slot_name: str) -> Tuple[int, int, int, int]:
+  """
+  down_left_x, down_left_y, up_right_x, up_right_y of the slot in clock regions
+  """
   match = re.search(r'CR_X(\d+)Y(\d+)_To_CR_X(\d+)Y(\d+)', slot_name)
-  return [int(match.group(i)) for i in range(1, 5)]
+  return tuple(int(match.group(i)) for i in range(1, 5))
 
 
-def getSlotsInSLRIndex(hub, slr_index):
+def getSlotIndicesFromSlotName(slot_name):
+  return list(getSlotCoordinates(slot_name))
+
+
+def getSLRIndexOfSlot(slot_name: str) -> Optional[int]:
   """
-  get all slots within a given SLR
+  None if the slot spans multiple SLRs
+  """
+  _, DL_y, _, UR_y = getSlotCoordinates(slot_name)
+
+  # assume that each SLR has 4 rows of clock regions
+  if DL_y // 4 == UR_y // 4:
+    return DL_y // 4
+  return None
+
+
+def getWireOfAnchor(anchor: str) -> str:
+  """
+  an anchor register is named after the wire it pipelines, e.g., {wire}_q0_reg[3]
+  """
+  return anchor.split('_q0_reg')[0]
+
+
+class HubQuery:
   """
-  all_slot_names = hub['SlotIO'].keys()
-  slots_in_slr = []
-  for name in all_slot_names:
-    match = re.search(r'CR_X(\d+)Y(\d+)_To_CR_X(\d+)Y(\d+)', name)
-    DL_y = int(match.group(2))
-    UR_y = int(match.group(4))
+  indexes of the slots and pairs in the hub, built once per process
+  so that the queries do not parse slot names or scan the hub
+  """
+  def __init__(self, hub):
+    self.hub = hub
+    self.slot_names: List[str] = list(hub['SlotIO'].keys())
+    self.pairs: List[Tuple[str, str]] = [tuple(pair) for pair in hub['AllSlotPairs']]
+    self.pair_names: List[str] = ['_AND_'.join(pair) for pair in self.pairs]
+
+    self.slr_to_slots: Dict[int, List[str]] = defaultdict(list)
+    for name in self.slot_names:
+      slr_index = getSLRIndexOfSlot(name)
+      if slr_index is not None:
+        self.slr_to_slots[slr_index].append(name)
+
+    # in the order of the pairs
+    self.slot_to_neighbors: Dict[str, List[str]] = defaultdict(list)
+    self.slot_to_dir_to_neighbor: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for slot1_name, slot2_name in self.pairs:
+      self.slot_to_neighbors[slot1_name].append(slot2_name)
+      self.slot_to_neighbors[slot2_name].append(slot1_name)
+      for slot_name, neighbor in ((slot1_name, slot2_name), (slot2_name, slot1_name)):
+        dir = getDirectionOfSlotCoordinates(getSlotCoordinates(slot_name), getSlotCoordinates(neighbor))
+        if dir:
+          self.slot_to_dir_to_neighbor[slot_name][dir] = neighbor
+
+    self.slot_to_slr_crossing_neighbor: Dict[str, str] = {}
+    for slot_name, neighbors in self.slot_to_neighbors.items():
+      for neighbor in neighbors:
+        if isPairSLRCrossing(neighbor, slot_name):
+          self.slot_to_slr_crossing_neighbor[slot_name] = neighbor
+          break
+
+    # (slot name, direction) -> names of the wires, built on demand
+    self.slot_dir_to_wires: Dict[Tuple[str, str], Set[str]] = {}
+
+  def getSlotsInSLR(self, slr_index: int) -> List[str]:
+    return self.slr_to_slots.get(slr_index, [])
+
+  def getNeighborSlots(self, slot_name: str) -> List[str]:
+    return self.slot_to_neighbors.get(slot_name, [])
+
+  def getNeighborSlotInDirection(self, slot_name: str, dir: str) -> Optional[str]:
+    return self.slot_to_dir_to_neighbor.get(slot_name, {}).get(dir)
+
+  def getSLRCrossingNeighbor(self, slot_name: str) -> Optional[str]:
+    return self.slot_to_slr_crossing_neighbor.get(slot_name)
+
+  def getWiresOfSlotInDirection(self, slot_name: str, dir: str) -> Set[str]:
+    """
+    the wires that leave the slot in the direction according to PathPlanningWire
+    """
+    key = (slot_name, dir)
+    if key not in self.slot_dir_to_wires:
+      ios = self.hub['PathPlanningWire'][slot_name][dir]
+      self.slot_dir_to_wires[key] = {io[-1] for io in ios}
+    return self.slot_dir_to_wires[key]
+
+
+# hub id -> (hub, query). Keep the hub so that the id is not reused
+_hub_to_query: Dict[int, Tuple[object, HubQuery]] = {}
+
+
+def getHubQuery(hub) -> HubQuery:
+  if id(hub) not in _hub_to_query:
+    _hub_to_query[id(hub)] = (hub, HubQuery(hub))
+  return _hub_to_query[id(hub)][1]
 
-    # assume that each SLR has 4 rows of clock regions
-    if slr_index * 4 <= DL_y <= slr_index * 4 + 3:
-      if slr_index * 4 <= UR_y <= slr_index * 4 + 3:
-        slots_in_slr.append(name)
 
-  return slots_in_slr
+def getSlotsInSLRIndex(hub, slr_index):
+  """
+  get all slots within a given SLR
+  """
+  return list(getHubQuery(hub).getSlotsInSLR(slr_index))
 
 
 def getPruningAnchorScript(dcp_path, inner_module_name, output_dir):
@@ -72,27 +156,21 @@ def getPruningAnchorScript(dcp_path, inner_module_name, output_dir):
 
 
 def getSLRCrossingNeighbor(hub, slot_name) -> Optional[str]:
-  for neighbor in getNeighborSlots(hub, slot_name):
-    if isPairSLRCrossing(neighbor, slot_name):
-      return neighbor
-  return None
+  return getHubQuery(hub).getSLRCrossingNeighbor(slot_name)
 
 
 def isPairSLRCrossing(slot1_name: str, slot2_name: str) -> bool:
   """
   check if two slots span two SLRs
   """
-  slot1 = Slot(U250_inst, slot1_name)
-  slot2 = Slot(U250_inst, slot2_name)
+  slot1_dl_x, slot1_dl_y, _, _ = getSlotCoordinates(slot1_name)
+  slot2_dl_x, slot2_dl_y, _, _ = getSlotCoordinates(slot2_name)
 
-  if slot1.down_left_x != slot2.down_left_x:
+  if slot1_dl_x != slot2_dl_x:
     return False
   else:
-    up_slot = slot1 if slot1.down_left_y > slot2.down_left_y else slot2
-    if not any(y == up_slot.down_left_y for y in [4, 8, 12]):
-      return False
-    else:
-      return True
+    up_slot_dl_y = slot1_dl_y if slot1_dl_y > slot2_dl_y else slot2_dl_y
+    return up_slot_dl_y in [4, 8, 12]
 
 
 def getSLRIndexOfLaguna(laguna_loc: str) -> int:
@@ -144,14 +222,7 @@ def getPairingLagunaTXOfRX(rx_reg: str) -> str:
 
 
 def getNeighborSlots(hub, slot_name: str) -> List[str]:
-  neighbors = []
-  for slot1_name, slot2_name in hub["AllSlotPairs"]:
-    if slot1_name == slot_name:
-      neighbors.append(slot2_name)
-    elif slot2_name == slot_name:
-      neighbors.append(slot1_name)
-
-  return neighbors
+  return list(getHubQuery(hub).getNeighborSlots(slot_name))
 
 
 def getAnchorTimingReportScript(report_prefix: str) -> List[str]:
@@ -163,23 +234,34 @@ def getAnchorTimingReportScript(report_prefix: str) -> List[str]:
 
   return script
 
+def getDirectionOfSlotCoordinates(coord1, coord2) -> Optional[str]:
+  """
+  same as Slot.isAbove / isBelow / isToTheLeftOf / isToTheRightOf
+  None if the two slots are not adjacent
+  """
+  dl_x1, dl_y1, ur_x1, ur_y1 = coord1
+  dl_x2, dl_y2, ur_x2, ur_y2 = coord2
+
+  if dl_x1 == dl_x2 and ur_x1 == ur_x2:
+    if dl_y2 == ur_y1 + 1:
+      return 'UP'
+    elif dl_y1 == ur_y2 + 1:
+      return 'DOWN'
+  if dl_y1 == dl_y2 and ur_y1 == ur_y2:
+    if ur_x2 + 1 == dl_x1:
+      return 'LEFT'
+    elif ur_x1 + 1 == dl_x2:
+      return 'RIGHT'
+  return None
+
+
 def getDirectionOfSlotname(slot_name1: str, slot_name2: str) -> str:
   """
   which direction slot_name2 is with reference to slot_name1 
   """
-  slot1 = Slot(U250_inst, slot_name1)
-  slot2 = Slot(U250_inst, slot_name2)
-
-  if slot2.isAbove(slot1):
-    return 'UP'
-  elif slot2.isBelow(slot1):
-    return 'DOWN'
-  elif slot2.isToTheLeftOf(slot1):
-    return 'LEFT'
-  elif slot2.isToTheRightOf(slot1):
-    return 'RIGHT'
-  else:
-    assert False
+  dir = getDirectionOfSlotCoordinates(getSlotCoordinates(slot_name1), getSlotCoordinates(slot_name2))
+  assert dir, f'{slot_name1} and {slot_name2} are not adjacent'
+  return dir
 
 
 def loggingSetup(log_name = ""):
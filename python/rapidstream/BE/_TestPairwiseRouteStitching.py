@@ -1,7 +1,7 @@
 import sys
-import json
 import os
 from rapidstream.BE.SlotRouting import addAllAnchors, unrouteNonLagunaAnchorDPinQPinNets
+from rapidstream.BE.Hub import Hub
 
 
 def getVivadoScriptForSlotPair(pair_name):
@@ -66,7 +66,7 @@ if __name__ == '__main__':
   slot_routing_dir = f'{base_dir}/unique_slots_add_anchor_reroute'
   os.mkdir(test_dir)
   
-  hub = json.loads(open(hub_path, 'r').read())
+  hub = Hub(hub_path)
   pair_list = hub["AllSlotPairs"]
 
   for pair in pair_list:
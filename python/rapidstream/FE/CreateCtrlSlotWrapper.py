@@ -1,6 +1,8 @@
 #! /usr/bin/python3.6
 import logging
-import copy
+
+from rapidstream.FE.IncrementalWrappers import getSignature
+from rapidstream.FE.WrapperEmitter import emitWrappers
 
 class CreateCtrlSlotWrapper:
   def __init__(
@@ -306,11 +308,20 @@ class CreateCtrlSlotWrapper:
 
     return wrapper
   
-  def createCtrlInclusiveWrapperForAll(self, dir='ctrl_wrapper_rtl'):
-    for slot in self.all_active_slots:
-      wrapper = self.getCtrlInclusiveWrapper(slot)
-      f = open(dir + '/' + slot.getRTLModuleName()+'_ctrl.v', 'w')
-      f.write('\n'.join(wrapper))
+  def getWrapperSignature(self, slot):
+    """ summary of the inputs of the wrapper, including the inner wrappers """
+    return getSignature({
+      'Inner' : self.routing_wrapper_creater.getWrapperSignature(slot),
+      'IO' : self.__getIOSection(slot),
+      'SAxiSlot' : self.s_axi_slot.getRTLModuleName(),
+    })
+
+  def createCtrlInclusiveWrapperForAll(self, dir='ctrl_wrapper_rtl', worker_num=1, slots=None):
+    if slots is None:
+      slots = self.all_active_slots
+    emitWrappers(
+      slots, self.getCtrlInclusiveWrapper, lambda s: dir + '/' + s.getRTLModuleName()+'_ctrl.v', worker_num
+    )
 
   def getSlotToIOList(self):
     """maintain the same interface as CreateSlotWrapper """
@@ -335,22 +346,14 @@ class CreateCtrlSlotWrapper:
   def getSlotToDirToWires(self):
 
     # note that routing_slot_to_dir_to_wires excludes all ap signals
-    routing_slot_to_dir_to_wires = self.routing_wrapper_creater.getDirectionOfPassingEdgeWiresUpdated()
-
-    ctrl_slot_to_dir_to_wires = copy.deepcopy(routing_slot_to_dir_to_wires)
+    # the map is newly created by the routing wrapper creater, so we can modify it without a copy
+    ctrl_slot_to_dir_to_wires = self.routing_wrapper_creater.getDirectionOfPassingEdgeWiresUpdated()
 
     # get rid of the 'IN' and 'OUT'
     # TODO: remove them from the global router
     for slot, dir_to_wires in ctrl_slot_to_dir_to_wires.items():
       for dir in ['UP', 'DOWN', 'RIGHT', 'LEFT']:
-        wires = []
-        if f'{dir}_IN' in dir_to_wires:
-          wires += dir_to_wires[f'{dir}_IN']
-          dir_to_wires.pop(f'{dir}_IN')
-        if f'{dir}_OUT' in dir_to_wires:
-          wires += dir_to_wires[f'{dir}_OUT']          
-          dir_to_wires.pop(f'{dir}_OUT')
-
+        wires = dir_to_wires.pop(f'{dir}_IN', []) + dir_to_wires.pop(f'{dir}_OUT', [])
         if wires:
           dir_to_wires[dir] = wires
 
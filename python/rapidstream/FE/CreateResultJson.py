@@ -5,6 +5,7 @@ import re
 from collections import defaultdict
 from autobridge.Opt.Slot import Slot
 from autobridge.Device.DeviceManager import DeviceU250
+from rapidstream.BE.Hub import writeBinaryHub, getBinaryHubPath
 U250_inst = DeviceU250()
 
 
@@ -166,4 +167,8 @@ class CreateResultJson:
     result['SlotToDirToWireNum'] = self.__getSlotToDirToWireNum(result['PathPlanningWire'], result['AllSlotPairs'])
 
     f = open(file, 'w')
-    f.write(json.dumps(result, indent=2))
\ No newline at end of file
+    f.write(json.dumps(result, indent=2))
+    f.close()
+
+    # the back end loads the sections of the binary hub on demand. Written after the json to be up to date
+    writeBinaryHub(result, getBinaryHubPath(file))
\ No newline at end of file
@@ -1,8 +1,37 @@
 #! /usr/bin/python3.6
 import logging
-from typing import List
+from collections import defaultdict, deque
+from typing import List, Optional
 import re
 
+from rapidstream.FE.IncrementalWrappers import getSignature
+from rapidstream.FE.WrapperEmitter import emitWrappers
+
+class PassingWireIndex:
+  """
+  index the IOs of a routing wrapper by the original wire name
+  wire name -> queue of the IOs named {wire}_pass_{index}, sorted by the IO name
+  """
+  def __init__(self, io_list: List[List[str]]):
+    self.wire_to_ios = defaultdict(deque)
+    self.other_ios = []
+
+    for io in sorted(io_list, key=lambda io : io[-1]):
+      match = re.search(r'^(.+)_pass_\d+$', io[-1])
+      if match:
+        self.wire_to_ios[match.group(1)].append(io)
+      else:
+        self.other_ios.append(io)
+
+  def popFirstIOOfWire(self, wire: str) -> Optional[List[str]]:
+    """ remove and return the IO of the wire with the smallest name """
+    ios = self.wire_to_ios.get(wire)
+    return ios.popleft() if ios else None
+
+  def getRemainingIOs(self) -> List[List[str]]:
+    return self.other_ios + [io for ios in self.wire_to_ios.values() for io in ios]
+
+
 class CreateRoutingSlotWrapper:
 
   def __init__(self, compute_wrapper_creater, floorplan, global_router, top_rtl_parser, pipeline_style, anchor_plan: int):
@@ -305,18 +334,35 @@ class CreateRoutingSlotWrapper:
 
     return wrapper
 
-  def createRoutingInclusiveWrapperForAll(self, dir='wrapper_rtl'):
-    def generateWrapper(wrapper, slot):
-      f = open(dir + '/' + slot.getRTLModuleName()+'_routing.v', 'w')
-      f.write('\n'.join(wrapper))
+  def getAllSlots(self):
+    return list(self.compute_slot_to_io.keys()) + list(self.pure_routing_slots)
+
+  def getWrapperSignature(self, slot):
+    """ summary of the inputs of the wrapper, including the inner wrapper """
+    is_pure_routing = self.global_router.isPureRoutingSlot(slot)
+    content = {
+      'Inner' : None if is_pure_routing else self.compute_wrapper_creater.getWrapperSignature(slot),
+      'IO' : self.getIOSection(slot, is_pure_routing),
+      'PassingEdges' : [
+        [e_name, self.global_router.getIndexOfSlotInPath(e_name, slot)] \
+          for e_name in self.global_router.getPassingEdgeNamesOfSlot(slot)
+      ],
+      'PipelineStyle' : self.in_slot_pipeline_style,
+      'AnchorPlan' : self.anchor_plan,
+    }
+    if not is_pure_routing:
+      s2v = self.floorplan.getSlotToVertices()
+      intra_edges, inter_edges = self.floorplan.getIntraAndInterEdges(s2v[slot])
+      content['InterSlotEdges'] = [[e.name, self.global_router.getPathLength(e.name)] for e in inter_edges]
 
-    for slot, wrapper_io_list in self.compute_slot_to_io.items():
-      routing_wrapper = self.getRoutingInclusiveWrapper(slot)
-      generateWrapper(routing_wrapper, slot)
+    return getSignature(content)
 
-    for slot in self.pure_routing_slots:
-      routing_wrapper = self.getRoutingInclusiveWrapper(slot)
-      generateWrapper(routing_wrapper, slot)    
+  def createRoutingInclusiveWrapperForAll(self, dir='wrapper_rtl', worker_num=1, slots=None):
+    if slots is None:
+      slots = self.getAllSlots()
+    emitWrappers(
+      slots, self.getRoutingInclusiveWrapper, lambda s: dir + '/' + s.getRTLModuleName()+'_routing.v', worker_num
+    )
 
   def getSlotToIOList(self):
     """maintain the same interface as CreateSlotWrapper """
@@ -364,7 +410,7 @@ class CreateRoutingSlotWrapper:
     The problem is that the same wire will go in and out of the same slot, though through different boundary
     To correctly set the index in their appendix, we start with the IN side
     And we sort the list of modified IO
-    For each wire of inbound edges, we look for the first partial match in the list of modified IO
+    For each wire of inbound edges, we look for the first match in the list of modified IO
     for a passing edge, the one with smaller index will be used.
     Then we remove the used ones from the list of modified IO
     After all inbound edges are processed, we go with outbound edges.
@@ -379,18 +425,13 @@ class CreateRoutingSlotWrapper:
     change 3: add the width information as well because of backend's need
     """
 
-    def partialMatchAndRemove():
+    def matchAndRemove():
       updated_io_list = []
       for orig_wire in orig_wire_list:
-        for updated_io in routing_wrapper_io_list[:] :
-          if f'{orig_wire}_pass_' in updated_io[-1]:
-            updated_io_list.append(updated_io)
-
-            # remove so that this io will not be matched again
-            routing_wrapper_io_list.remove(updated_io)
-
-            # break to prevent redundant matching
-            break
+        # the matched io is removed from the index so that it will not be matched again
+        updated_io = passing_wire_index.popFirstIOOfWire(orig_wire)
+        if updated_io:
+          updated_io_list.append(updated_io)
 
       dir_to_wires[dir] = updated_io_list
 
@@ -400,25 +441,22 @@ class CreateRoutingSlotWrapper:
     routing_slot_2_io = self.getSlotToIOList() # the return has separated direction, width and wire name
     
     for slot, dir_to_wires in slot_to_dir_to_wires.items():
-      routing_wrapper_io_list = routing_slot_2_io[slot]
-      routing_wrapper_wire_list = [io[-1] for io in routing_wrapper_io_list]
-
-      # sort the updated io list so that small index comes first
-      routing_wrapper_io_list.sort(key=lambda io : io[-1])
+      # the index sorts the updated io list so that small index comes first
+      passing_wire_index = PassingWireIndex(routing_slot_2_io[slot])
 
       # first match the IN side because inbound edges have smaller indices
       for dir, orig_wire_list in dir_to_wires.items():
         if '_IN' in dir:
-          partialMatchAndRemove()
+          matchAndRemove()
         
       # next match the OUT side. Previously matched IOs have been removed
       for dir, orig_wire_list in dir_to_wires.items():
         if '_OUT' in dir:
-          partialMatchAndRemove()
+          matchAndRemove()
 
       # only ctrl IOs should be left
       assert all(io[-1].startswith('ap_') or '_axi' in io[-1] or 'interrupt' in io[-1] \
-        for io in routing_wrapper_io_list)
+        for io in passing_wire_index.getRemainingIOs())
 
     # the width and i/o direction is also attached
     return slot_to_dir_to_wires
\ No newline at end of file
@@ -1,10 +1,12 @@
 #! /usr/bin/python3.6
 import logging
 import re
-import copy
 import os
 import shutil
 from autobridge.Codegen.FIFOTemplate import fifo_template
+from rapidstream.FE.DeclIndex import DeclIndex
+from rapidstream.FE.IncrementalWrappers import getSignature
+from rapidstream.FE.WrapperEmitter import emitWrappers
 
 class CreateSlotWrapper:
   def __init__(self, graph, top_rtl_parser, floorplan, global_router, rebalance, target='hw'):
@@ -24,16 +26,12 @@ class CreateSlotWrapper:
     self.s2v = floorplan.getSlotToVertices()
     self.s2e = floorplan.getSlotToEdges()
 
+    # shared by all wrappers, never copied
+    self.decl_index = DeclIndex(top_rtl_parser)
+
+    # the wrappers are created on demand, see getSlotWrapperForAll
     self.slot2wrapper = {}
-    self.__initSlotWrapper()
     
-  def __getWireDeclCopy(self, slot) -> str:
-    """
-    Different wrappers will filter out different wires
-    To avoid interference, we make a deep copy of the entire wire list from the original top RTL
-    """
-    return copy.deepcopy(self.top_rtl_parser.getAllDeclExceptIO())
-
   def __getVertexInstances(self, slot):
     v_list = self.s2v[slot]
     logging.debug(f'slot {slot.getRTLModuleName()} has {len(v_list)} v insts')
@@ -259,63 +257,22 @@ class CreateSlotWrapper:
   def __setApIdle(self, stmt):
     stmt.append('assign ap_idle = ap_done;')
 
-  # TODO: this one is too slow
-  def __filterUnusedDecl(self, decl, v_insts, e_insts, io_decl):
+  def __getUsedDecl(self, slot, v_insts, e_insts, io_decl):
     """
-    we start with the complete wire/reg declaration from the original top file
-    for each wrapper, we only keep the ones that are used in this wrapper
+    for each wrapper, we only keep the wire/reg declarations from the original top file
+    that are used in this wrapper. Only the wires touched by the instances are looked up
     """
-    insts = v_insts + e_insts
-    decl_filter = []
-    ap_signals = ['ap_start', 'ap_done', 'ap_ready', 'ap_idle']
-
     # find out the io names
     io_names = set([re.search(' ([^ ]+)[ ]*;', line).group(1) for line in io_decl])
 
     # find out which wires are used by the instances
     used_wires_in_insts = set()
-    for inst in insts:
-      inst_list = inst.split('\n')
-      for line in inst_list:
-        match = re.search('\.[^\(]+\([ ]*([^ ]+)[ ]*\)', line)
-        if match:
-          used_wires_in_insts.add(match.group(1))
-
-    for d in decl:
-      # remove the original ap signals
-      if any(re.search(f' {signal}', d) for signal in ap_signals):
-        continue
-      # do not filter comments
-      elif re.search(r'^[ ]*//', d):
-        decl_filter.append(d)
-        continue
-      # do not filter parameters because parameters may be used to calculate other param, making things complicated
-      elif 'parameter' in d:
-        decl_filter.append(d)
-        continue
-
-      else:
-        # get the wire name
-        # case 1: wire x;
-        # case 2: wire [1:0] x;
-        # case 3: wire [1:0]x;
-        match = re.search(r' ([^ \]]*);', d); assert match
-        name = match.group(1)
-
-        # we do not want redundant wire and IO declaration
-        # add a space before name for exact match
-        # avoid filtering out a wire unexpectedly
-        if name in io_names:
-          logging.debug(f'filter out {name} due to io redundancy')
-          continue
-        # if a wire is used & it is not an IO
-        # no exact match here as it is OK to add more wires
-        elif name in used_wires_in_insts:
-          decl_filter.append(d)
-        else:
-          logging.debug(f'filter out {name} due to no match')
-
-    decl[:] = decl_filter
+    for v, inst in zip(self.s2v[slot], v_insts):
+      used_wires_in_insts |= self.decl_index.getWiresOfInst(v.name, inst)
+    for e, inst in zip(self.s2e[slot], e_insts):
+      used_wires_in_insts |= self.decl_index.getWiresOfInst(e.name, inst)
+
+    return self.decl_index.getDeclOfWires(used_wires_in_insts, io_names)
 
   def __addIndent(self, *sections):
     for sec in sections:
@@ -372,11 +329,6 @@ class CreateSlotWrapper:
     stmt.append('  ap_rst_n_pipe <= ap_rst_n_p2;')
     stmt.append('end')
 
-  def __initSlotWrapper(self):
-    for s in self.s2v.keys():
-      wrapper = self.createSlotWrapper(s)
-      self.slot2wrapper[s] = wrapper
-
   def __setKeepHier(self, insts):
     """
     Prevent unexpected behaviour from the synthesizer
@@ -387,7 +339,6 @@ class CreateSlotWrapper:
 
   def createSlotWrapper(self, slot):
     header = self.__getHeader(slot)
-    decl = self.__getWireDeclCopy(slot)
     io_decl = self.__getIODecl(slot)
     v_insts = self.__getVertexInstances(slot)
     e_insts = self.__getEdgeInstances(slot)
@@ -398,8 +349,8 @@ class CreateSlotWrapper:
     logging.debug(f'{slot.getRTLModuleName()}: v_insts contains:' + '\n'.join(v_insts))
     logging.debug(f'{slot.getRTLModuleName()}: e_insts contains:' + '\n'.join(e_insts))
     
-    # must do the filtering at the beginning, otherwise it may mess up our added signals
-    self.__filterUnusedDecl(decl, v_insts, e_insts, io_decl)
+    # must get the used decl at the beginning, before the instances are modified
+    decl = self.__getUsedDecl(slot, v_insts, e_insts, io_decl)
 
     self.__setApStart(decl, v_insts, stmt)
     self.__setApContinue(v_insts)
@@ -419,16 +370,38 @@ class CreateSlotWrapper:
       wrapper += [fifo_template]
     return wrapper
 
-  def getSlotWrapperForAll(self, dir='wrapper_rtl'):
-    if os.path.isdir(dir):
-      shutil.rmtree(dir)
-    os.mkdir(dir)
-    for s in self.s2v.keys():
-      wrapper = self.slot2wrapper[s]
-      f = open(dir + '/' + s.getRTLModuleName()+'.v', 'w')
-      f.write('\n'.join(wrapper))
+  def getSlotWrapperForAll(self, dir='wrapper_rtl', worker_num=1, slots=None):
+    """
+    if slots is given, only update the wrappers of these slots and keep the other files in dir
+    """
+    if slots is None:
+      if os.path.isdir(dir):
+        shutil.rmtree(dir)
+      os.mkdir(dir)
+      slots = list(self.s2v.keys())
+    else:
+      os.makedirs(dir, exist_ok=True)
+
+    # keep the wrappers because the routing wrappers include them
+    wrappers = emitWrappers(
+      slots, self.getSlotWrapper, lambda s: dir + '/' + s.getRTLModuleName()+'.v', worker_num, keep_wrappers=True
+    )
+    self.slot2wrapper.update(zip(slots, wrappers))
+
+  def getWrapperSignature(self, slot):
+    """ summary of the inputs of the wrapper. The top RTL is not included """
+    return getSignature({
+      'Vertices' : [v.name for v in self.s2v[slot]],
+      'Edges' : [
+        [e.name, e.width, e.depth + e.added_depth_for_rebalance, e.pipeline_level, e.fifo_type] for e in self.s2e[slot]
+      ],
+      'IO' : self.__getIODecl(slot),
+      'Target' : self.target,
+    })
 
   def getSlotWrapper(self, slot):
+    if slot not in self.slot2wrapper:
+      self.slot2wrapper[slot] = self.createSlotWrapper(slot)
     return self.slot2wrapper[slot]
 
   def getSlotNameToIOList(self):
@@ -0,0 +1,81 @@
+import logging
+import re
+from typing import Dict, Iterable, List, Set
+
+
+# the original ap signals are replaced by the pipelined ones in each wrapper
+AP_SIGNALS = ['ap_start', 'ap_done', 'ap_ready', 'ap_idle']
+
+
+class DeclIndex:
+  """
+  read-only index of the wire/reg declarations of the original top RTL
+  built once and shared by all slot wrappers, so that each wrapper only looks up
+  the wires that its instances touch instead of filtering the entire declaration list.
+  The declaration strings are never copied or modified.
+  """
+
+  def __init__(self, top_rtl_parser) -> None:
+    self.top_rtl_parser = top_rtl_parser
+    self.all_decl = top_rtl_parser.getAllDeclExceptIO()
+
+    # positions of the comments and parameters, which are kept in every wrapper
+    self.always_kept_pos: List[int] = []
+
+    # wire name -> positions of its declarations
+    self.wire_to_pos: Dict[str, List[int]] = {}
+
+    # vertex / FIFO name -> the wires connected to its instance
+    self.owner_to_wires: Dict[str, Set[str]] = {}
+
+    self.__buildIndex()
+
+  def __buildIndex(self) -> None:
+    for pos, d in enumerate(self.all_decl):
+      # remove the original ap signals
+      if any(re.search(f' {signal}', d) for signal in AP_SIGNALS):
+        continue
+      # do not filter comments
+      elif re.search(r'^[ ]*//', d):
+        self.always_kept_pos.append(pos)
+      # do not filter parameters because parameters may be used to calculate other param, making things complicated
+      elif 'parameter' in d:
+        self.always_kept_pos.append(pos)
+      else:
+        # get the wire name
+        # case 1: wire x;
+        # case 2: wire [1:0] x;
+        # case 3: wire [1:0]x;
+        match = re.search(r' ([^ \]]*);', d); assert match
+        self.wire_to_pos.setdefault(match.group(1), []).append(pos)
+
+    logging.debug(f'decl index: {len(self.wire_to_pos)} wires, {len(self.always_kept_pos)} comments and parameters')
+
+  def getWiresOfInst(self, owner_name: str, inst: str) -> Set[str]:
+    """
+    the wires connected to the ports of an instance. Cached by the vertex / FIFO name
+    """
+    if owner_name not in self.owner_to_wires:
+      wires = set()
+      for line in inst.split('\n'):
+        match = re.search(r'\.[^\(]+\([ ]*([^ ]+)[ ]*\)', line)
+        if match:
+          wires.add(match.group(1))
+      self.owner_to_wires[owner_name] = wires
+
+    return self.owner_to_wires[owner_name]
+
+  def getDeclOfWires(self, used_wires: Iterable[str], excluded_wires: Set[str]) -> List[str]:
+    """
+    the declarations of the used wires plus all comments and parameters,
+    in the same order as the original top RTL
+    """
+    pos_list = list(self.always_kept_pos)
+    for wire in used_wires:
+      # we do not want redundant wire and IO declaration
+      if wire in excluded_wires:
+        logging.debug(f'filter out {wire} due to io redundancy')
+        continue
+      pos_list += self.wire_to_pos.get(wire, [])
+
+    return [self.all_decl[pos] for pos in sorted(pos_list)]
@@ -1,13 +1,15 @@
 #! /usr/bin/python3.6
 import logging
 from collections import defaultdict 
+from typing import Dict, List
 
 from autobridge.Opt.DataflowGraph import Vertex, Edge
 from rapidstream.FE.ILPGlobalRouting import ILPRouter
+from rapidstream.FE.PathFinderGlobalRouting import PathFinderRouter
 
 
 class GlobalRouting:
-  def __init__(self, floorplan, top_rtl_parser, slot_manager, pipeline_style, anchor_plan: int):
+  def __init__(self, floorplan, top_rtl_parser, slot_manager, pipeline_style, anchor_plan: int, routing_method: str = 'ILP', board = None, cached_e_name2path: Dict[str, List[str]] = None):
     self.floorplan = floorplan
     self.top_rtl_parser = top_rtl_parser
     self.slot_manager = slot_manager
@@ -22,15 +24,30 @@ class GlobalRouting:
     self.in_slot_pipeline_style = pipeline_style
     logging.info(f'Pipeline style: {pipeline_style}')
     self.anchor_plan = anchor_plan
+    self.routing_method = routing_method
+    self.board = board
+    logging.info(f'Global routing method: {routing_method}')
 
-    logging.critical('current latency counting depends on 4-CR slot size')
-    self.ILPRouting()
+    if cached_e_name2path is not None:
+      self.reuseRoutingResults(cached_e_name2path)
+    else:
+      self.ILPRouting()
     self.__initDirectionOfPassingEdges()
 
   def ILPRouting(self):
     all_edges = sum(self.s2e.values(), [])
-    ilp_router = ILPRouter(all_edges, self.v2s, self.floorplan.getUtilization())
-    self.e_name2path = ilp_router.ILPRouting()
+    board_arg = {'board': self.board} if self.board else {} # the routers default to U250
+    if self.routing_method == 'ILP':
+      ilp_router = ILPRouter(all_edges, self.v2s, self.floorplan.getUtilization(), **board_arg)
+      self.e_name2path = ilp_router.ILPRouting()
+    elif self.routing_method == 'BundledILP':
+      ilp_router = ILPRouter(all_edges, self.v2s, self.floorplan.getUtilization(), **board_arg)
+      self.e_name2path = ilp_router.BundledILPRouting()
+    elif self.routing_method == 'PathFinder':
+      path_finder_router = PathFinderRouter(all_edges, self.v2s, self.floorplan.getUtilization(), **board_arg)
+      self.e_name2path = path_finder_router.PathFinderRouting()
+    else:
+      assert False, f'unsupported global routing method: {self.routing_method}'
 
     # register the passed slots as routing slots
     for path in self.e_name2path.values():
@@ -38,6 +55,19 @@ class GlobalRouting:
         self.slot_manager.createSlotForRouting(slot.getName())
 
     self.postProcessRoutingResults()
+
+  def reuseRoutingResults(self, cached_e_name2path: Dict[str, List[str]]):
+    """
+    take the routing results of a previous run, where each slot is represented by its name
+    """
+    logging.info(f'reuse the global routing results of {len(cached_e_name2path)} edges')
+    for e_name, slot_names in cached_e_name2path.items():
+      self.e_name2path[e_name] = [self.slot_manager.createSlotForRouting(name) for name in slot_names]
+
+    self.postProcessRoutingResults()
+
+  def getEdgeNameToPathSlotNames(self) -> Dict[str, List[str]]:
+    return {e_name: [slot.getName() for slot in path] for e_name, path in self.e_name2path.items()}
     
   def postProcessRoutingResults(self):
 
@@ -52,10 +82,28 @@ class GlobalRouting:
 
     for e_list in self.s2e.values():
       for e in e_list:
-        # assume each slot is 2x2. The path excludes the src and dst slot
-        dist = ( len(self.e_name2path[e.name]) + 1 ) * 2 
+        dist = self.__getDistanceOfEdge(e)
         self.e_name2lat[e.name] = self.__getPipelineLevelOfEdge(dist)
 
+  def __getDistanceOfEdge(self, e: Edge) -> int:
+    """
+    the number of clock regions the edge travels through
+    each hop between neighbor slots spans the slot width or height, as in the routing graph
+    the path excludes the src and dst slot
+    """
+    src_slot = self.v2s[e.src]
+    dst_slot = self.v2s[e.dst]
+
+    # an edge inside a slot is counted as one hop, as the original 2x2 model did
+    if src_slot == dst_slot:
+      return min(src_slot.up_right_x - src_slot.down_left_x, src_slot.up_right_y - src_slot.down_left_y) + 1
+
+    slots = [src_slot] + self.e_name2path[e.name] + [dst_slot]
+    dist = 0
+    for curr, next in zip(slots, slots[1:]):
+      dist += abs(next.down_left_x - curr.down_left_x) + abs(next.down_left_y - curr.down_left_y)
+    return dist
+
   def naiveGlobalRouting(self):
     """
     each edge first go in the Y direction then in the X direction
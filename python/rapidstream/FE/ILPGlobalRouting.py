@@ -1,27 +1,68 @@
 import logging
-from bisect import bisect
+import os
+import pickle
 from collections import defaultdict
-from mip import Model, minimize, BINARY, xsum, OptimizationStatus, Var
-from typing import List, Dict
+import numpy as np
+from mip import Model, minimize, BINARY, INTEGER, xsum, OptimizationStatus, Var, Constr
+from typing import Any, List, Dict, Tuple
 
 from autobridge.Opt.DataflowGraph import Edge, Vertex
 from autobridge.Opt.Slot import Slot
 from autobridge.Device.DeviceManager import DeviceU250
+from rapidstream.FE.Profiler import profiler
 U250_inst = DeviceU250()
 
 root = logging.getLogger()
 root.setLevel(logging.DEBUG)
 
 BEND_COUNT_LIMIT = 2
+
+# number of wires across the boundary between two 2x2 slots
 VERTICAL_BOUNDARY_CAPACITY = 5280
 SLR_CROSSING_BOUNDARY_CAPACITY = 5760
 NON_SLR_CROSSING_HORIZONTAL_BOUNDARY = 9440
 
+# the boundary capacity scales with the number of clock regions along the boundary
+VERTICAL_BOUNDARY_CAPACITY_PER_CR = VERTICAL_BOUNDARY_CAPACITY // 2
+SLR_CROSSING_BOUNDARY_CAPACITY_PER_CR = SLR_CROSSING_BOUNDARY_CAPACITY // 2
+NON_SLR_CROSSING_HORIZONTAL_BOUNDARY_PER_CR = NON_SLR_CROSSING_HORIZONTAL_BOUNDARY // 2
+
+# the structure of the routing graph only depends on the board and the slot size
+ROUTING_GRAPH_CACHE_DIR = os.path.join(
+  os.getenv('RAPIDSTREAM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.rapidstream')), 
+  'routing_graph'
+)
+_routing_graph_skeleton_cache = {}
+
+# weight of each resource type when calculating the cost of passing through a slot
+RESOURCE_COST_WEIGHTS = {'DSP': 1, 'BRAM': 1, 'LUT': 0.7}
+
+# the routing usage limit is relaxed until the ILP is feasible
+ROUTING_USAGE_LIMIT_STEP = 0.03
+ROUTING_USAGE_LIMIT_PRECISION = 0.01
+
+
+def getSlotSizeOfFloorplan(v2s: Dict[Vertex, Slot]) -> Tuple[int, int]:
+  """
+  the number of clock regions in the width and height of each slot
+  the routing graph requires that all slots are of the same size
+  """
+  slot_sizes = set(
+    (slot.up_right_x - slot.down_left_x + 1, slot.up_right_y - slot.down_left_y + 1) for slot in v2s.values()
+  )
+  assert len(slot_sizes) <= 1, f'slots of different sizes are not supported: {slot_sizes}'
+  return slot_sizes.pop() if slot_sizes else (2, 2)
+
 
 class RoutingVertex:
-  def __init__(self, slot_name):
+  def __init__(self, slot_name, index: int, board, slot_width: int, slot_height: int):
     self.slot_name = slot_name
-    self.slot = Slot(U250_inst, slot_name)
+    self.slot = Slot(board, slot_name)
+    self.index = index  # position in RoutingGraph.vertices, used to represent paths compactly
+
+    # position in the grid of slots
+    self.grid_x = self.slot.down_left_x // slot_width
+    self.grid_y = self.slot.down_left_y // slot_height
     self.edges = []
     self.neighbors = set()
 
@@ -39,9 +80,10 @@ class RoutingVertex:
 
 
 class RoutingEdge:
-  def __init__(self, v1: RoutingVertex, v2: RoutingVertex, capacity):
+  def __init__(self, v1: RoutingVertex, v2: RoutingVertex, base_capacity):
     self.vertices = [v1, v2]
-    self.capacity = capacity
+    self.base_capacity = base_capacity # number of wires across the boundary
+    self.capacity = base_capacity # number of wires allowed to use
     v1.edges.append(self)
     v2.edges.append(self)
     v1.neighbors.add(v2)
@@ -56,6 +98,9 @@ class RoutingEdge:
   def __eq__(self, other):
     return self._name == other._name
 
+  def setRoutingUsageLimit(self, routing_usage_limit: float) -> None:
+    self.capacity = int(self.base_capacity * routing_usage_limit)
+
 
 class RoutingPath:
   """
@@ -64,96 +109,32 @@ class RoutingPath:
 
   def __init__(
       self, 
-      vertices: List[RoutingVertex], 
-      bend_count: int, 
-      length_limit: int, 
+      vertices: Tuple[RoutingVertex, ...], 
+      edges: Tuple[RoutingEdge, ...],
       data_width: int,
       bridge_name: str,
-      util: Dict[Slot, Dict[str, float]]
+      cost: float
   ) -> None:
     """
     a bridge is an edge in the dataflow graph. To differentiate it 
     from the edge in the routing graph, we call it a bridge
     use bridge_name to make the path unique
+    the vertices and edges are shared by all bridges with the same endpoints
     """
     self.vertices = vertices
-    self.bend_count = bend_count
-    self.length_limit = length_limit
+    self.edges = edges
     self.data_width = data_width
     self.bridge_name = bridge_name
-    self.util = util
-    self.edges = []
+    self.cost = cost
 
-    # use bridge name to make the path name unique
-    self._name = self.bridge_name + '_' + '_'.join([v.slot_name for v in self.vertices])
+    # use bridge name to make the path unique
+    self._key = (self.bridge_name, tuple(v.index for v in self.vertices))
 
   def __hash__(self):
-    return hash(self._name)
+    return hash(self._key)
 
   def __eq__(self, other):
-    return self._name == other._name
-
-  def initEdges(self):
-    """
-    find all edges belong to this path based on the vertices
-    """
-    for i in range(len(self.vertices)-1):
-      curr = self.vertices[i]
-      next = self.vertices[i+1]
-      e_common = [bridge for bridge in curr.edges if bridge in next.edges]
-      assert len(e_common) == 1
-      self.edges.append(e_common[0])
-
-  def _isBend(self, prev, curr, next) -> bool:
-    """
-    check if three vertices are aligned either vertically or horizontally
-    """
-    if prev.getDownLeftX() == curr.getDownLeftX() and \
-       next.getDownLeftX() == curr.getDownLeftX():
-      return False
-    elif prev.getDownLeftY() == curr.getDownLeftY() and \
-         next.getDownLeftY() == curr.getDownLeftY():
-      return False
-    else:
-      return True
-
-  def getChildPaths(self) -> List['RoutingPath']:
-    """
-    extend the current path for one more vertex.
-    Filter out candidates if the bend count is over the limit
-    """
-    curr = self.vertices[-1]
-    # if the path only has one vertex, set prev to curr to be compatible with bend test
-    if len(self.vertices) == 1:
-      prev = curr
-    else:
-      prev = self.vertices[-2]
-
-    # if a path is too long, stop generating child paths
-    if len(self.vertices) > self.length_limit:
-      return []
-
-    # attempt to extend one more context from the current tail
-    child_paths = []
-    for next in curr.neighbors:
-      if next != prev: # disable u turn at the site
-        new_bend_count = self.bend_count + int(self._isBend(prev, curr, next))
-
-        # limit on bend count
-        if new_bend_count > BEND_COUNT_LIMIT:
-          continue
-        
-        child_paths.append(
-          RoutingPath(
-            self.vertices + [next], 
-            new_bend_count, 
-            self.length_limit, 
-            self.data_width,
-            self.bridge_name,
-            self.util
-          )
-        )
-    return child_paths
+    return self._key == other._key
 
   def getDest(self) -> RoutingVertex:
     """
@@ -185,8 +166,8 @@ class RoutingPath:
     """
     src = self.vertices[0]
     dst = self.vertices[-1]
-    dist_x = abs(src.getDownLeftX() - dst.getDownLeftX() ) / 2
-    dist_y = abs(src.getDownLeftY() - dst.getDownLeftY() ) / 2
+    dist_x = abs(src.grid_x - dst.grid_x)
+    dist_y = abs(src.grid_y - dst.grid_y)
     return dist_x + dist_y + 1
 
   def getCost(self) -> float:
@@ -195,18 +176,7 @@ class RoutingPath:
     We want to pass through less utilized slots as much as possible
     use the sum of DSP and BRAM percentage of each slot * wire_length
     """
-    try:
-      dsp_costs = [self.util[v.slot]['DSP'] if v.slot in self.util else 0 for v in self.vertices]
-      bram_costs = [self.util[v.slot]['BRAM'] if v.slot in self.util else 0  for v in self.vertices]
-      lut_costs = [self.util[v.slot]['LUT'] if v.slot in self.util else 0  for v in self.vertices]
-    except:
-      [v.slot.getRTLModuleName() if v.slot not in self.util else '' for v in self.vertices]
-      import pdb; pdb.set_trace()
-
-
-    cost = (sum(dsp_costs) + sum(bram_costs) + 0.7 * sum(lut_costs)) * self.data_width
-
-    return round(cost, 4)
+    return self.cost
 
   def getSrcSlotName(self) -> str:
     return self.vertices[0].slot_name
@@ -221,68 +191,308 @@ class RoutingGraph:
       util: Dict[Slot, Dict[str, float]], 
       routing_usage_limit: int,
       detour_path_limit: int,
+      board = U250_inst,
+      slot_width: int = 2,
+      slot_height: int = 2
   ) -> None:
+    """
+    slot_width and slot_height are the number of clock regions of each slot
+    """
+    self.board = board
+    self.slot_width = slot_width
+    self.slot_height = slot_height
+    self.vertices = []  # index -> vertex
     self.slot_name_to_vertex = {}
     self.edges = []
+    self.vertex_pair_to_edge = {}  # (index, index) -> edge, both orders are stored
     self.util = util  # resource usage of each slot
     self.routing_usage_limit = routing_usage_limit
     self.detour_path_limit = detour_path_limit
-    self._getRoutingGraphForU250()
-
-  def _getRoutingGraphForU250(self):
-    """
-    hardcode the routing graph for U250
-    assume slots are 2x2
-    """
-    
-    # create all vertices
-    for x in range(0, 8, 2):
-      for y in range(0, 16, 2):
-        slot_name = f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}'
-        self.slot_name_to_vertex[slot_name] = RoutingVertex(slot_name)
-
-    # create all edges for vertical boundaries
-    for y in range(0, 16, 2):
-      for x in range(0, 6, 2):
-        left_slot = f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}'
-        right_slot = f'CR_X{x+2}Y{y}_To_CR_X{x+3}Y{y+1}'
-        v1 = self.slot_name_to_vertex[left_slot]
-        v2 = self.slot_name_to_vertex[right_slot]
-
-        e = RoutingEdge(v1, v2, int(VERTICAL_BOUNDARY_CAPACITY*self.routing_usage_limit))
-        self.edges.append(e)
-
-    # create all edges for slr crossing boundaries
-    for x in range(0, 8, 2):
-      for y in range(2, 12, 4):
-        lower_slot = left_slot = f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}'
-        upper_slot = left_slot = f'CR_X{x}Y{y+2}_To_CR_X{x+1}Y{y+3}'
-        v_lower = self.slot_name_to_vertex[lower_slot]
-        v_upper = self.slot_name_to_vertex[upper_slot]
-
-        e = RoutingEdge(v_lower, v_upper, int(SLR_CROSSING_BOUNDARY_CAPACITY*self.routing_usage_limit))
-        self.edges.append(e)
-
-    # create all edges for non-slr-crossing horizontal boundaries
-    for x in range(0, 8, 2):
-      for y in range(0, 16, 4):
-        lower_slot = left_slot = f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}'
-        upper_slot = left_slot = f'CR_X{x}Y{y+2}_To_CR_X{x+1}Y{y+3}'
-        v_lower = self.slot_name_to_vertex[lower_slot]
-        v_upper = self.slot_name_to_vertex[upper_slot]
-
-        e = RoutingEdge(v_lower, v_upper, int(NON_SLR_CROSSING_HORIZONTAL_BOUNDARY*self.routing_usage_limit))
-        self.edges.append(e)
+
+    # candidate paths only depend on the endpoints. Cache them to share among bridges
+    self.endpoints_to_candidate_paths: Dict[Tuple[str, str, int], List[Tuple[int, ...]]] = {}
+    self.path_to_edges: Dict[Tuple[int, ...], Tuple[RoutingEdge, ...]] = {}
+    self.path_to_unit_cost: Dict[Tuple[int, ...], float] = {}
+    self.endpoints_to_sorted_unit_costs: Dict[Tuple[str, str, int], np.ndarray] = {}
+
+    self._getRoutingGraphFromBoard()
+    self.setRoutingUsageLimit(routing_usage_limit)
+    self.vertex_unit_costs = self._getVertexUnitCosts()
+
+  def _getVertexUnitCosts(self) -> np.ndarray:
+    """
+    the cost of passing through each vertex with a data width of 1, indexed by the vertex index
+    slots without utilization information have zero cost
+    """
+    resource_types = list(RESOURCE_COST_WEIGHTS.keys())
+    vertex_util = np.zeros((len(self.vertices), len(resource_types)))
+    for v in self.vertices:
+      if v.slot in self.util:
+        vertex_util[v.index] = [self.util[v.slot][r] for r in resource_types]
+
+    weights = np.array([RESOURCE_COST_WEIGHTS[r] for r in resource_types])
+    return vertex_util @ weights
+
+  def setRoutingUsageLimit(self, routing_usage_limit: float) -> None:
+    """
+    update the capacity of all boundaries. The candidate paths are not affected
+    """
+    self.routing_usage_limit = routing_usage_limit
+    for e in self.edges:
+      e.setRoutingUsageLimit(routing_usage_limit)
+
+  def _addVertex(self, slot_name: str) -> None:
+    v = RoutingVertex(slot_name, len(self.vertices), self.board, self.slot_width, self.slot_height)
+    self.vertices.append(v)
+    self.slot_name_to_vertex[slot_name] = v
+
+  def _addEdge(self, v1: RoutingVertex, v2: RoutingVertex, base_capacity: int) -> None:
+    e = RoutingEdge(v1, v2, base_capacity)
+    self.edges.append(e)
+    self.vertex_pair_to_edge[(v1.index, v2.index)] = e
+    self.vertex_pair_to_edge[(v2.index, v1.index)] = e
+
+  def _getSkeletonKey(self) -> Tuple:
+    return (
+      self.board.FPGA_PART_NAME, 
+      self.board.CR_NUM_HORIZONTAL, 
+      self.board.CR_NUM_VERTICAL, 
+      self.slot_width, 
+      self.slot_height
+    )
+
+  def _buildSkeleton(self) -> Tuple[List[str], List[Tuple[int, int, int]]]:
+    """
+    get the slot names and the (vertex index, vertex index, base capacity) of each boundary.
+    Slots are aligned in a grid. Boundaries between SLRs have less capacity.
+    """
+    assert self.board.CR_NUM_HORIZONTAL % self.slot_width == 0, 'slots must cover the device'
+    assert self.board.CR_NUM_VERTICAL % self.slot_height == 0, 'slots must cover the device'
+
+    grid_width = self.board.CR_NUM_HORIZONTAL // self.slot_width
+    grid_height = self.board.CR_NUM_VERTICAL // self.slot_height
+
+    def getSlotName(grid_x, grid_y):
+      x = grid_x * self.slot_width
+      y = grid_y * self.slot_height
+      return f'CR_X{x}Y{y}_To_CR_X{x + self.slot_width - 1}Y{y + self.slot_height - 1}'
+
+    slot_names = []
+    grid_to_index = {}
+    for grid_x in range(grid_width):
+      for grid_y in range(grid_height):
+        grid_to_index[grid_x, grid_y] = len(slot_names)
+        slot_names.append(getSlotName(grid_x, grid_y))
+
+    boundaries = []
+
+    # vertical boundaries
+    for grid_y in range(grid_height):
+      for grid_x in range(grid_width - 1):
+        capacity = VERTICAL_BOUNDARY_CAPACITY_PER_CR * self.slot_height
+        boundaries.append((grid_to_index[grid_x, grid_y], grid_to_index[grid_x + 1, grid_y], capacity))
+
+    # horizontal boundaries
+    for grid_x in range(grid_width):
+      for grid_y in range(grid_height - 1):
+        lower_slot = Slot(self.board, getSlotName(grid_x, grid_y))
+        upper_slot = Slot(self.board, getSlotName(grid_x, grid_y + 1))
+        if lower_slot.getSLR() != upper_slot.getSLR():
+          capacity = SLR_CROSSING_BOUNDARY_CAPACITY_PER_CR * self.slot_width
+        else:
+          capacity = NON_SLR_CROSSING_HORIZONTAL_BOUNDARY_PER_CR * self.slot_width
+        boundaries.append((grid_to_index[grid_x, grid_y], grid_to_index[grid_x, grid_y + 1], capacity))
+
+    return slot_names, boundaries
+
+  def _getSkeleton(self) -> Tuple[List[str], List[Tuple[int, int, int]]]:
+    """
+    the skeleton is cached in memory and on disk
+    """
+    key = self._getSkeletonKey()
+    if key in _routing_graph_skeleton_cache:
+      return _routing_graph_skeleton_cache[key]
+
+    cache_path = os.path.join(ROUTING_GRAPH_CACHE_DIR, '_'.join(str(k) for k in key) + '.pickle')
+    skeleton = None
+    if os.path.isfile(cache_path):
+      try:
+        skeleton = pickle.load(open(cache_path, 'rb'))
+      except Exception:
+        logging.warning(f'failed to load the cached routing graph {cache_path}')
+
+    if skeleton is None:
+      skeleton = self._buildSkeleton()
+      try:
+        os.makedirs(ROUTING_GRAPH_CACHE_DIR, exist_ok=True)
+        temp_path = f'{cache_path}.{os.getpid()}'
+        pickle.dump(skeleton, open(temp_path, 'wb'))
+        os.replace(temp_path, cache_path)
+      except OSError:
+        logging.warning(f'failed to cache the routing graph to {cache_path}')
+
+    _routing_graph_skeleton_cache[key] = skeleton
+    return skeleton
+
+  def _getRoutingGraphFromBoard(self):
+    """
+    one vertex per slot, one edge per boundary between adjacent slots
+    """
+    slot_names, boundaries = self._getSkeleton()
+    for slot_name in slot_names:
+      self._addVertex(slot_name)
+    for index1, index2, base_capacity in boundaries:
+      self._addEdge(self.vertices[index1], self.vertices[index2], base_capacity)
 
   def _getShortestDist(self, src: RoutingVertex, dst: RoutingVertex):
     """
     number of slots in the path. Include source and sink
-    assume 2x2 slots
     """
-    dist_x = abs(src.getDownLeftX() - dst.getDownLeftX() ) / 2
-    dist_y = abs(src.getDownLeftY() - dst.getDownLeftY() ) / 2
+    dist_x = abs(src.grid_x - dst.grid_x)
+    dist_y = abs(src.grid_y - dst.grid_y)
     return dist_x + dist_y + 1
 
+  def _getDirection(self, curr: RoutingVertex, next: RoutingVertex) -> Tuple[int, int]:
+    """
+    the unit step from curr to next
+    """
+    step_x = next.getDownLeftX() - curr.getDownLeftX()
+    step_y = next.getDownLeftY() - curr.getDownLeftY()
+    return ((step_x > 0) - (step_x < 0), (step_y > 0) - (step_y < 0))
+
+  def _getMinExtraBendCount(self, curr: RoutingVertex, direction: Tuple[int, int], dst: RoutingVertex) -> int:
+    """
+    lower bound of the bends needed to reach dst when leaving curr in the given direction
+    """
+    diff_x = dst.getDownLeftX() - curr.getDownLeftX()
+    diff_y = dst.getDownLeftY() - curr.getDownLeftY()
+    if direction[0]:
+      along, across, step = diff_x, diff_y, direction[0]
+    else:
+      along, across, step = diff_y, diff_x, direction[1]
+
+    if across:
+      return 1
+    elif along * step < 0:
+      return 2 # u turn is not allowed, need to go around
+    else:
+      return 0
+
+  def _enumeratePaths(self, src: RoutingVertex, dst: RoutingVertex) -> List[Tuple[int, ...]]:
+    """
+    run DFS to get all paths that satisfy the requirement
+    a branch is pruned once the manhattan distance to dst or the bends needed to reach dst
+    would exceed the limits, thus it only visits prefixes of valid paths
+    """
+    # a path stops growing once it has more than length_limit vertices
+    length_limit = self._getShortestDist(src, dst) + self.detour_path_limit
+    max_vertex_num = length_limit + 1
+
+    paths = []
+
+    # path as the tuple of vertex indices, direction of the last step, bend count
+    stack = [((src.index,), None, 0)]
+    while stack:
+      path, direction, bend_count = stack.pop()
+      curr = self.vertices[path[-1]]
+
+      if curr == dst:
+        paths.append(path)
+        continue
+
+      if len(path) > length_limit:
+        continue
+
+      prev_index = path[-2] if len(path) > 1 else None
+      for next in curr.neighbors:
+        if next.index == prev_index: # disable u turn at the site
+          continue
+
+        next_direction = self._getDirection(curr, next)
+        is_bend = direction is not None and (direction[0] == 0) != (next_direction[0] == 0)
+        new_bend_count = bend_count + int(is_bend)
+
+        # limit on bend count
+        if new_bend_count + self._getMinExtraBendCount(next, next_direction, dst) > BEND_COUNT_LIMIT:
+          continue
+
+        # limit on length. _getShortestDist includes both ends
+        if len(path) + self._getShortestDist(next, dst) > max_vertex_num:
+          continue
+
+        stack.append((path + (next.index,), next_direction, new_bend_count))
+
+    # shorter paths first, consistent with BFS
+    paths.sort(key=lambda path: (len(path), path))
+
+    assert len(set(paths)) == len(paths)
+    return paths
+
+  def getCandidatePaths(self, src_slot: str, dst_slot: str) -> List[Tuple[int, ...]]:
+    """
+    get all candidate paths between two slots as tuples of vertex indices
+    The path include the source and destination
+    """
+    key = (src_slot, dst_slot, self.detour_path_limit)
+    if key not in self.endpoints_to_candidate_paths:
+      src = self.slot_name_to_vertex[src_slot]
+      dst = self.slot_name_to_vertex[dst_slot]
+      paths = self._enumeratePaths(src, dst)
+      self.endpoints_to_candidate_paths[key] = paths
+
+      # get the costs of all candidates in one pass
+      unit_costs = self._getUnitCostsOfPaths(paths)
+      for path, unit_cost in zip(paths, unit_costs.tolist()):
+        self.path_to_unit_cost[path] = unit_cost
+      self.endpoints_to_sorted_unit_costs[key] = np.sort(unit_costs)
+
+      logging.debug(f'{len(paths)} candidate paths from {src_slot} to {dst_slot}')
+      for path in paths:
+        logging.debug(' => '.join(self.vertices[i].slot_name for i in path))
+
+    return self.endpoints_to_candidate_paths[key]
+
+  def getEdgesOfPath(self, path: Tuple[int, ...]) -> Tuple[RoutingEdge, ...]:
+    """
+    find all edges belong to this path based on the vertices
+    """
+    if path not in self.path_to_edges:
+      self.path_to_edges[path] = tuple(
+        self.vertex_pair_to_edge[(path[i], path[i+1])] for i in range(len(path)-1)
+      )
+    return self.path_to_edges[path]
+
+  def _getUnitCostsOfPaths(self, paths: List[Tuple[int, ...]]) -> np.ndarray:
+    """
+    the cost of each path with a data width of 1
+    use the sum of DSP and BRAM percentage of each slot
+    """
+    if not paths:
+      return np.zeros(0)
+
+    all_vertices = np.fromiter((i for path in paths for i in path), dtype=np.int64)
+    path_starts = np.cumsum([0] + [len(path) for path in paths[:-1]])
+    return np.add.reduceat(self.vertex_unit_costs[all_vertices], path_starts)
+
+  def getUnitCostOfPath(self, path: Tuple[int, ...]) -> float:
+    """
+    the cost of a path with a data width of 1
+    """
+    if path not in self.path_to_unit_cost:
+      self.path_to_unit_cost[path] = float(self._getUnitCostsOfPaths([path])[0])
+
+    return self.path_to_unit_cost[path]
+
+  def getSortedCostsOfCandidates(self, src_slot: str, dst_slot: str, data_width: int) -> np.ndarray:
+    """
+    the sorted costs of all candidate paths between two slots for a given data width
+    """
+    self.getCandidatePaths(src_slot, dst_slot)
+    sorted_unit_costs = self.endpoints_to_sorted_unit_costs[(src_slot, dst_slot, self.detour_path_limit)]
+
+    # rounding does not change the order
+    return np.round(sorted_unit_costs * data_width, 4)
+
   def findAllPaths(
       self,
       src_slot: str, 
@@ -291,44 +501,42 @@ class RoutingGraph:
       bridge_name: str
   ) -> List[RoutingPath]:
     """
-    run BFS to get all paths that satisfy the requirement
+    get all paths that satisfy the requirement for one bridge
     The path include the source and destination
     """
-    src = self.slot_name_to_vertex[src_slot]
-    dst = self.slot_name_to_vertex[dst_slot]
-    shortest_dist = self._getShortestDist(src, dst)
-
-    init_path = RoutingPath(
-      vertices = [src],
-      bend_count = 0,
-      length_limit = shortest_dist + self.detour_path_limit,
+    paths = self.getCandidatePaths(src_slot, dst_slot)
+    unit_costs = np.array([self.path_to_unit_cost[path] for path in paths])
+    costs = np.round(unit_costs * data_width, 4).tolist()
+    return [
+      RoutingPath(
+        vertices = tuple(self.vertices[i] for i in path),
+        edges = self.getEdgesOfPath(path),
+        data_width = data_width,
+        bridge_name = bridge_name,
+        cost = cost
+      ) for path, cost in zip(paths, costs)
+    ]
+
+  def getRoutingPath(self, path: Tuple[int, ...], data_width: int, bridge_name: str) -> RoutingPath:
+    """
+    attach the width and cost of a bridge to a candidate path
+    """
+    return RoutingPath(
+      vertices = tuple(self.vertices[i] for i in path),
+      edges = self.getEdgesOfPath(path),
       data_width = data_width,
       bridge_name = bridge_name,
-      util = self.util
+      cost = round(self.getUnitCostOfPath(path) * data_width, 4)
     )
 
-    queue = [init_path]
-
-    paths = []
-    while queue:
-      curr_path = queue.pop(0)
-
-      if curr_path.getDest() != dst:
-        queue += curr_path.getChildPaths()
-      else:
-        curr_path.initEdges()
-        paths.append(curr_path)
-
-    assert len(set(paths)) == len(paths)
-    return paths
-
 
 class ILPRouter:
   def __init__(
       self, 
       bridge_list: List[Edge], 
       v2s: Dict[Vertex, Slot], 
-      util: Dict[Slot, Dict[str, float]]
+      util: Dict[Slot, Dict[str, float]],
+      board = U250_inst
   ) -> None:
     """
     to avoid confusion, here we call the data transfer path betwee two slots a "bridge"
@@ -337,17 +545,16 @@ class ILPRouter:
     self.bridge_list = bridge_list
     self.v2s = v2s
     self.util = util
+    self.board = board
+    self.slot_width, self.slot_height = getSlotSizeOfFloorplan(v2s)
 
   def _getBridgeToCandidatePaths(
       self, 
-      routing_usage_limit: float, 
-      detour_path_limit: int
+      routing_graph: RoutingGraph
   ) -> Dict[Edge, List[RoutingPath]]:
     """
     for each edge, generate the candidate paths to select from
     """
-    routing_graph = RoutingGraph(self.util, routing_usage_limit, detour_path_limit)
-
     bridge_to_paths = {}
     for bridge in self.bridge_list:
       src_slot_name = self.v2s[bridge.src].getRTLModuleName()
@@ -356,14 +563,33 @@ class ILPRouter:
         src_slot_name, dst_slot_name, bridge.width, bridge.name
       )
 
-      logging.debug(f'bridge {bridge.name} has candidate paths:')
-      for path in path_candidates:
-        path.printPath()
+      logging.debug(f'bridge {bridge.name} has {len(path_candidates)} candidate paths')
 
       bridge_to_paths[bridge] = path_candidates
 
     return bridge_to_paths
 
+  def estimateCongestion(self) -> float:
+    """
+    estimate the routing congestion without solving the ILP
+    the width of each bridge is spread evenly over all its shortest paths
+    return the max ratio between the usage and the capacity of a boundary
+    """
+    routing_graph = RoutingGraph(self.util, 1.0, 0, self.board, self.slot_width, self.slot_height)
+
+    routing_edge_to_usage = defaultdict(float)
+    for bridge in self.bridge_list:
+      src_slot_name = self.v2s[bridge.src].getRTLModuleName()
+      dst_slot_name = self.v2s[bridge.dst].getRTLModuleName()
+      paths = routing_graph.getCandidatePaths(src_slot_name, dst_slot_name)
+      for path in paths:
+        for routing_edge in routing_graph.getEdgesOfPath(path):
+          routing_edge_to_usage[routing_edge] += bridge.width / len(paths)
+
+    if not routing_edge_to_usage:
+      return 0
+    return max(usage / routing_edge.base_capacity for routing_edge, usage in routing_edge_to_usage.items())
+
   def _getRoutingEdgeToPassingPaths(
       self, bridge_to_paths: Dict[Edge, List[RoutingPath]]
   ) -> Dict[RoutingEdge, List[RoutingPath]]:
@@ -409,12 +635,17 @@ class ILPRouter:
       m: Model, 
       path_to_var: Dict[RoutingPath, Var], 
       routing_edge_to_paths: Dict[RoutingEdge, List[RoutingPath]]
-  ) -> None:
+  ) -> Dict[RoutingEdge, Constr]:
     """
     for each routing edge, limit the paths that go through a routing edge
+    return the constraints so that the capacity could be updated later
     """
+    routing_edge_to_constr = {}
     for routing_edge, paths in routing_edge_to_paths.items():
-      m += xsum(path_to_var[path] * path.data_width for path in paths) <= routing_edge.capacity
+      routing_edge_to_constr[routing_edge] = m.add_constr(
+        xsum(path_to_var[path] * path.data_width for path in paths) <= routing_edge.capacity
+      )
+    return routing_edge_to_constr
 
   def _minimizeTotalPathArea(
       self, 
@@ -433,6 +664,7 @@ class ILPRouter:
 
   def _analyzeILPResults(
     self,
+    routing_graph,
     bridge_to_paths,
     bridge_to_selected_path,
     routing_edge_to_selected_paths
@@ -440,13 +672,14 @@ class ILPRouter:
     # log the quality of the selected path
     for bridge, paths in bridge_to_paths.items():
       if len(paths) > 1:
-        all_costs = [p.getCost() for p in paths]
-        all_costs.sort()
         selected_path = bridge_to_selected_path[bridge]
-        rank = bisect(all_costs, selected_path.getCost())
+        all_costs = routing_graph.getSortedCostsOfCandidates(
+          selected_path.getSrcSlotName(), selected_path.getDstSlotName(), bridge.width
+        )
+        rank = int(np.searchsorted(all_costs, selected_path.getCost(), side='right'))
 
         rank_info = f'{bridge.name} from {selected_path.getSrcSlotName()} to {selected_path.getDstSlotName()} is routed with the rank {rank} / {len(all_costs)} path. '
-        overall_info = f'Path cost: {selected_path.getCost()}. All costs: {all_costs}'
+        overall_info = f'Path cost: {selected_path.getCost()}. All costs: {all_costs.tolist()}'
         logging.info(rank_info + overall_info)
           
     # log the utilization ratio of each boundary
@@ -459,7 +692,7 @@ class ILPRouter:
   def _getILPResults(
     self,
     bridge_to_paths,
-    path_to_var,
+    path_to_val,
     routing_edge_to_paths
   ) -> Dict[str, List[Slot]]:
 
@@ -467,7 +700,7 @@ class ILPRouter:
     bridge_to_selected_path = {}
     for bridge, paths in bridge_to_paths.items():
       for path in paths:
-        val = path_to_var[path].x
+        val = path_to_val[path]
         assert abs(val - round(val)) < 0.0001
         if round(val) == 1:
           bridge_to_selected_path[bridge] = path
@@ -484,7 +717,7 @@ class ILPRouter:
     for routing_edge, paths in routing_edge_to_paths.items():
       logging.debug(f'boundary {routing_edge._name} is passed by:')
       for path in paths:
-        val = path_to_var[path].x
+        val = path_to_val[path]
         if round(val) == 1:
           routing_edge_to_selected_paths[routing_edge].append(path)
           logging.debug(f'  {path.bridge_name}')
@@ -499,18 +732,106 @@ class ILPRouter:
 
     return e_name_to_paths
 
+  def _solveWithRoutingUsageLimit(
+      self,
+      m: Model,
+      routing_graph: RoutingGraph,
+      routing_edge_to_constr: Dict[RoutingEdge, Constr],
+      routing_usage_limit: float,
+      max_seconds_per_attempt: int
+  ) -> OptimizationStatus:
+    """
+    only the right hand side of the capacity constraints changes between attempts
+    """
+    logging.info(f'Global routing attempt with routing usage limit {routing_usage_limit}')
+    routing_graph.setRoutingUsageLimit(routing_usage_limit)
+    for routing_edge, constr in routing_edge_to_constr.items():
+      constr.rhs = routing_edge.capacity
+
+    status = m.optimize(max_seconds=max_seconds_per_attempt)
+
+    if status == OptimizationStatus.OPTIMAL or status == OptimizationStatus.FEASIBLE:
+      logging.warning(f'Succeeded: global routing attempt with routing usage limit {routing_usage_limit}, status {status}')
+    elif status == OptimizationStatus.INFEASIBLE or status == OptimizationStatus.INT_INFEASIBLE:
+      logging.warning(f'Failed: global routing attempt with routing usage limit {routing_usage_limit}, status {status}')
+    else:
+      logging.warning(f'Timeout: global routing attempt with routing usage limit {routing_usage_limit} '
+                      f'found no solution in {max_seconds_per_attempt} seconds, status {status}')
+    return status
+
+  def _searchRoutingUsageLimit(
+      self,
+      m: Model,
+      routing_graph: RoutingGraph,
+      routing_edge_to_constr: Dict[RoutingEdge, Constr],
+      key_to_var: Dict[Any, Var],
+      routing_usage_limit: float,
+      max_seconds_per_attempt: int
+  ) -> Dict[Any, float]:
+    """
+    find the smallest routing usage limit no less than the initial one where the ILP is solvable.
+    Grow the limit with doubled steps until a solution is found, then bisect between the
+    last limit proven infeasible and the succeeded limit. 
+    An attempt that times out without a solution proves nothing: the growth goes on without
+    recording it as infeasible, and the bisection stops at it because a lower limit is only harder.
+    Return the values of the variables at the smallest succeeded limit.
+    """
+    def solve(limit) -> OptimizationStatus:
+      return self._solveWithRoutingUsageLimit(m, routing_graph, routing_edge_to_constr, limit, max_seconds_per_attempt)
+
+    def isSolved(status) -> bool:
+      return status == OptimizationStatus.OPTIMAL or status == OptimizationStatus.FEASIBLE
+
+    def isInfeasible(status) -> bool:
+      return status == OptimizationStatus.INFEASIBLE or status == OptimizationStatus.INT_INFEASIBLE
+
+    def snapshot() -> Dict[Any, float]:
+      return {key: var.x for key, var in key_to_var.items()}
+
+    failed_limit = None
+    step = ROUTING_USAGE_LIMIT_STEP
+    while True:
+      status = solve(routing_usage_limit)
+      if isSolved(status):
+        break
+      if isInfeasible(status):
+        failed_limit = routing_usage_limit
+      routing_usage_limit += step
+      step *= 2
+    key_to_val = snapshot()
+
+    while failed_limit is not None and routing_usage_limit - failed_limit > ROUTING_USAGE_LIMIT_PRECISION:
+      mid_limit = (failed_limit + routing_usage_limit) / 2
+      status = solve(mid_limit)
+      if isSolved(status):
+        routing_usage_limit = mid_limit
+        key_to_val = snapshot()
+      elif isInfeasible(status):
+        failed_limit = mid_limit
+      else:
+        logging.warning(f'stop narrowing the routing usage limit between {failed_limit} and {routing_usage_limit} after a timeout')
+        break
+
+    logging.info(f'Global routing uses the routing usage limit {routing_usage_limit}')
+    routing_graph.setRoutingUsageLimit(routing_usage_limit)
+    return key_to_val
+
   def ILPRouting(
       self,
       routing_usage_limit: float = 0.7,
-      detour_path_limit: int = 4
+      detour_path_limit: int = 4,
+      max_seconds_per_attempt: int = 600
   ) -> Dict[str, List[Slot]]:
 
-    while 1:
-      logging.info(f'Global routing attempt with routing usage limit {routing_usage_limit}')
-
+    with profiler.stage('ILPRouter.build') as record:
       m = Model()
 
-      bridge_to_paths = self._getBridgeToCandidatePaths(routing_usage_limit, detour_path_limit)
+      # the candidate paths do not depend on the routing usage limit
+      # build the model once and only update the capacity in each attempt
+      routing_graph = RoutingGraph(
+        self.util, routing_usage_limit, detour_path_limit, self.board, self.slot_width, self.slot_height
+      )
+      bridge_to_paths = self._getBridgeToCandidatePaths(routing_graph)
       path_to_var = self._getPathToVar(m, bridge_to_paths)
       routing_edge_to_paths = self._getRoutingEdgeToPassingPaths(bridge_to_paths)
 
@@ -519,34 +840,223 @@ class ILPRouter:
 
       self._constrOnePathForOneBridge(m, bridge_to_paths, path_to_var)
 
-      self._constrRoutingEdgeCapacity(m, path_to_var, routing_edge_to_paths)
+      routing_edge_to_constr = self._constrRoutingEdgeCapacity(m, path_to_var, routing_edge_to_paths)
 
       self._minimizeTotalPathArea(m, bridge_to_paths, path_to_var)
 
-      status = m.optimize()
+      record['Sizes'].update({'Bridges' : len(bridge_to_paths), 'Vars' : m.num_cols, 'Constrs' : m.num_rows})
 
-      if status == OptimizationStatus.OPTIMAL:
-        logging.warning(f'Succeeded: global routing attempt with routing usage limit {routing_usage_limit}')
-        break
-      else:
-        logging.warning(f'Failed: global routing attempt with routing usage limit {routing_usage_limit}')
-        routing_usage_limit += 0.03
+    with profiler.stage('ILPRouter.solve'):
+      path_to_val = self._searchRoutingUsageLimit(
+        m, routing_graph, routing_edge_to_constr, path_to_var, routing_usage_limit, max_seconds_per_attempt
+      )
 
     # extract results
     bridge_to_selected_path, routing_edge_to_selected_paths = \
-      self._getILPResults(bridge_to_paths, path_to_var, routing_edge_to_paths)
+      self._getILPResults(bridge_to_paths, path_to_val, routing_edge_to_paths)
 
     # logging and analysis
-    self._analyzeILPResults(bridge_to_paths, bridge_to_selected_path, routing_edge_to_selected_paths)
+    self._analyzeILPResults(routing_graph, bridge_to_paths, bridge_to_selected_path, routing_edge_to_selected_paths)
 
     # convert the data format of the path
     e_name_to_paths_without_src_and_dst =  self._getENameToPathsExcludeSrcAndDst(bridge_to_selected_path)
 
     return e_name_to_paths_without_src_and_dst
 
+  def _getBundleToBridges(self) -> Dict[Tuple[str, str], List[Edge]]:
+    """
+    bridges between the same pair of slots share the same candidate paths
+    and only differ in the data width. Group them into bundles
+    """
+    bundle_to_bridges = defaultdict(list)
+    for bridge in self.bridge_list:
+      src_slot_name = self.v2s[bridge.src].getRTLModuleName()
+      dst_slot_name = self.v2s[bridge.dst].getRTLModuleName()
+      bundle_to_bridges[(src_slot_name, dst_slot_name)].append(bridge)
+
+    return bundle_to_bridges
+
+  def _assignBridgesOfBundle(
+      self,
+      bridges: List[Edge],
+      path_to_width: Dict[Tuple[int, ...], int],
+      routing_graph: RoutingGraph
+  ) -> Dict[Edge, Tuple[int, ...]]:
+    """
+    the ILP decides how much width of a bundle goes to each path
+    pack the individual bridges into the paths accordingly.
+    Larger bridges go first, each to the path with the most remaining width.
+    """
+    remaining_width = dict(path_to_width)
+    bridge_to_path = {}
+    for bridge in sorted(bridges, key=lambda b: (-b.width, b.name)):
+      path = max(
+        remaining_width.keys(), 
+        key=lambda p: (remaining_width[p], -routing_graph.getUnitCostOfPath(p))
+      )
+      bridge_to_path[bridge] = path
+      remaining_width[path] -= bridge.width
+
+    return bridge_to_path
+
+  def _repairOverusedBoundaries(
+      self,
+      bridge_to_path: Dict[Edge, Tuple[int, ...]],
+      bridge_to_candidate_paths: Dict[Edge, List[Tuple[int, ...]]],
+      routing_graph: RoutingGraph
+  ) -> bool:
+    """
+    bin packing may exceed the width the ILP assigns to a path.
+    Move the bridges on an over used boundary to another candidate path
+    that still has room on all its boundaries, the cheaper paths first.
+    return False if some boundary is still over used
+    """
+    routing_edge_to_usage = defaultdict(int)
+    for bridge, path in bridge_to_path.items():
+      for routing_edge in routing_graph.getEdgesOfPath(path):
+        routing_edge_to_usage[routing_edge] += bridge.width
+
+    def canMove(bridge, new_path) -> bool:
+      old_edges = set(routing_graph.getEdgesOfPath(bridge_to_path[bridge]))
+      return all(
+        routing_edge_to_usage[e] + bridge.width <= e.capacity \
+          for e in routing_graph.getEdgesOfPath(new_path) if e not in old_edges
+      )
+
+    while True:
+      over_used = [e for e, usage in routing_edge_to_usage.items() if usage > e.capacity]
+      if not over_used:
+        return True
+
+      moved = False
+      for routing_edge in over_used:
+        bridges = [b for b, path in bridge_to_path.items() if routing_edge in routing_graph.getEdgesOfPath(path)]
+        for bridge in sorted(bridges, key=lambda b: (b.width, b.name)):
+          new_paths = [p for p in bridge_to_candidate_paths[bridge] if routing_edge not in routing_graph.getEdgesOfPath(p)]
+          new_paths = [p for p in new_paths if canMove(bridge, p)]
+          if not new_paths:
+            continue
+
+          new_path = min(new_paths, key=routing_graph.getUnitCostOfPath)
+          for e in routing_graph.getEdgesOfPath(bridge_to_path[bridge]):
+            routing_edge_to_usage[e] -= bridge.width
+          for e in routing_graph.getEdgesOfPath(new_path):
+            routing_edge_to_usage[e] += bridge.width
+          bridge_to_path[bridge] = new_path
+
+          logging.info(f'move {bridge.name} off the over used boundary {routing_edge._name}')
+          moved = True
+          break
+
+        if moved:
+          break
+
+      if not moved:
+        for routing_edge in over_used:
+          logging.warning(f'boundary {routing_edge._name} is over used after assigning bridges: {routing_edge_to_usage[routing_edge]} / {routing_edge.capacity}')
+        return False
+
+  def BundledILPRouting(
+      self,
+      routing_usage_limit: float = 0.7,
+      detour_path_limit: int = 4,
+      max_seconds_per_attempt: int = 600
+  ) -> Dict[str, List[Slot]]:
+    """
+    alternative formulation of ILPRouting
+    each bundle of bridges between the same pair of slots has one integer variable per candidate path,
+    which is the total width of the bundle routed through this path. 
+    The bridges are assigned to paths by bin packing after the ILP is solved.
+    If the bin packing over uses a boundary that cannot be repaired, fall back to ILPRouting
+    """
+    bundle_to_bridges = self._getBundleToBridges()
+    bundle_to_width = {bundle: sum(bridge.width for bridge in bridges) for bundle, bridges in bundle_to_bridges.items()}
+
+    with profiler.stage('ILPRouter.build') as record:
+      m = Model()
+
+      routing_graph = RoutingGraph(
+        self.util, routing_usage_limit, detour_path_limit, self.board, self.slot_width, self.slot_height
+      )
+      bundle_to_paths = {bundle: routing_graph.getCandidatePaths(*bundle) for bundle in bundle_to_bridges}
+
+      bundle_path_to_var = {}
+      routing_edge_to_bundle_paths = defaultdict(list)
+      for bundle, paths in bundle_to_paths.items():
+        for path in paths:
+          bundle_path_to_var[bundle, path] = m.add_var(var_type=INTEGER, lb=0, ub=bundle_to_width[bundle])
+          for routing_edge in routing_graph.getEdgesOfPath(path):
+            routing_edge_to_bundle_paths[routing_edge].append((bundle, path))
+
+      logging.info(f'there are {len(self.bridge_list)} dataflow edges in {len(bundle_to_bridges)} bundles')
+      logging.info(f'there are {len(bundle_path_to_var)} potential bundle paths to select from')
+
+      # the whole width of each bundle is routed
+      for bundle, paths in bundle_to_paths.items():
+        m += xsum(bundle_path_to_var[bundle, path] for path in paths) == bundle_to_width[bundle]
+
+      # capacity of each boundary
+      routing_edge_to_constr = {}
+      for routing_edge, bundle_paths in routing_edge_to_bundle_paths.items():
+        routing_edge_to_constr[routing_edge] = m.add_constr(
+          xsum(bundle_path_to_var[bundle_path] for bundle_path in bundle_paths) <= routing_edge.capacity
+        )
+
+      m.objective = minimize(
+        xsum(var * routing_graph.getUnitCostOfPath(bundle_path[1]) for bundle_path, var in bundle_path_to_var.items())
+      )
+
+      record['Sizes'].update({'Bundles' : len(bundle_to_paths), 'Vars' : m.num_cols, 'Constrs' : m.num_rows})
+
+    with profiler.stage('ILPRouter.solve'):
+      bundle_path_to_val = self._searchRoutingUsageLimit(
+        m, routing_graph, routing_edge_to_constr, bundle_path_to_var, routing_usage_limit, max_seconds_per_attempt
+      )
+
+    # assign each bridge to one of the paths used by its bundle
+    bridge_to_path = {}
+    bridge_to_candidate_paths = {}
+    for bundle, paths in bundle_to_paths.items():
+      path_to_width = {}
+      for path in paths:
+        width = round(bundle_path_to_val[bundle, path])
+        if width > 0:
+          path_to_width[path] = width
+      assert path_to_width
+
+      if len(path_to_width) > 1:
+        logging.info(f'bundle from {bundle[0]} to {bundle[1]} is split: ' + \
+          ', '.join(f'width {width} at cost {routing_graph.getUnitCostOfPath(path)}' for path, width in path_to_width.items()))
+
+      bridge_to_path.update(self._assignBridgesOfBundle(bundle_to_bridges[bundle], path_to_width, routing_graph))
+      for bridge in bundle_to_bridges[bundle]:
+        bridge_to_candidate_paths[bridge] = paths
+
+    if not self._repairOverusedBoundaries(bridge_to_path, bridge_to_candidate_paths, routing_graph):
+      logging.warning('cannot assign the bridges within the boundary capacity, fall back to ILPRouting')
+      return self.ILPRouting(routing_graph.routing_usage_limit, detour_path_limit, max_seconds_per_attempt)
+
+    bridge_to_selected_path = {
+      bridge : routing_graph.getRoutingPath(path, bridge.width, bridge.name) for bridge, path in bridge_to_path.items()
+    }
+
+    routing_edge_to_selected_paths = defaultdict(list)
+    for selected_path in bridge_to_selected_path.values():
+      for routing_edge in selected_path.edges:
+        routing_edge_to_selected_paths[routing_edge].append(selected_path)
+
+    total_cost = sum(path.getCost() for path in bridge_to_selected_path.values())
+    ilp_cost = sum(val * routing_graph.getUnitCostOfPath(bundle_path[1]) for bundle_path, val in bundle_path_to_val.items())
+    logging.info(f'total path cost after assigning bridges: {total_cost}, ILP objective: {ilp_cost}')
+
+    # the rank analysis of each bridge is skipped as the candidate paths are not expanded per bridge
+    self._analyzeILPResults(routing_graph, {}, bridge_to_selected_path, routing_edge_to_selected_paths)
+
+    return self._getENameToPathsExcludeSrcAndDst(bridge_to_selected_path)
+
 
 if __name__ == '__main__':  
-  routing_graph = RoutingGraph()
+  routing_graph = RoutingGraph({}, 0.7, 4)
 
   # paths = routing_graph.findAllPaths('CR_X4Y0_To_CR_X5Y1', 'CR_X4Y8_To_CR_X5Y9', 10, 'test_name')
   # print(len(paths))
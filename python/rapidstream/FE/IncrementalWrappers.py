@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+from autobridge.Opt.Slot import Slot
+
+
+# saved in the wrapper directory together with the wrappers they describe
+SIGNATURE_FILE = 'slot_signatures.json'
+
+# report for the back end, which only needs to rerun the dirty slots
+DIRTY_SLOTS_FILE = 'dirty_slots.json'
+
+# each wrapper level and the suffix of its file name
+LEVEL_TO_SUFFIX = {
+  'Compute' : '.v',
+  'Routing' : '_routing.v',
+  'Ctrl' : '_ctrl.v',
+}
+
+
+def getSignature(content) -> str:
+  return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def loadSignatures(dir: str) -> Optional[Dict]:
+  """
+  the signatures saved with the wrappers in dir, or None if there are none
+  """
+  path = os.path.join(dir, SIGNATURE_FILE)
+  if not os.path.isfile(path):
+    return None
+  return json.loads(open(path, 'r').read())
+
+
+def _getWrapperNamesInDir(dir: str) -> Dict[str, List[str]]:
+  """
+  level -> the slots that have a wrapper of this level in dir
+  """
+  level_to_names = {level : [] for level in LEVEL_TO_SUFFIX}
+  for file in sorted(os.listdir(dir)):
+    # check the longer suffixes first, e.g., _ctrl.v before .v
+    for level, suffix in sorted(LEVEL_TO_SUFFIX.items(), key=lambda item: -len(item[1])):
+      name = file[:-len(suffix)]
+      if file.endswith(suffix) and re.match(r'^CR_X\d+Y\d+_To_CR_X\d+Y\d+$', name):
+        level_to_names[level].append(name)
+        break
+  return level_to_names
+
+
+def getDirtySlotsOfRestoredWrappers(prev_signatures: Optional[Dict], dir: str) -> Dict[str, List[str]]:
+  """
+  the wrappers in dir are restored from a cache, compare them with the wrappers that were there before.
+  prev_signatures are the signatures of the previous wrappers, loaded before the restore.
+  All slots are dirty if either side has no signatures or the global key differs
+  """
+  restored_signatures = loadSignatures(dir)
+  if restored_signatures is None:
+    return _getWrapperNamesInDir(dir)
+
+  restored = restored_signatures['Signatures']
+  if prev_signatures is None or prev_signatures['GlobalKey'] != restored_signatures['GlobalKey']:
+    return {level : sorted(name_to_sig) for level, name_to_sig in restored.items()}
+
+  prev = prev_signatures['Signatures']
+  return {
+    level : sorted(name for name, sig in name_to_sig.items() if prev.get(level, {}).get(name) != sig)
+      for level, name_to_sig in restored.items()
+  }
+
+
+def writeDirtySlots(level_to_dirty_slot_names: Dict[str, List[str]], path: str = DIRTY_SLOTS_FILE) -> None:
+  """
+  a slot is dirty if any of its wrappers is regenerated
+  """
+  dirty_slot_names = sorted(set(name for names in level_to_dirty_slot_names.values() for name in names))
+  report = {'DirtySlots' : dirty_slot_names}
+  report.update({level : sorted(names) for level, names in level_to_dirty_slot_names.items()})
+  open(path, 'w').write(json.dumps(report, indent=2))
+
+
+class IncrementalWrappers:
+  """
+  compare the signature of each slot wrapper with the previous run in the same directory
+  so that only the wrappers whose inputs have changed are regenerated.
+  The signature of a wrapper covers its vertices, FIFOs, passing edges and boundary IO.
+  The global key covers the inputs shared by all wrappers, e.g., the top RTL.
+  If the global key changes, all wrappers are dirty.
+  """
+
+  def __init__(self, dir: str, global_key: str) -> None:
+    self.dir = dir
+    self.global_key = global_key
+
+    # level -> slot name -> signature
+    self.prev_signatures = self.__loadPrevSignatures()
+    self.curr_signatures = {}
+    self.level_to_dirty_slot_names = {}
+
+  def __loadPrevSignatures(self) -> Dict[str, Dict[str, str]]:
+    prev = loadSignatures(self.dir)
+    if prev is None:
+      logging.info(f'no previous wrappers in {self.dir}, regenerate all wrappers')
+      return {}
+
+    # if this run is interrupted, the wrappers on disk no longer match the previous signatures
+    os.remove(os.path.join(self.dir, SIGNATURE_FILE))
+
+    if prev['GlobalKey'] != self.global_key:
+      logging.info(f'the top RTL or the wrapper style has changed, regenerate all wrappers')
+      return {}
+
+    return prev['Signatures']
+
+  def hasPrevWrappers(self) -> bool:
+    """
+    False if all wrappers are regenerated, then the directory could be cleared
+    """
+    return bool(self.prev_signatures)
+
+  def getDirtySlots(self, level: str, slot_to_signature: Dict[Slot, str]) -> List[Slot]:
+    """
+    return the slots whose wrapper of this level needs to be regenerated
+    the wrappers of slots that no longer exist are removed
+    """
+    prev = self.prev_signatures.get(level, {})
+    curr = {slot.getRTLModuleName() : sig for slot, sig in slot_to_signature.items()}
+    self.curr_signatures[level] = curr
+
+    for name in prev.keys() - curr.keys():
+      path = os.path.join(self.dir, name + LEVEL_TO_SUFFIX[level])
+      if os.path.isfile(path):
+        logging.info(f'remove the outdated wrapper {path}')
+        os.remove(path)
+
+    dirty_slots = [slot for slot, sig in slot_to_signature.items() if prev.get(slot.getRTLModuleName()) != sig]
+    self.level_to_dirty_slot_names[level] = [slot.getRTLModuleName() for slot in dirty_slots]
+    logging.info(f'{len(dirty_slots)} / {len(slot_to_signature)} {level} wrappers are dirty')
+
+    return dirty_slots
+
+  def save(self) -> None:
+    """
+    must be called after all dirty wrappers are written
+    """
+    signatures = {'GlobalKey' : self.global_key, 'Signatures' : self.curr_signatures}
+    open(os.path.join(self.dir, SIGNATURE_FILE), 'w').write(json.dumps(signatures, indent=2))
+    writeDirtySlots(self.level_to_dirty_slot_names)
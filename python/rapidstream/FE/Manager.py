@@ -1,5 +1,7 @@
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import sys
 from collections import defaultdict
@@ -13,12 +15,79 @@ from autobridge.Opt.SlotManager import SlotManager
 from autobridge.Opt.LatencyBalancing import LatencyBalancing
 
 from rapidstream.FE.GlobalRouting import GlobalRouting
+from rapidstream.FE.ILPGlobalRouting import ILPRouter
 from rapidstream.FE.CreateSlotWrapper import CreateSlotWrapper
 from rapidstream.FE.CreateRoutingSlotWrapper import CreateRoutingSlotWrapper
 from rapidstream.FE.CreateCtrlSlotWrapper import CreateCtrlSlotWrapper
 from rapidstream.FE.CreateResultJson import CreateResultJson
 from rapidstream.FE.CreateTopRTLForCtrlWrappers import CreateTopRTLForCtrlWrappers
 from rapidstream.FE.FIFOCalibration import FIFOCalibration
+from rapidstream.FE.StageCache import StageCache, getCodeVersion
+from rapidstream.FE.IncrementalWrappers import IncrementalWrappers, getSignature, writeDirtySlots, loadSignatures, getDirtySlotsOfRestoredWrappers
+from rapidstream.FE.Profiler import profiler
+
+
+def getSlotNameToVertexNameList(floorplan):
+  return {slot.getName() : [v.name for v in v_list] for slot, v_list in floorplan.getSlotToVertices().items()}
+
+
+# shared with the forked workers of the floorplan portfolio
+_portfolio_context = {}
+
+
+def _runFloorplanCandidate(candidate):
+  """
+  run one floorplan method of the portfolio and score the result
+  return None if the method fails
+  """
+  method, ratio = candidate
+  ctx = _portfolio_context
+  manager = ctx['manager']
+  graph = ctx['graph']
+
+  try:
+    floorplan = manager.runFloorplanning(
+      graph,
+      manager.parseUserConstraints(graph, ctx['slot_manager']),
+      ctx['slot_manager'],
+      ctx['hls_prj_manager'],
+      max_search_time=ctx['max_search_time'],
+      grouping_hints=ctx['grouping_hints'],
+      grouping_constraints=ctx['grouping_constraints'],
+      floorplan_method=method,
+      usage_ratio=ratio)
+
+    v2s = floorplan.getVertexToSlot()
+    all_edges = sum(floorplan.getSlotToEdges().values(), [])
+    inter_slot_wire_count = sum(e.width for e in all_edges if v2s[e.src] != v2s[e.dst])
+    congestion = ILPRouter(all_edges, v2s, floorplan.getUtilization(), manager.board).estimateCongestion()
+
+  except Exception as e:
+    logging.warning(f'floorplan candidate {method} with usage ratio {ratio} failed: {e}')
+    return None
+
+  return {
+    'FloorplanMethod' : method,
+    'AreaUtilizationRatio' : ratio,
+    'SlotToVertexNames' : getSlotNameToVertexNameList(floorplan),
+    'InterSlotWireCount' : inter_slot_wire_count,
+    'Congestion' : congestion,
+  }
+
+
+def pickBestFloorplanCandidate(results):
+  """
+  the failed candidates are None
+  rank by the estimated routing congestion, then by the inter-slot wire count
+  """
+  results = [r for r in results if r is not None]
+  assert results, 'all floorplan candidates in the portfolio failed'
+
+  for r in results:
+    logging.info(f'floorplan candidate {r["FloorplanMethod"]} with usage ratio {r["AreaUtilizationRatio"]}: '
+                 f'congestion {r["Congestion"]:.3f}, inter-slot wires {r["InterSlotWireCount"]}')
+
+  return min(results, key=lambda r: (round(r['Congestion'], 2), r['InterSlotWireCount']))
 
 
 class Manager:
@@ -31,52 +100,149 @@ class Manager:
     self.basicSetup()
     self.loggingSetup()
 
-    hls_prj_manager = HLSProjectManager(self.top_rtl_name, self.hls_prj_path, self.hls_solution_name)
+    # the profile of each stage is written to fe_profile.json and fe_profile_trace.json
+    profiler.reset()
+
+    with profiler.stage('HLSProjectManager'):
+      hls_prj_manager = HLSProjectManager(self.top_rtl_name, self.hls_prj_path, self.hls_solution_name)
+
+    if self.stage_cache_dir:
+      stage_cache = StageCache(
+        self.stage_cache_dir,
+        self.config,
+        hls_prj_manager.getRTLDir(),
+        [hls_prj_manager.getCsynthReportDir(), hls_prj_manager.getScheReportDir()],
+      )
+    else:
+      stage_cache = None
+
+    # nothing has changed since the last run
+    output_files = ['wrapper_rtl', 'front_end_result.json', 'front_end_result.hub', 'floorplan_results.json']
+    if stage_cache and stage_cache.hasResult('wrappers'):
+      logging.info(f'all stages are cached, restore the outputs of the previous run')
+      # the cached wrappers may differ from the ones left in wrapper_rtl by the last run
+      prev_signatures = loadSignatures('wrapper_rtl') if os.path.isdir('wrapper_rtl') else None
+      stage_cache.restoreOutputFiles('wrappers', output_files)
+      if self.incremental_wrappers:
+        writeDirtySlots(getDirtySlotsOfRestoredWrappers(prev_signatures, 'wrapper_rtl'))
+      profiler.writeReport()
+      return
 
     # first unify the module types in top RTL
     # unifyModuleTypesInTopRTL(hls_prj_manager.getRTLDir(), hls_prj_manager.getTopRTLPath())
 
-    top_rtl_parser = TopRTLParser(hls_prj_manager.getTopRTLPath())
-    graph = DataflowGraph(hls_prj_manager, top_rtl_parser)
+    with profiler.stage('TopRTLParser') as record:
+      top_rtl_parser = TopRTLParser(hls_prj_manager.getTopRTLPath())
+      record['Sizes']['Declarations'] = len(top_rtl_parser.getAllDeclExceptIO())
+
+    with profiler.stage('DataflowGraph') as record:
+      graph = DataflowGraph(hls_prj_manager, top_rtl_parser)
+      record['Sizes']['Vertices'] = len(graph.getNameToVertexMap())
+      record['Sizes']['Edges'] = len(graph.getNameToEdgeMap())
 
     slot_manager = SlotManager(self.board)
 
-    user_constraint_s2v = self.parseUserConstraints(graph, slot_manager)
+    # a cached floorplan is reproduced by constraining every vertex to its previous slot
+    cached_floorplan = stage_cache.load('floorplan') if stage_cache else None
     grouping_constraints = top_rtl_parser.getStrictGroupingConstraints()
 
     # extract patterns to facilitate floorplanning
     # pattern_insts = getPatternBasedGrouping(graph, self.peregrine_home)
     pattern_insts = []
-    floorplan = self.runFloorplanning(graph, user_constraint_s2v, slot_manager, hls_prj_manager,
-                                      max_search_time=180,
-                                      grouping_hints=pattern_insts, 
-                                      grouping_constraints=grouping_constraints)
+    floorplan = None
+    if cached_floorplan is not None:
+      floorplan_method = cached_floorplan['FloorplanMethod']
+      usage_ratio = cached_floorplan['AreaUtilizationRatio']
+      user_constraint_s2v = self.getConstraintsFromCachedFloorplan(graph, slot_manager, cached_floorplan['SlotToVertexNames'])
+    elif self.floorplan_portfolio:
+      # the winner of the portfolio is used as is, without searching again
+      with profiler.stage('FloorplanPortfolio'):
+        floorplan_method, usage_ratio, floorplan = self.runPortfolioFloorplanning(
+          graph, slot_manager, hls_prj_manager, pattern_insts, grouping_constraints)
+    else:
+      floorplan_method = self.floorplan_method
+      usage_ratio = self.config['AreaUtilizationRatio']
+      user_constraint_s2v = self.parseUserConstraints(graph, slot_manager)
+
+    with profiler.stage('Floorplan') as record:
+      if floorplan is None:
+        floorplan = self.runFloorplanning(graph, user_constraint_s2v, slot_manager, hls_prj_manager,
+                                          max_search_time=180,
+                                          grouping_hints=pattern_insts, 
+                                          grouping_constraints=grouping_constraints,
+                                          floorplan_method=floorplan_method,
+                                          usage_ratio=usage_ratio)
+      record['Sizes']['Slots'] = len(floorplan.getSlotToVertices())
     open('floorplan_results.json', 'w').write(json.dumps({"FloorplanVertex":floorplan.getSlotNameToVertexNames()}, indent=2))
+    if stage_cache and cached_floorplan is None:
+      stage_cache.store('floorplan', {
+        'FloorplanMethod' : floorplan_method,
+        'AreaUtilizationRatio' : usage_ratio,
+        'SlotToVertexNames' : getSlotNameToVertexNameList(floorplan)
+      })
 
     # grid routing of edges 
     logging.info(f'Pipeline style is: {self.pipeline_style}')
-    global_router = GlobalRouting(floorplan, top_rtl_parser, slot_manager, self.pipeline_style, self.anchor_plan)
+    cached_e_name2path = stage_cache.load('global_routing') if stage_cache else None
+    with profiler.stage('GlobalRouting'):
+      global_router = GlobalRouting(floorplan, top_rtl_parser, slot_manager, self.pipeline_style, self.anchor_plan, self.global_routing_method, self.board, cached_e_name2path)
+    if stage_cache and cached_e_name2path is None:
+      stage_cache.store('global_routing', global_router.getEdgeNameToPathSlotNames())
 
     # latency balancing
-    rebalance = LatencyBalancing(graph, floorplan, global_router)
+    cached_e_name2depth = stage_cache.load('latency_balancing') if stage_cache else None
+    if cached_e_name2depth is not None:
+      for e_name, e in graph.getNameToEdgeMap().items():
+        e.added_depth_for_rebalance = cached_e_name2depth[e_name]
+      rebalance = None
+    else:
+      with profiler.stage('LatencyBalancing'):
+        rebalance = LatencyBalancing(graph, floorplan, global_router)
+      if stage_cache:
+        stage_cache.store('latency_balancing', {e_name : e.added_depth_for_rebalance for e_name, e in graph.getNameToEdgeMap().items()})
 
     FIFOCalibration(floorplan)
 
+    # only regenerate the wrappers that differ from the previous run
+    if self.incremental_wrappers:
+      incremental = IncrementalWrappers('wrapper_rtl', self.getWrapperGlobalKey(hls_prj_manager))
+    else:
+      incremental = None
+
     logging.info(f'Creating compute wrappers...')
-    compute_wrapper_creater = CreateSlotWrapper(graph, top_rtl_parser, floorplan, global_router, rebalance, self.target)
-    compute_wrapper_creater.getSlotWrapperForAll(dir='wrapper_rtl')
+    with profiler.stage('CreateSlotWrapper') as record:
+      compute_wrapper_creater = CreateSlotWrapper(graph, top_rtl_parser, floorplan, global_router, rebalance, self.target)
+      dirty_slots = incremental.getDirtySlots(
+        'Compute', {s : compute_wrapper_creater.getWrapperSignature(s) for s in floorplan.getSlotToVertices().keys()}
+      ) if incremental else None
+      # all wrappers are regenerated, clear the files of an earlier run as the non-incremental mode does
+      if incremental and not incremental.hasPrevWrappers():
+        dirty_slots = None
+      compute_wrapper_creater.getSlotWrapperForAll(dir='wrapper_rtl', worker_num=self.wrapper_emission_workers, slots=dirty_slots)
+      record['Sizes']['Wrappers'] = len(dirty_slots) if dirty_slots is not None else len(floorplan.getSlotToVertices())
 
     logging.info(f'Creating routing inclusive wrappers...')
-    routing_wrapper_creater = CreateRoutingSlotWrapper(compute_wrapper_creater, floorplan, global_router, top_rtl_parser, self.pipeline_style, self.anchor_plan)
-    routing_wrapper_creater.createRoutingInclusiveWrapperForAll(dir='wrapper_rtl')
+    with profiler.stage('CreateRoutingSlotWrapper') as record:
+      routing_wrapper_creater = CreateRoutingSlotWrapper(compute_wrapper_creater, floorplan, global_router, top_rtl_parser, self.pipeline_style, self.anchor_plan)
+      dirty_slots = incremental.getDirtySlots(
+        'Routing', {s : routing_wrapper_creater.getWrapperSignature(s) for s in routing_wrapper_creater.getAllSlots()}
+      ) if incremental else None
+      routing_wrapper_creater.createRoutingInclusiveWrapperForAll(dir='wrapper_rtl', worker_num=self.wrapper_emission_workers, slots=dirty_slots)
+      record['Sizes']['Wrappers'] = len(dirty_slots) if dirty_slots is not None else len(routing_wrapper_creater.getAllSlots())
 
     logging.info(f'Creating ctrl inclusive wrappers...')
-    ctrl_wrapper_creater = CreateCtrlSlotWrapper(routing_wrapper_creater, floorplan, slot_manager)
-    ctrl_wrapper_creater.createCtrlInclusiveWrapperForAll(dir='wrapper_rtl')
+    with profiler.stage('CreateCtrlSlotWrapper') as record:
+      ctrl_wrapper_creater = CreateCtrlSlotWrapper(routing_wrapper_creater, floorplan, slot_manager)
+      dirty_slots = incremental.getDirtySlots(
+        'Ctrl', {s : ctrl_wrapper_creater.getWrapperSignature(s) for s in ctrl_wrapper_creater.all_active_slots}
+      ) if incremental else None
+      ctrl_wrapper_creater.createCtrlInclusiveWrapperForAll(dir='wrapper_rtl', worker_num=self.wrapper_emission_workers, slots=dirty_slots)
+      record['Sizes']['Wrappers'] = len(dirty_slots) if dirty_slots is not None else len(ctrl_wrapper_creater.all_active_slots)
 
 
     logging.info(f'Creating the new top RTL file...')
-    new_top_rtl = CreateTopRTLForCtrlWrappers(top_rtl_parser, ctrl_wrapper_creater, hls_prj_manager.getTopModuleName(), global_router, self.target)
+    with profiler.stage('CreateTopRTLForCtrlWrappers'):
+      new_top_rtl = CreateTopRTLForCtrlWrappers(top_rtl_parser, ctrl_wrapper_creater, hls_prj_manager.getTopModuleName(), global_router, self.target)
     
     open(f'wrapper_rtl/{hls_prj_manager.getTopModuleName()}.v', 'w').write(new_top_rtl)
       
@@ -90,7 +256,16 @@ class Manager:
                     slot_manager, 
                     top_rtl_parser,
                     new_top_rtl)
-    json_creater.createResultJson()
+    with profiler.stage('CreateResultJson'):
+      json_creater.createResultJson()
+
+    if incremental:
+      incremental.save()
+
+    if stage_cache:
+      stage_cache.store('wrappers', {'SlotIO' : ctrl_wrapper_creater.getSlotNameToIOList()}, output_files)
+
+    profiler.writeReport()
 
   def basicSetup(self):
     # for designs with lots of modules, pyverilog may go very deep
@@ -113,11 +288,45 @@ class Manager:
     # in this way, when we do the slot stitching, we only need to route between registers
     self.anchor_plan = int(self.config['AnchorPlan'])
 
+    if "FloorplanMethod" in self.config:
+      self.floorplan_method = self.config["FloorplanMethod"]
+    else:
+      self.floorplan_method = "IterativeDivisionToHalfSLR"
+
+    # try multiple floorplan methods and usage ratios in parallel
+    if "FloorplanPortfolio" in self.config:
+      self.floorplan_portfolio = self.config["FloorplanPortfolio"]
+    else:
+      self.floorplan_portfolio = None
+
     if "LoggingLevel" in self.config:
       self.logging_level = self.config["LoggingLevel"]
     else:
       self.logging_level = "INFO"
 
+    if "GlobalRoutingMethod" in self.config:
+      self.global_routing_method = self.config["GlobalRoutingMethod"]
+    else:
+      self.global_routing_method = "ILP"
+
+    # set to an empty string to disable the stage cache
+    if "StageCacheDir" in self.config:
+      self.stage_cache_dir = self.config["StageCacheDir"]
+    else:
+      self.stage_cache_dir = ""
+
+    # reuse the wrappers of the previous run in wrapper_rtl if their inputs have not changed
+    if "IncrementalWrappers" in self.config:
+      self.incremental_wrappers = self.config["IncrementalWrappers"]
+    else:
+      self.incremental_wrappers = False
+
+    # number of processes to generate the wrappers of different slots. 1 means serial
+    if "WrapperEmissionWorkers" in self.config:
+      self.wrapper_emission_workers = int(self.config["WrapperEmissionWorkers"])
+    else:
+      self.wrapper_emission_workers = 1
+
     if "Target" in self.config:
       self.target = self.config["Target"]
     else:
@@ -162,7 +371,19 @@ class Manager:
 
     return user_constraint_s2v
 
-  def runFloorplanning(self, graph, user_constraint_s2v, slot_manager, hls_prj_manager, max_search_time, grouping_hints, grouping_constraints):
+  def getConstraintsFromCachedFloorplan(self, graph, slot_manager, s2v):
+    """
+    pin every vertex to the slot of a previous floorplan result
+    """
+    user_constraint_s2v = defaultdict(list)
+    for region, v_name_group in s2v.items():
+      slot = slot_manager.createSlot(region)
+      for v_name in v_name_group:
+        user_constraint_s2v[slot].append(graph.getVertex(v_name))
+
+    return user_constraint_s2v
+
+  def runFloorplanning(self, graph, user_constraint_s2v, slot_manager, hls_prj_manager, max_search_time, grouping_hints, grouping_constraints, floorplan_method, usage_ratio):
     floorplan = Floorplanner(
       graph, 
       user_constraint_s2v,
@@ -170,31 +391,104 @@ class Manager:
       slot_manager=slot_manager, 
       total_usage=hls_prj_manager.getTotalArea(), 
       board=self.device_manager.getBoard(),
-      user_max_usage_ratio=self.config['AreaUtilizationRatio'],
+      user_max_usage_ratio=usage_ratio,
       grouping_hints=grouping_hints,
       grouping_constraints=grouping_constraints)
     
-    if 'FloorplanMethod' in self.config:
-      choice = self.config['FloorplanMethod']
-      if choice == 'NaiveFineGrainedFloorplan':
-        floorplan.naiveFineGrainedFloorplan()
-      elif choice == 'IterativeDivisionToHalfSLR':
-        floorplan.coarseGrainedFloorplan()
-      elif choice == 'PatternBasedFineGrainedFloorplan':
-        floorplan.patternBasedFineGrainedFloorplan()
-      elif choice == 'EightWayDivisionToHalfSLR':
-        floorplan.eightWayPartition()
-      elif choice == 'hetero4CRFloorplan':
-        floorplan.hetero4CRFloorplan()
-      elif choice == 'floorplanVHHvh':
-        floorplan.floorplanVHHvh()
-      else:
-        assert False, f'unsupported floorplan method: {choice}'
+    if floorplan_method == 'NaiveFineGrainedFloorplan':
+      floorplan.naiveFineGrainedFloorplan()
+    elif floorplan_method == 'IterativeDivisionToHalfSLR':
+      floorplan.coarseGrainedFloorplan()
+    elif floorplan_method == 'PatternBasedFineGrainedFloorplan':
+      floorplan.patternBasedFineGrainedFloorplan()
+    elif floorplan_method == 'EightWayDivisionToHalfSLR':
+      floorplan.eightWayPartition()
+    elif floorplan_method == 'hetero4CRFloorplan':
+      floorplan.hetero4CRFloorplan()
+    elif floorplan_method == 'floorplanVHHvh':
+      floorplan.floorplanVHHvh()
     else:
-      floorplan.coarseGrainedFloorplan() # by default
+      assert False, f'unsupported floorplan method: {floorplan_method}'
+
+    return floorplan
+
+  def runPortfolioFloorplanning(self, graph, slot_manager, hls_prj_manager, grouping_hints, grouping_constraints):
+    """
+    run the floorplan methods with different usage ratios in parallel and pick the best result
+    the candidates are ranked by the estimated routing congestion, then by the inter-slot wire count
+    return the method, the usage ratio and the floorplan of the winner
+    """
+    portfolio = self.floorplan_portfolio
+    candidates = [
+      (method, ratio) for method in portfolio['FloorplanMethods'] for ratio in portfolio['AreaUtilizationRatios']
+    ]
+    max_search_time = portfolio['MaxSearchTime'] if 'MaxSearchTime' in portfolio else 180
+    worker_num = portfolio['Workers'] if 'Workers' in portfolio else min(len(candidates), os.cpu_count())
+    logging.info(f'floorplan portfolio: {len(candidates)} candidates on {worker_num} workers')
+
+    # the workers inherit the parsed design through fork
+    global _portfolio_context
+    _portfolio_context = {
+      'manager': self,
+      'graph': graph,
+      'slot_manager': slot_manager,
+      'hls_prj_manager': hls_prj_manager,
+      'max_search_time': max_search_time,
+      'grouping_hints': grouping_hints,
+      'grouping_constraints': grouping_constraints,
+    }
+    with multiprocessing.get_context('fork').Pool(worker_num) as pool:
+      results = pool.map(_runFloorplanCandidate, candidates, chunksize=1)
+    _portfolio_context = {}
+
+    best = pickBestFloorplanCandidate(results)
+    logging.info(f'floorplan portfolio picks {best["FloorplanMethod"]} with usage ratio {best["AreaUtilizationRatio"]}')
+
+    floorplan = self.getFloorplanFromSlotToVertexNames(
+      graph, slot_manager, hls_prj_manager, best['SlotToVertexNames'], grouping_hints, grouping_constraints, best['AreaUtilizationRatio'])
+
+    return best['FloorplanMethod'], best['AreaUtilizationRatio'], floorplan
+
+  def getFloorplanFromSlotToVertexNames(self, graph, slot_manager, hls_prj_manager, s2v, grouping_hints, grouping_constraints, usage_ratio):
+    """
+    rebuild the floorplan of a given slot name -> vertex names without running any search
+    """
+    user_constraint_s2v = self.getConstraintsFromCachedFloorplan(graph, slot_manager, s2v)
+    floorplan = Floorplanner(
+      graph,
+      user_constraint_s2v,
+      slot_manager=slot_manager,
+      total_usage=hls_prj_manager.getTotalArea(),
+      board=self.device_manager.getBoard(),
+      user_max_usage_ratio=usage_ratio,
+      grouping_hints=grouping_hints,
+      grouping_constraints=grouping_constraints)
+
+    floorplan.s2v = dict(user_constraint_s2v)
+    floorplan.v2s = {v : slot for slot, v_group in floorplan.s2v.items() for v in v_group}
+
+    # as the Floorplanner does, an edge between two slots belongs to the slot of its destination
+    floorplan.s2e = {}
+    for slot, v_group in floorplan.s2v.items():
+      intra_edges, inter_edges = floorplan.getIntraAndInterEdges(v_group)
+      floorplan.s2e[slot] = intra_edges + [e for e in inter_edges if floorplan.v2s[e.dst] == slot]
 
     return floorplan
 
+  def getWrapperGlobalKey(self, hls_prj_manager):
+    """
+    the inputs shared by all wrappers. If any of them changes, all wrappers are regenerated
+    The code that generates the wrappers is also included so that an upgrade regenerates them
+    """
+    top_rtl = open(hls_prj_manager.getTopRTLPath(), 'rb').read()
+    return getSignature({
+      'Code' : getCodeVersion(),
+      'TopRTL' : hashlib.sha256(top_rtl).hexdigest(),
+      'Target' : self.target,
+      'PipelineStyle' : self.pipeline_style,
+      'AnchorPlan' : self.anchor_plan,
+    })
+
   def help(self):
     manual = {
       "Board" : "Choose between U250 and U280",
@@ -210,6 +504,17 @@ class Manager:
           "RTL module 2"
         ]
       },
+      "FloorplanPortfolio (optional)": {
+        "This is a comment" : "Run the candidates in parallel and continue with the one of the least estimated routing congestion, then the fewest inter-slot wires. Override FloorplanMethod and AreaUtilizationRatio",
+        "FloorplanMethods" : ["IterativeDivisionToHalfSLR", "EightWayDivisionToHalfSLR"],
+        "AreaUtilizationRatios" : [0.65, 0.7, 0.75],
+        "MaxSearchTime (optional)" : "Time budget in seconds of each candidate, default 180",
+        "Workers (optional)" : "Number of processes, default to one per candidate up to the CPU count"
+      },
+      "GlobalRoutingMethod (optional)": "Choose between ILP (default, one variable per edge and path), BundledILP (edges between the same slots are routed together) and PathFinder (fast negotiated congestion routing)",
+      "StageCacheDir (optional)": "Where to checkpoint the result of each stage, e.g. rapidstream_stage_cache (default empty, the cache is disabled). A rerun resumes from the first stage whose inputs have changed. A change to the HLS RTL, the HLS reports or the rapidstream or autobridge code invalidates all stages",
+      "IncrementalWrappers (optional)": "If true, only regenerate the slot wrappers whose vertices, FIFOs, passing edges or boundary IO differ from the previous run in wrapper_rtl, and report the dirty slots in dirty_slots.json (default false)",
+      "WrapperEmissionWorkers (optional)": "Number of processes to generate the slot wrappers in parallel (default 1). The output is the same as the serial mode",
       "LoggingLevel (optional)": "Choose between DEBUG, INFO, WARNING, CRITICAL, ERROR"
     }
     print(json.dumps(manual, indent=2))
@@ -0,0 +1,155 @@
+import logging
+from collections import defaultdict
+from typing import List, Dict
+
+from autobridge.Opt.DataflowGraph import Edge, Vertex
+from autobridge.Opt.Slot import Slot
+from rapidstream.FE.ILPGlobalRouting import RoutingGraph, RoutingPath, RoutingEdge, U250_inst, getSlotSizeOfFloorplan
+
+
+class PathFinderRouter:
+  """
+  negotiated congestion routing in the style of PathFinder
+  each bridge takes its cheapest candidate path, where the cost of a path is RoutingPath.getCost()
+  plus the penalty of the boundaries it passes. A boundary is penalized by its present overflow
+  and by the overflow history in previous iterations. Bridges on overflowed boundaries
+  are ripped up and rerouted until no boundary is overflowed.
+  """
+
+  def __init__(
+      self,
+      bridge_list: List[Edge],
+      v2s: Dict[Vertex, Slot],
+      util: Dict[Slot, Dict[str, float]],
+      board = U250_inst
+  ) -> None:
+    self.bridge_list = bridge_list
+    self.v2s = v2s
+    self.util = util
+    self.board = board
+    self.slot_width, self.slot_height = getSlotSizeOfFloorplan(v2s)
+    self.total_overflow = 0
+
+  def _getBridgeToCandidatePaths(self, routing_graph: RoutingGraph) -> Dict[Edge, List[RoutingPath]]:
+    bridge_to_paths = {}
+    for bridge in self.bridge_list:
+      src_slot_name = self.v2s[bridge.src].getRTLModuleName()
+      dst_slot_name = self.v2s[bridge.dst].getRTLModuleName()
+      bridge_to_paths[bridge] = routing_graph.findAllPaths(
+        src_slot_name, dst_slot_name, bridge.width, bridge.name
+      )
+    return bridge_to_paths
+
+  def _getCongestionCost(
+      self,
+      path: RoutingPath,
+      routing_edge_to_usage: Dict[RoutingEdge, int],
+      routing_edge_to_history: Dict[RoutingEdge, float],
+      present_factor: float
+  ) -> float:
+    """
+    the cost of a path besides RoutingPath.getCost() if the path is taken
+    """
+    penalty = 0
+    for routing_edge in path.edges:
+      overflow = routing_edge_to_usage[routing_edge] + path.data_width - routing_edge.capacity
+      penalty += routing_edge_to_history[routing_edge]
+      if overflow > 0:
+        penalty += present_factor * overflow / routing_edge.capacity
+
+    return penalty * path.data_width
+
+  def _getOverflowedRoutingEdges(
+      self,
+      routing_graph: RoutingGraph,
+      routing_edge_to_usage: Dict[RoutingEdge, int]
+  ) -> List[RoutingEdge]:
+    return [e for e in routing_graph.edges if routing_edge_to_usage[e] > e.capacity]
+
+  def PathFinderRouting(
+      self,
+      routing_usage_limit: float = 0.7,
+      detour_path_limit: int = 4,
+      max_iteration: int = 50,
+      initial_present_factor: float = 0.5,
+      present_factor_multiplier: float = 1.5,
+      history_factor: float = 1.0
+  ) -> Dict[str, List[Slot]]:
+    """
+    return the slots passed by each bridge, excluding the source and destination
+    """
+    routing_graph = RoutingGraph(
+      self.util, routing_usage_limit, detour_path_limit, self.board, self.slot_width, self.slot_height
+    )
+    bridge_to_paths = self._getBridgeToCandidatePaths(routing_graph)
+
+    logging.info(f'there are {len(bridge_to_paths)} dataflow edges')
+    logging.info(f'there are {sum(len(paths) for paths in bridge_to_paths.values())} potential paths to select from')
+
+    routing_edge_to_usage = defaultdict(int)
+    routing_edge_to_history = defaultdict(float)
+    bridge_to_selected_path = {}
+
+    # the first iteration routes every bridge to its cheapest path
+    bridges_to_route = list(self.bridge_list)
+    present_factor = 0
+
+    for iteration in range(max_iteration):
+      # route wide bridges first
+      bridges_to_route.sort(key=lambda b: (-b.width, b.name))
+
+      for bridge in bridges_to_route:
+        # rip up
+        if bridge in bridge_to_selected_path:
+          for routing_edge in bridge_to_selected_path[bridge].edges:
+            routing_edge_to_usage[routing_edge] -= bridge.width
+
+        # reroute
+        selected_path = min(
+          bridge_to_paths[bridge],
+          key=lambda path: path.getCost() + self._getCongestionCost(
+            path, routing_edge_to_usage, routing_edge_to_history, present_factor
+          )
+        )
+        bridge_to_selected_path[bridge] = selected_path
+        for routing_edge in selected_path.edges:
+          routing_edge_to_usage[routing_edge] += bridge.width
+
+      overflowed_edges = self._getOverflowedRoutingEdges(routing_graph, routing_edge_to_usage)
+      self.total_overflow = sum(routing_edge_to_usage[e] - e.capacity for e in overflowed_edges)
+      logging.info(f'PathFinder iteration {iteration}: {len(overflowed_edges)} boundaries are overflowed by {self.total_overflow} wires in total')
+
+      if not overflowed_edges:
+        break
+
+      # update the penalty of congested boundaries
+      for routing_edge in overflowed_edges:
+        overflow = routing_edge_to_usage[routing_edge] - routing_edge.capacity
+        routing_edge_to_history[routing_edge] += history_factor * overflow / routing_edge.capacity
+      present_factor = initial_present_factor if iteration == 0 else present_factor * present_factor_multiplier
+
+      # only rip up the bridges that pass through congested boundaries
+      overflowed_edges = set(overflowed_edges)
+      bridges_to_route = [
+        bridge for bridge, path in bridge_to_selected_path.items()
+          if any(routing_edge in overflowed_edges for routing_edge in path.edges)
+      ]
+
+    # report the final result
+    for routing_edge in routing_graph.edges:
+      usage = routing_edge_to_usage[routing_edge]
+      logging.debug(f'boundary {routing_edge._name} is passed by {usage} / {routing_edge.capacity} = {usage / routing_edge.capacity} ')
+      if usage > routing_edge.capacity:
+        logging.warning(f'boundary {routing_edge._name} is overflowed: {usage} / {routing_edge.capacity}')
+
+    if self.total_overflow:
+      logging.warning(f'PathFinder global routing ends with a total overflow of {self.total_overflow} wires')
+    else:
+      logging.info(f'PathFinder global routing succeeds with no overflow')
+
+    for bridge, selected_path in bridge_to_selected_path.items():
+      if selected_path.getLength() > selected_path.getTheoreticalShortestLength():
+        logging.warning(f'{bridge.name} is not routed with the shortest paths')
+
+    # exclude the source and destination to feed back to the outside world
+    return {bridge.name : path.getSlotsOfPath()[1:-1] for bridge, path in bridge_to_selected_path.items()}
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+
+# ru_maxrss is in KB on linux and in bytes on mac
+_MAXRSS_TO_MB = 1 / 1024 / 1024 if sys.platform == 'darwin' else 1 / 1024
+
+
+def _getChildrenCPUTime() -> float:
+  usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+  return usage.ru_utime + usage.ru_stime
+
+
+def _getPeakRSS() -> float:
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_TO_MB
+
+
+class Profiler:
+  """
+  record the wall time, cpu time and peak memory of each front end stage
+  stages can be nested. Each stage may also record the size of its problem, e.g., the number of ILP variables
+  """
+
+  def __init__(self) -> None:
+    self.reset()
+
+  def reset(self) -> None:
+    self.records: List[Dict[str, Any]] = []
+    self.stack: List[Dict[str, Any]] = []
+    self.begin_time = time.perf_counter()
+
+  @contextmanager
+  def stage(self, name: str, **sizes):
+    """
+    with profiler.stage('name') as record:
+      ...
+      record['Sizes']['Vertices'] = 10
+    """
+    record = {
+      'Name' : name,
+      'Parent' : self.stack[-1]['Name'] if self.stack else None,
+      'Depth' : len(self.stack),
+      'Sizes' : dict(sizes),
+    }
+    self.stack.append(record)
+
+    wall_beg = time.perf_counter()
+    cpu_beg = time.process_time()
+    children_cpu_beg = _getChildrenCPUTime()
+    peak_rss_beg = _getPeakRSS()
+    try:
+      yield record
+    finally:
+      record['Begin'] = wall_beg - self.begin_time
+      record['WallTime'] = time.perf_counter() - wall_beg
+      record['CPUTime'] = time.process_time() - cpu_beg
+      record['ChildrenCPUTime'] = _getChildrenCPUTime() - children_cpu_beg
+      record['PeakRSSMB'] = _getPeakRSS()
+      record['PeakRSSDeltaMB'] = record['PeakRSSMB'] - peak_rss_beg
+
+      self.stack.pop()
+      self.records.append(record)
+      logging.info(f'[profile] {name}: {record["WallTime"]:.2f}s wall, {record["CPUTime"]:.2f}s cpu, peak RSS +{record["PeakRSSDeltaMB"]:.1f} MB')
+
+  def getReport(self) -> Dict[str, Any]:
+    records = sorted(self.records, key=lambda r: r['Begin'])
+    return {
+      'TotalWallTime' : time.perf_counter() - self.begin_time,
+      'PeakRSSMB' : _getPeakRSS(),
+      'Stages' : records,
+    }
+
+  def getChromeTrace(self) -> Dict[str, Any]:
+    """
+    complete events in the chrome trace format, can be opened in chrome://tracing or perfetto
+    """
+    pid = os.getpid()
+    events = []
+    for r in sorted(self.records, key=lambda r: r['Begin']):
+      args = dict(r['Sizes'])
+      args.update({key : r[key] for key in ['CPUTime', 'ChildrenCPUTime', 'PeakRSSMB', 'PeakRSSDeltaMB']})
+      events.append({
+        'name' : r['Name'],
+        'cat' : 'front_end',
+        'ph' : 'X',
+        'ts' : r['Begin'] * 1e6,
+        'dur' : r['WallTime'] * 1e6,
+        'pid' : pid,
+        'tid' : 0,
+        'args' : args,
+      })
+    return {'traceEvents' : events, 'displayTimeUnit' : 'ms'}
+
+  def writeReport(self, profile_path: str = 'fe_profile.json', trace_path: str = 'fe_profile_trace.json') -> None:
+    open(profile_path, 'w').write(json.dumps(self.getReport(), indent=2))
+    open(trace_path, 'w').write(json.dumps(self.getChromeTrace()))
+    logging.info(f'front end profile is written to {profile_path} and {trace_path}')
+
+
+# shared by all front end modules in the process
+profiler = Profiler()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+import autobridge
+import rapidstream
+
+
+# the front end stages in the order they are executed
+STAGES = ['floorplan', 'global_routing', 'latency_balancing', 'wrappers']
+
+# the config entries that only affect a stage and the stages after it
+# any other config entry (except those in CONFIG_KEYS_NOT_HASHED) affects the floorplan stage
+STAGE_TO_CONFIG_KEYS = {
+  'global_routing': ['GlobalRoutingMethod'],
+  'latency_balancing': ['PipelineStyle', 'AnchorPlan'],
+  'wrappers': ['Target'],
+}
+
+# the HLS reports that the floorplan reads the area and the latency of each module from
+# the schedule report dir also holds the large HLS databases, thus only the reports are hashed
+REPORT_SUFFIXES = ('.rpt',)
+
+# config entries that do not change any result
+CONFIG_KEYS_NOT_HASHED = ['LoggingLevel', 'StageCacheDir', 'WrapperEmissionWorkers', 'IncrementalWrappers']
+
+
+def getDirHash(dir: str, suffixes=None) -> str:
+  sha = hashlib.sha256()
+  for root, dirs, files in os.walk(dir):
+    dirs.sort()
+    for file in sorted(files):
+      if suffixes and not file.endswith(suffixes):
+        continue
+      path = os.path.join(root, file)
+      sha.update(os.path.relpath(path, dir).encode())
+      with open(path, 'rb') as f:
+        sha.update(f.read())
+  return sha.hexdigest()
+
+
+def getCodeVersion() -> str:
+  """
+  the hash of the python source of the packages that compute the stages and the wrappers
+  the package versions are not bumped with each change, thus hash the code itself
+  """
+  return json.dumps({
+    package.__name__: getDirHash(os.path.dirname(os.path.abspath(package.__file__)), ('.py',))
+    for package in (rapidstream, autobridge)
+  }, sort_keys=True)
+
+
+class StageCache:
+  """
+  checkpoint the result of each front end stage so that a rerun resumes from
+  the first stage whose inputs have changed.
+  The key of a stage is the hash of the key of the previous stage and the config entries
+  of this stage. The first stage is also keyed by the content of the HLS RTL, by the HLS
+  reports and by the source code of rapidstream and autobridge, so that a re-synthesis or
+  an upgrade invalidates the cache.
+  """
+
+  def __init__(
+      self,
+      cache_dir: str,
+      config: Dict[str, Any],
+      rtl_dir: str,
+      report_dirs: List[str] = [],
+  ) -> None:
+    self.cache_dir = os.path.abspath(cache_dir)
+    self.stage_to_key = self._getStageToKey(config, rtl_dir, report_dirs)
+
+    # once a stage misses, all later stages are recomputed
+    self.resumable = True
+
+  def _getRTLHash(self, rtl_dir: str) -> str:
+    return getDirHash(rtl_dir)
+
+  def _getReportHash(self, report_dirs: List[str]) -> str:
+    return ''.join(getDirHash(dir, REPORT_SUFFIXES) for dir in report_dirs)
+
+  def _getStageToKey(
+      self,
+      config: Dict[str, Any],
+      rtl_dir: str,
+      report_dirs: List[str],
+  ) -> Dict[str, str]:
+    later_stage_keys = sum(STAGE_TO_CONFIG_KEYS.values(), [])
+    floorplan_config = {
+      k: v for k, v in config.items() if k not in later_stage_keys and k not in CONFIG_KEYS_NOT_HASHED
+    }
+
+    # the reused floorplan may change while its path stays the same
+    if 'ResultReuse' in config:
+      floorplan_config['ResultReuse'] = open(config['ResultReuse'], 'r').read()
+
+    stage_to_key = {}
+    prev_key = getCodeVersion() + self._getRTLHash(rtl_dir) + self._getReportHash(report_dirs)
+    for stage in STAGES:
+      if stage == 'floorplan':
+        stage_config = floorplan_config
+      else:
+        stage_config = {k: config.get(k) for k in STAGE_TO_CONFIG_KEYS[stage]}
+
+      content = prev_key + stage + json.dumps(stage_config, sort_keys=True)
+      stage_to_key[stage] = hashlib.sha256(content.encode()).hexdigest()
+      prev_key = stage_to_key[stage]
+
+    return stage_to_key
+
+  def _getStageDir(self, stage: str) -> str:
+    return os.path.join(self.cache_dir, stage, self.stage_to_key[stage])
+
+  def hasResult(self, stage: str) -> bool:
+    return os.path.isfile(os.path.join(self._getStageDir(stage), 'result.json'))
+
+  def load(self, stage: str) -> Optional[Any]:
+    """
+    return the cached result of the stage, or None if the stage needs to be recomputed
+    """
+    path = os.path.join(self._getStageDir(stage), 'result.json')
+    if not self.resumable or not self.hasResult(stage):
+      logging.info(f'stage cache miss: {stage}')
+      self.resumable = False
+      return None
+
+    logging.info(f'stage cache hit: {stage}, reuse {path}')
+    return json.loads(open(path, 'r').read())
+
+  def store(self, stage: str, result: Any, output_files: List[str] = []) -> None:
+    """
+    save the result of the stage. The output files or directories are copied into the cache
+    """
+    stage_dir = self._getStageDir(stage)
+    temp_dir = stage_dir + f'.tmp{os.getpid()}'
+    if os.path.isdir(temp_dir):
+      shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+
+    for file in output_files:
+      if os.path.isdir(file):
+        shutil.copytree(file, os.path.join(temp_dir, os.path.basename(file)))
+      else:
+        shutil.copy(file, temp_dir)
+
+    # write the result last so that an interrupted store is never loaded
+    open(os.path.join(temp_dir, 'result.json'), 'w').write(json.dumps(result, indent=2))
+
+    if os.path.isdir(stage_dir):
+      shutil.rmtree(stage_dir)
+    os.replace(temp_dir, stage_dir)
+    logging.info(f'stage cache saved: {stage} -> {stage_dir}')
+
+  def restoreOutputFiles(self, stage: str, output_files: List[str]) -> None:
+    """
+    copy the cached output files or directories of the stage into the current directory
+    """
+    stage_dir = self._getStageDir(stage)
+    for file in output_files:
+      cached = os.path.join(stage_dir, os.path.basename(file))
+      assert os.path.exists(cached), f'missing cached output {cached}'
+      if os.path.isdir(file):
+        shutil.rmtree(file)
+      if os.path.isdir(cached):
+        shutil.copytree(cached, file)
+      else:
+        shutil.copy(cached, file)
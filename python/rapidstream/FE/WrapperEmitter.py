@@ -0,0 +1,59 @@
+import logging
+import multiprocessing
+from typing import Callable, List, Optional, Tuple
+
+from autobridge.Opt.Slot import Slot
+
+
+# shared with the forked workers. The workers inherit the wrapper creaters through fork
+# so that only the slot index and the output path are sent to each worker
+_emission_context = {}
+
+
+def _emitWrapper(package: Tuple[int, str]) -> Optional[List[str]]:
+  """
+  generate the wrapper of one slot in a forked worker and write it to the file
+  """
+  slot_index, path = package
+  slot = _emission_context['slots'][slot_index]
+  wrapper = _emission_context['get_wrapper'](slot)
+  open(path, 'w').write('\n'.join(wrapper))
+
+  # avoid sending back large wrappers that are not needed
+  return wrapper if _emission_context['keep_wrappers'] else None
+
+
+def emitWrappers(
+    slots: List[Slot],
+    get_wrapper: Callable[[Slot], List[str]],
+    get_path: Callable[[Slot], str],
+    worker_num: int = 1,
+    keep_wrappers: bool = False
+) -> Optional[List[List[str]]]:
+  """
+  generate and write the wrapper of each slot, in parallel if worker_num > 1
+  the wrappers of different slots are independent, so the output is the same as the serial mode
+  if keep_wrappers, return the wrapper of each slot in the same order as the slots
+  """
+  packages = [(i, get_path(slot)) for i, slot in enumerate(slots)]
+
+  if worker_num <= 1 or len(slots) <= 1:
+    wrappers = []
+    for slot, (_, path) in zip(slots, packages):
+      wrapper = get_wrapper(slot)
+      open(path, 'w').write('\n'.join(wrapper))
+      wrappers.append(wrapper)
+    return wrappers if keep_wrappers else None
+
+  worker_num = min(worker_num, len(slots))
+  logging.info(f'emitting {len(slots)} wrappers on {worker_num} workers')
+
+  global _emission_context
+  _emission_context = {'slots': slots, 'get_wrapper': get_wrapper, 'keep_wrappers': keep_wrappers}
+  try:
+    with multiprocessing.get_context('fork').Pool(worker_num) as pool:
+      wrappers = pool.map(_emitWrapper, packages, chunksize=1)
+  finally:
+    _emission_context = {}
+
+  return wrappers if keep_wrappers else None
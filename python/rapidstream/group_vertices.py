@@ -1,7 +1,9 @@
 import logging
+import re
 from typing import Dict, List, Tuple
-from collections import Counter
-from itertools import chain
+from collections import Counter, defaultdict
+
+from rapidstream.tapa_ir import TapaGraph
 
 _logger = logging.getLogger().getChild(__name__)
 
@@ -10,70 +12,49 @@ _logger = logging.getLogger().getChild(__name__)
 def check_can_be_grouped(inst_name_to_props: Dict):
   """check if all vertices are floorplanned to the same slot"""
   regions = [props['floorplan_region'] for props in inst_name_to_props.values()]
-  if not all(regions[i] == regions[0] for i in len(regions)):
+  if len(set(regions)) > 1:
     _logger.error('trying to group vertices assigned to different regions')
     exit(1)
 
   slrs = [props['SLR'] for props in inst_name_to_props.values()]
-  if not all(slrs[i] == slrs[0] for i in len(slrs)):
+  if len(set(slrs)) > 1:
     _logger.error('trying to group vertices assigned to different SLRs')
     exit(1)
 
 
 def get_group_internal_and_external_streams(
-  config: Dict, instances: List[str]
+  graph: TapaGraph, instances: List[str]
 ) -> Tuple[List[str], List[str]]:
   """The internal & external streams of the grouped vertex"""
-  internal_streams = []
-  external_streams = []
-
-  instances_set = set(instances)
-  for e, props in config['edges'].items():
-    src_in = props['produced_by'] in instances_set
-    dst_in = props['consumed_by'] in instances_set
-
-    if src_in and dst_in:
-      internal_streams.append(e)
-    elif src_in != dst_in:
-      external_streams.append(e)
-
-  return internal_streams, external_streams
+  return graph.get_internal_and_external_edges(instances)
 
 
 def get_group_io_streams(
+  graph: TapaGraph,
   external_streams: List[str],
-  inst_name_to_props: Dict,
+  instances: List[str],
 ) -> Tuple[List[str], List[str]]:
   """Get the inbound/outbound streams of the group vertex"""
+  vertex_ids = {graph.vertex_name_to_id[name] for name in instances}
 
-  in_streams_of_all_vertices = [props['inbound_streams'] for props in inst_name_to_props]
-  all_potential_in_streams = list(
-    chain(*in_streams_of_all_vertices)
-  )
-
-  out_streams_of_all_vertices = [props['outbound_streams'] for props in inst_name_to_props]
-  all_potential_out_streams = list(
-    chain(*out_streams_of_all_vertices)
-  )
-
-  in_streams_of_group = [s for s in external_streams if s in all_potential_in_streams]
-  out_streams_of_group = [s for s in external_streams if s in all_potential_out_streams]
+  in_streams_of_group = [s for s in external_streams if graph.get_edge(s).dst in vertex_ids]
+  out_streams_of_group = [s for s in external_streams if graph.get_edge(s).src in vertex_ids]
 
   return in_streams_of_group, out_streams_of_group
 
 
 def get_group_inner_wire_name_to_width(
   internal_streams: List[str],
-  config: Dict,
+  graph: TapaGraph,
 ) -> Dict[str, str]:
   """Get the internal wires of the group vertex"""
   inner_wire_names = []
   for stream in internal_streams:
-    inner_wire_names += config['edges'][stream]['port_wire_map']['inbound']
-    inner_wire_names += config['edges'][stream]['port_wire_map']['outbound']
+    inner_wire_names += graph.get_edge(stream).props['port_wire_map']['inbound'].values()
+    inner_wire_names += graph.get_edge(stream).props['port_wire_map']['outbound'].values()
 
   inner_wire_name_to_width = {
-    name: config['wire_decl'][name] for name in inner_wire_names
+    name: graph.others['wire_decl'][name] for name in inner_wire_names
   }
 
   return inner_wire_name_to_width
@@ -110,7 +91,7 @@ def get_group_port_wire_map(
 
 
 def get_group_vertex_props(
-  config: Dict,
+  graph: TapaGraph,
   inst_name_to_props: Dict,
   internal_streams: List[str],
   external_streams: List[str],
@@ -119,66 +100,187 @@ def get_group_vertex_props(
   group_props = {}
   group_props['module'] = None
   group_props['instance'] = None
-  group_props['area'] = dict(sum(map(Counter, inst_name_to_props.values()), start=Counter()))
-  group_props['category'] = 'GROUP_VERTEX',
+  area = Counter()
+  for props in inst_name_to_props.values():
+    area.update(props['area'])
+  group_props['area'] = dict(area)
+  group_props['category'] = 'GROUP_VERTEX'
 
   # assume all vertices are floorplaned to the same region
-  any_inst = inst_name_to_props.keys()[0]
+  any_inst = next(iter(inst_name_to_props))
   group_props['floorplan_region'] = inst_name_to_props[any_inst]['floorplan_region']
   group_props['SLR'] = inst_name_to_props[any_inst]['SLR']
 
   group_props['sub_vertices'] = inst_name_to_props
-  group_props['sub_streams'] = internal_streams
+  group_props['sub_streams'] = {e: graph.get_edge(e).props for e in internal_streams}
 
   group_props['inbound_streams'], group_props['outbound_streams'] = get_group_io_streams(
-    external_streams, inst_name_to_props,
+    graph, external_streams, list(inst_name_to_props.keys()),
   )
 
   # get inner wires, i.e., the interface wires of all inner streams
-  group_props['wire_decl'] = get_group_inner_wire_name_to_width(internal_streams, config)
+  group_props['wire_decl'] = get_group_inner_wire_name_to_width(internal_streams, graph)
 
   # get the new port/wire map for the group vertex
-  group_props['port_wire_map'] = get_group_port_wire_map(config, external_streams)
+  group_props['port_wire_map'] = get_group_port_wire_map(inst_name_to_props, external_streams)
 
   return group_props
 
 
 def group_instances(
-  config: Dict,
+  graph: TapaGraph,
   instances: List[str],
   group_name: str,
 ) -> None:
-  """Update the config to group a list of vertices into one vertex"""
+  """Update the graph to group a list of vertices into one vertex"""
   if not instances:
     _logger.warning('No instances to group')
     return
 
   # get the properties of the vertices to be grouped
-  inst_name_to_props = {name: config['vertices'][name] for name in instances}
+  inst_name_to_props = {name: graph.get_vertex(name).props for name in instances}
   check_can_be_grouped(inst_name_to_props)
 
   internal_streams, external_streams = get_group_internal_and_external_streams(
-    config, instances
+    graph, instances
   )
 
-  # remove the vertices to be grouped
-  config['vertices'] = {
-    name: props for name, props in config['vertices'].items()
-      if name not in instances
-  }
+  # the group vertex is built before the graph is changed
+  group_props = get_group_vertex_props(
+    graph, inst_name_to_props, internal_streams, external_streams
+  )
+
+  # add the new group vertex and move the external streams to it
+  graph.add_vertex(group_name, group_props)
+  for e in external_streams:
+    props = graph.get_edge(e).props
+    src = props.get('produced_by')
+    dst = props.get('consumed_by')
+    graph.reconnect_edge(
+      e,
+      group_name if src in inst_name_to_props else src,
+      group_name if dst in inst_name_to_props else dst,
+    )
 
   # remove the internal streams in the group
-  config['edges'] = {e: props for e, props in config['edge'].items
-    if e not in internal_streams
-  }
+  for e in internal_streams:
+    graph.remove_edge(e)
+
+  # remove the vertices to be grouped
+  for name in instances:
+    graph.remove_vertex(name)
 
   # remove the inner wires from the external wire list
-  inner_wires = get_group_inner_wire_name_to_width(internal_streams, config)
-  config['wire_decl'] = [w for w in config['wire_decl'] if w not in inner_wires]
+  inner_wires = group_props['wire_decl']
+  graph.others['wire_decl'] = {
+    w: width for w, width in graph.others['wire_decl'].items() if w not in inner_wires
+  }
 
-  # add the new group vertex to config
-  config['vertices'][group_name] = get_group_vertex_props(
-    config, inst_name_to_props, internal_streams, external_streams
+  return
+
+
+def get_stream_width(graph: TapaGraph, stream: str) -> int:
+  """The data width of a stream, i.e., the width of its if_din wire"""
+  props = graph.get_edge(stream).props
+  if 'width' in props:
+    return int(props['width'])
+
+  din = props['port_wire_map']['inbound'].get('if_din')
+  width = graph.others['wire_decl'].get(din, '')
+  match = re.search(r'\[(\d+):(\d+)\]', width)
+  return int(match.group(1)) - int(match.group(2)) + 1 if match else 1
+
+
+def get_heavy_edge_clusters(
+  graph: TapaGraph,
+  max_group_size: int,
+) -> List[List[str]]:
+  """Cluster the task vertices by heavy edge matching
+
+  In each round, the pairs of neighbor clusters in the same region and SLR are
+  matched greedily from the one sharing the widest FIFOs, so heavy edges are
+  matched first. The matched pairs are merged, and the rounds repeat until
+  nothing can be merged.
+  """
+  vertices = [
+    v for v in graph.iter_vertices()
+      if v.category == 'TASK_VERTEX' and 'floorplan_region' in v.props and 'SLR' in v.props
+  ]
+  cluster_of = {v.id: v.id for v in vertices}  # vertex id -> cluster id
+  members = {v.id: [v.id] for v in vertices}  # cluster id -> vertex ids
+  location = {v.id: (v.props['floorplan_region'], v.props['SLR']) for v in vertices}
+
+  # the streams between task vertices
+  weighted_edges = [
+    (e.src, e.dst, get_stream_width(graph, e.name)) for e in graph.iter_edges()
+      if e.src in cluster_of and e.dst in cluster_of and e.src != e.dst
+  ]
+
+  while True:
+    # total width between each pair of clusters
+    neighbor_weight = defaultdict(lambda: defaultdict(int))
+    for src, dst, width in weighted_edges:
+      c1, c2 = cluster_of[src], cluster_of[dst]
+      if c1 != c2 and location[c1] == location[c2]:
+        neighbor_weight[c1][c2] += width
+        neighbor_weight[c2][c1] += width
+
+    # visit the cluster pairs from the widest to the narrowest
+    candidates = sorted(
+      (-weight, c1, c2) for c1, c2_to_weight in neighbor_weight.items()
+        for c2, weight in c2_to_weight.items() if c1 < c2
+    )
+
+    matched = set()
+    pairs = []
+    for _, c1, c2 in candidates:
+      if c1 in matched or c2 in matched or len(members[c1]) + len(members[c2]) > max_group_size:
+        continue
+      matched.update((c1, c2))
+      pairs.append((c1, c2))
+
+    if not pairs:
+      break
+
+    # merge c2 into c1
+    for c1, c2 in pairs:
+      for v_id in members[c2]:
+        cluster_of[v_id] = c1
+      members[c1] += members.pop(c2)
+
+  return [
+    [graph.vertices[v_id].name for v_id in sorted(v_ids)]
+      for c, v_ids in sorted(members.items()) if len(v_ids) > 1
+  ]
+
+
+def coarsen_graph(
+  graph: TapaGraph,
+  max_group_size: int = 8,
+  group_name_prefix: str = 'GROUP_VERTEX',
+) -> Dict[str, int]:
+  """Automatically group tightly connected task vertices in the same slot
+
+  Return the number of vertices and edges before and after the coarsening
+  """
+  report = {
+    'vertices_before': len(graph.vertex_name_to_id),
+    'edges_before': len(graph.edge_name_to_id),
+  }
+
+  clusters = get_heavy_edge_clusters(graph, max_group_size)
+  for i, instances in enumerate(clusters):
+    group_name = f'{group_name_prefix}_{i}'
+    _logger.debug('group %s: %s', group_name, ' '.join(instances))
+    group_instances(graph, instances, group_name)
+
+  report['vertices_after'] = len(graph.vertex_name_to_id)
+  report['edges_after'] = len(graph.edge_name_to_id)
+  _logger.info(
+    'coarsening creates %d groups: %d -> %d vertices, %d -> %d edges',
+    len(clusters),
+    report['vertices_before'], report['vertices_after'],
+    report['edges_before'], report['edges_after'],
   )
 
-  return
+  return report
@@ -1,5 +1,14 @@
 import logging
-from typing import Dict, List
+import math
+import re
+from typing import Dict, List, TextIO, Tuple
+
+from rapidstream.group_vertices import (
+  check_can_be_grouped,
+  get_group_internal_and_external_streams,
+  group_instances,
+)
+from rapidstream.tapa_ir import TapaGraph
 
 _logger = logging.getLogger().getChild(__name__)
 
@@ -29,64 +38,342 @@ OUTBOUND_PORTS = (
   'if_read',
 )
 
+# the stream ports driven by the FIFO. The others are driven by the task
+FIFO_OUTPUT_PORTS = (
+  'if_full_n',
+  'if_dout',
+  'if_empty_n',
+)
+
+# the ctrl ports driven by the upper level
+CTRL_INPUT_PORTS = (
+  'ap_clk',
+  'ap_rst_n',
+  'ap_start',
+)
+
+# depth of the internal FIFOs if the depth is not in the config
+DEFAULT_FIFO_DEPTH = 2
+
+# a boundary signal is named X at the upper level (X_EXTERNAL for stream wires),
+# X_PARTITION_PIN on the wrapper and X_INTERNAL inside the wrapper
+
+
+def _is_identifier(signal: str) -> bool:
+  """constants such as 1'b1 do not need partition pins"""
+  return re.match(r'^[A-Za-z_][A-Za-z0-9_$]*$', signal) is not None
+
+
+def _get_width_of_signal(graph: TapaGraph, signal: str) -> str:
+  for decl in ('wire_decl', 'input_decl', 'output_decl'):
+    if signal in graph.others.get(decl, {}):
+      return graph.others[decl][signal]
+  return ''
+
+
+def _get_instance_name(name: str, props: Dict, prefix: str) -> str:
+  if props.get('instance'):
+    return props['instance']
+  return name[len(prefix):] if name.startswith(prefix) else name
+
+
+def _get_top_axi_ios(graph: TapaGraph) -> Dict[str, List[str]]:
+  """Index the top-level AXI IOs by the AXI name, e.g., m_axi_mmap_BVALID => mmap"""
+  axi_name_to_ios = {}
+  for decl in ('input_decl', 'output_decl'):
+    for io in graph.others.get(decl, {}):
+      if io.startswith('m_axi_'):
+        axi_name = io.split('_')[2]
+        axi_name_to_ios.setdefault(axi_name, []).append(io)
+  return axi_name_to_ios
+
+
+def get_vertex_port_to_signal(
+  props: Dict,
+  axi_name_to_ios: Dict[str, List[str]],
+) -> List[Tuple[str, str]]:
+  """All (port, signal) bindings of a task vertex in the upper level"""
+  port_wire_map = props['port_wire_map']
+  bindings = list(port_wire_map['ctrl_ports'].items())
+
+  for axi in port_wire_map['axi_ports'].values():
+    top_prefix = f'm_axi_{axi["axi_name_top_side"]}_'
+    for io in axi_name_to_ios.get(axi['axi_name_top_side'], []):
+      suffix = io[len(top_prefix):]
+      bindings.append((f'm_axi_{axi["axi_name_task_side"]}_{suffix}', io))
+
+  bindings += port_wire_map['constant_ports'].items()
+  for ports in port_wire_map['stream_ports'].values():
+    bindings += ports.items()
+
+  return bindings
+
+
+def get_boundary_signals(
+  graph: TapaGraph,
+  target_vertices: List[str],
+  internal_streams: List[str],
+  external_streams: List[str],
+) -> Dict[str, str]:
+  """The signals crossing the wrapper and their directions from the view of the wrapper
+
+  Include the stream wires of the external streams, the ctrl signals,
+  the scalar arguments, the top-level IOs and the clock/reset of the internal streams
+  """
+  signal_to_dir = {}
+
+  def _add(signal, direction):
+    if signal is None or not _is_identifier(signal):
+      return
+    # a signal driven inside the wrapper is an output even if it is also read inside
+    if signal_to_dir.get(signal) != 'output':
+      signal_to_dir[signal] = direction
+
+  external_stream_wire_to_dir = {}
+  for stream in external_streams:
+    port_wire_map = graph.get_edge(stream).props['port_wire_map']
+    for side in ('inbound', 'outbound'):
+      for port, wire in port_wire_map[side].items():
+        external_stream_wire_to_dir[wire] = 'input' if port in FIFO_OUTPUT_PORTS else 'output'
+
+  input_decl = graph.others.get('input_decl', {})
+  axi_name_to_ios = _get_top_axi_ios(graph)
+  for v_name in target_vertices:
+    props = graph.get_vertex(v_name).props
+    ctrl_ports = props['port_wire_map']['ctrl_ports']
+    for port, signal in get_vertex_port_to_signal(props, axi_name_to_ios):
+      if signal in external_stream_wire_to_dir:
+        _add(signal, external_stream_wire_to_dir[signal])
+      elif port in ctrl_ports:
+        _add(signal, 'input' if port in CTRL_INPUT_PORTS else 'output')
+      elif signal in input_decl or port in props['port_wire_map']['constant_ports']:
+        _add(signal, 'input')
+      elif signal in graph.others.get('output_decl', {}):
+        _add(signal, 'output')
+
+  for stream in internal_streams:
+    for signal in graph.get_edge(stream).props['port_wire_map']['others'].values():
+      _add(signal, 'input')
+
+  return signal_to_dir
+
 
 def get_updated_decl(
-  config: Dict,
-  inbound_external_streams: List[str],
-  outbound_external_streams: List[str],
-):
+  graph: TapaGraph,
+  signal_to_dir: Dict[str, str],
+  external_stream_wires: List[str],
+) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, str], Dict[str, str]]:
   """Get the updated external wire decl, internal wire decl
      and the new partition pins on the wrapper
-     TODO: add partition pins for ctrl signals
-     TODO: add partition pins if any instance has top-level IO
+     The partition pins include the stream wires, the ctrl signals and the top-level IOs
   """
   io_decl = {}
   external_wire_decl = {}
   internal_wire_decl = {}
 
-  def _update_decl(stream, port):
-    wire_name = config['edges'][stream]['port_wire_map'][port]
-    width = config['wire_decl'][wire_name]
+  for signal, direction in signal_to_dir.items():
+    width = _get_width_of_signal(graph, signal)
 
-    io_decl[f'{wire_name}_PARTITION_PIN'] = width
-    external_wire_decl[f'{wire_name}_EXTERNAL'] = width
-    internal_wire_decl[f'{wire_name}_INTERNAL'] = width
-
-  for stream in inbound_external_streams:
-    for port in INBOUND_PORTS:
-      _update_decl(stream, port)
-
-  for stream in outbound_external_streams:
-    for port in OUTBOUND_PORTS:
-      _update_decl(stream, port)
+    io_decl[f'{signal}_PARTITION_PIN'] = (direction, width)
+    internal_wire_decl[f'{signal}_INTERNAL'] = width
+    if signal in external_stream_wires:
+      external_wire_decl[f'{signal}_EXTERNAL'] = width
 
   return io_decl, external_wire_decl, internal_wire_decl
 
 
-def get_internal_wires():
+def get_internal_wires(
+  graph: TapaGraph,
+  internal_streams: List[str],
+) -> Dict[str, str]:
   """Get the wires between instances included into the wrapper"""
+  internal_wires = {}
+  for stream in internal_streams:
+    port_wire_map = graph.get_edge(stream).props['port_wire_map']
+    for side in ('inbound', 'outbound'):
+      for wire in port_wire_map[side].values():
+        internal_wires[wire] = graph.others['wire_decl'][wire]
+  return internal_wires
+
+
+def update_external_wires(
+  graph: TapaGraph,
+  external_streams: List[str],
+  external_wire_decl: Dict[str, str],
+) -> None:
+  """Remove the wires included into the wrapper from the external wire list
+     The wires between the wrapper and the external streams are renamed to X_EXTERNAL
+  """
+  wire_decl = graph.others['wire_decl']
+  for stream in external_streams:
+    wires = graph.get_edge(stream).get_wires()
+    renamed = {w: f'{w}_EXTERNAL' for w in wires if f'{w}_EXTERNAL' in external_wire_decl}
+    graph.rename_edge_wires(stream, renamed)
+    for wire in renamed:
+      wire_decl.pop(wire, None)
 
-def update_external_wires():
-  """Remove the wires included into the wrapper from the external wire list"""
+  wire_decl.update(external_wire_decl)
+
+
+def get_internal_instances(
+  graph: TapaGraph,
+  target_vertices: List[str],
+) -> Tuple[List[str], List[str], List[str]]:
+  """Get the task/stream instances included into the wrapper
+     Return the task vertices, the internal streams and the external streams
+  """
+  internal_streams, external_streams = get_group_internal_and_external_streams(
+    graph, target_vertices
+  )
+  return target_vertices, internal_streams, external_streams
 
-def get_internal_instances():
-  """Get the task/stream instances included into the wrapper"""
 
-def update_external_instances():
+def update_external_instances(
+  graph: TapaGraph,
+  target_vertices: List[str],
+  wrapper_name: str,
+  pin_to_external_signal: Dict[str, str],
+) -> None:
   """Remove the task/stream instances included into the wrapper from the external list
      Add the newly created instance
   """
+  group_instances(graph, target_vertices, wrapper_name)
+
+  props = graph.get_vertex(wrapper_name).props
+  props['module'] = wrapper_name
+  props['instance'] = f'{wrapper_name}_U0'
+  props['partition_pin_map'] = pin_to_external_signal
+
+
+def _write_wrapper(
+  f: TextIO,
+  graph: TapaGraph,
+  wrapper_name: str,
+  target_vertices: List[str],
+  internal_streams: List[str],
+  signal_to_dir: Dict[str, str],
+  io_decl: Dict[str, Tuple[str, str]],
+  internal_wire_decl: Dict[str, str],
+  internal_wires: Dict[str, str],
+) -> None:
+  """Write the wrapper line by line"""
+
+  def _inner(signal):
+    """the name of a signal inside the wrapper"""
+    if signal in signal_to_dir:
+      return f'{signal}_INTERNAL'
+    return signal
+
+  f.write(f'module {wrapper_name} (\n')
+  f.write(',\n'.join(f'  {pin}' for pin in io_decl))
+  f.write('\n);\n\n')
+
+  for pin, (direction, width) in io_decl.items():
+    f.write(f'  {direction} wire {width} {pin};\n')
+  f.write('\n')
+
+  for wire, width in internal_wire_decl.items():
+    f.write(f'  wire {width} {wire};\n')
+  for wire, width in internal_wires.items():
+    f.write(f'  wire {width} {wire};\n')
+  f.write('\n')
+
+  for signal, direction in signal_to_dir.items():
+    if direction == 'input':
+      f.write(f'  assign {signal}_INTERNAL = {signal}_PARTITION_PIN;\n')
+    else:
+      f.write(f'  assign {signal}_PARTITION_PIN = {signal}_INTERNAL;\n')
+  f.write('\n')
+
+  axi_name_to_ios = _get_top_axi_ios(graph)
+  for v_name in target_vertices:
+    props = graph.get_vertex(v_name).props
+    bindings = get_vertex_port_to_signal(props, axi_name_to_ios)
+    f.write(f'  {props["module"]} {_get_instance_name(v_name, props, "TASK_VERTEX_")} (\n')
+    f.write(',\n'.join(f'    .{port}({_inner(signal)})' for port, signal in bindings))
+    f.write('\n  );\n\n')
+
+  # the internal streams are replaced by almost-full FIFOs
+  for stream in internal_streams:
+    props = graph.get_edge(stream).props
+    port_wire_map = props['port_wire_map']
+    width = graph.others['wire_decl'][port_wire_map['inbound']['if_din']]
+    match = re.search(r'\[(\d+):(\d+)\]', width)
+    data_width = int(match.group(1)) - int(match.group(2)) + 1 if match else 1
+
+    # same as the slot wrapper: two cycles of grace period per pipeline level plus
+    # one for the pipelined full_n
+    grace_period = props.get('pipeline_level', 0) * 2 + 1
+
+    # full_n is deasserted GRACE_PERIOD slots early, so extend the FIFO to keep
+    # the original capacity, plus the depth added by latency balancing
+    depth = props.get('depth', DEFAULT_FIFO_DEPTH) + props.get('added_depth', 0) + grace_period
+    addr_width = max(1, math.ceil(math.log2(depth + 1)))
+
+    bindings = [(port, signal) for ports in port_wire_map.values() for port, signal in ports.items()]
+    f.write(f'  fifo_almost_full #(\n')
+    f.write(f'    .DATA_WIDTH({data_width}),\n')
+    f.write(f'    .ADDR_WIDTH({addr_width}),\n')
+    f.write(f'    .DEPTH({depth}),\n')
+    f.write(f'    .GRACE_PERIOD({grace_period})\n')
+    f.write(f'  ) {_get_instance_name(stream, {}, "FIFO_EDGE_")} (\n')
+    f.write(',\n'.join(f'    .{port}({_inner(signal)})' for port, signal in bindings))
+    f.write('\n  );\n\n')
+
+  f.write('endmodule\n')
 
 
 def create_wrapper(
-  config: Dict,
+  graph: TapaGraph,
   target_vertices: List[str],
   wrapper_name: str,
-):
-  """Create an upper node that includes the specified nodes"""
+  output_path: str,
+) -> Dict[str, str]:
+  """Create an upper node that includes the specified nodes
+
+  The RTL of the wrapper is written to output_path. The graph is updated so that
+  the wrapper replaces the included vertices and streams.
+  Return the partition pins of the wrapper and the upper-level signals they connect to.
+  Each vertex, stream and port is visited a constant number of times.
+  """
+  check_can_be_grouped({v: graph.get_vertex(v).props for v in target_vertices})
 
   # get all internal streams
+  target_vertices, internal_streams, external_streams = get_internal_instances(
+    graph, target_vertices
+  )
 
   # get all internal wires and external wires
+  internal_wires = get_internal_wires(graph, internal_streams)
+  signal_to_dir = get_boundary_signals(graph, target_vertices, internal_streams, external_streams)
+
+  external_stream_wires = {
+    wire for stream in external_streams
+      for side in ('inbound', 'outbound')
+        for wire in graph.get_edge(stream).props['port_wire_map'][side].values()
+  }
+  io_decl, external_wire_decl, internal_wire_decl = get_updated_decl(
+    graph, signal_to_dir, external_stream_wires
+  )
+
+  with open(output_path, 'w') as f:
+    _write_wrapper(
+      f, graph, wrapper_name, target_vertices, internal_streams,
+      signal_to_dir, io_decl, internal_wire_decl, internal_wires,
+    )
+
+  # the ctrl signals and the top-level IOs keep their names at the upper level
+  pin_to_external_signal = {
+    f'{signal}_PARTITION_PIN': f'{signal}_EXTERNAL' if f'{signal}_EXTERNAL' in external_wire_decl else signal
+      for signal in signal_to_dir
+  }
+
+  update_external_instances(graph, target_vertices, wrapper_name, pin_to_external_signal)
+  update_external_wires(graph, external_streams, external_wire_decl)
+
+  _logger.info(
+    'wrapper %s includes %d vertices and %d streams, with %d partition pins',
+    wrapper_name, len(target_vertices), len(internal_streams), len(io_decl),
+  )
 
-  # generate the ctrl signal inside the wrapper
+  return pin_to_external_signal
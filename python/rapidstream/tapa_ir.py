@@ -0,0 +1,244 @@
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_logger = logging.getLogger().getChild(__name__)
+
+# the config is a dict of dicts in json. The graph keeps the original entry of each
+# vertex / edge as props, and adds the ids and the incidence indexes on top of it
+
+VERTEX_KEY = 'vertices'
+EDGE_KEY = 'edges'
+
+
+class IRVertex:
+  """A task / ctrl / group vertex. props is the json entry of the vertex"""
+  __slots__ = ('id', 'name', 'props', 'in_edges', 'out_edges')
+
+  def __init__(self, id: int, name: str, props: Dict):
+    self.id = id
+    self.name = name
+    self.props = props
+
+    # ids of the incident edges. Use dict as an ordered set
+    self.in_edges: Dict[int, None] = {}
+    self.out_edges: Dict[int, None] = {}
+
+  @property
+  def category(self) -> Optional[str]:
+    return self.props.get('category')
+
+  def get_degree(self) -> int:
+    return len(self.in_edges) + len(self.out_edges)
+
+
+class IREdge:
+  """A stream between two vertices. props is the json entry of the edge"""
+  __slots__ = ('id', 'name', 'props', 'src', 'dst')
+
+  def __init__(self, id: int, name: str, props: Dict):
+    self.id = id
+    self.name = name
+    self.props = props
+
+    # ids of the producer and consumer vertices
+    self.src: Optional[int] = None
+    self.dst: Optional[int] = None
+
+  @property
+  def category(self) -> Optional[str]:
+    return self.props.get('category')
+
+  def get_wires(self) -> List[str]:
+    """All wires connected to the stream instance"""
+    port_wire_map = self.props.get('port_wire_map', {})
+    return [wire for group in port_wire_map.values() for wire in group.values()]
+
+
+class TapaGraph:
+  """Indexed view of the tapa_parser config
+
+  Vertex and edge names are interned to dense ids. The incidence indexes
+  (vertex -> in/out edges, wire -> stream) are updated on every change, so
+  the queries cost O(degree) instead of a scan over all edges.
+  """
+
+  def __init__(self):
+    # removed entries are set to None so that the ids stay valid
+    self.vertices: List[Optional[IRVertex]] = []
+    self.edges: List[Optional[IREdge]] = []
+    self.vertex_name_to_id: Dict[str, int] = {}
+    self.edge_name_to_id: Dict[str, int] = {}
+    self.wire_to_edge: Dict[str, int] = {}
+
+    # all other top-level entries of the config, e.g., wire_decl
+    self.others: Dict = {}
+    self._key_order: List[str] = [VERTEX_KEY, EDGE_KEY]
+
+  @classmethod
+  def from_json(cls, config: Dict) -> 'TapaGraph':
+    """Build the graph from the config. The props are shared with the config"""
+    graph = cls()
+    graph._key_order = list(config.keys())
+    for key, value in config.items():
+      if key not in (VERTEX_KEY, EDGE_KEY):
+        graph.others[key] = value
+
+    for name, props in config.get(VERTEX_KEY, {}).items():
+      graph.add_vertex(name, props)
+    for name, props in config.get(EDGE_KEY, {}).items():
+      graph.add_edge(name, props)
+
+    return graph
+
+  def to_json(self) -> Dict:
+    """Convert back to the config format with the original key order"""
+    config = {}
+    for key in self._key_order:
+      if key == VERTEX_KEY:
+        config[key] = {v.name: v.props for v in self.iter_vertices()}
+      elif key == EDGE_KEY:
+        config[key] = {e.name: e.props for e in self.iter_edges()}
+      elif key in self.others:
+        config[key] = self.others[key]
+
+    for key, value in self.others.items():
+      if key not in config:
+        config[key] = value
+
+    return config
+
+  def iter_vertices(self) -> Iterator[IRVertex]:
+    return (v for v in self.vertices if v is not None)
+
+  def iter_edges(self) -> Iterator[IREdge]:
+    return (e for e in self.edges if e is not None)
+
+  def has_vertex(self, name: str) -> bool:
+    return name in self.vertex_name_to_id
+
+  def has_edge(self, name: str) -> bool:
+    return name in self.edge_name_to_id
+
+  def get_vertex(self, name: str) -> IRVertex:
+    return self.vertices[self.vertex_name_to_id[name]]
+
+  def get_edge(self, name: str) -> IREdge:
+    return self.edges[self.edge_name_to_id[name]]
+
+  def add_vertex(self, name: str, props: Dict) -> IRVertex:
+    assert name not in self.vertex_name_to_id, f'duplicated vertex {name}'
+    v = IRVertex(len(self.vertices), name, props)
+    self.vertices.append(v)
+    self.vertex_name_to_id[name] = v.id
+    return v
+
+  def remove_vertex(self, name: str) -> IRVertex:
+    """The edges of the vertex must be removed first"""
+    v = self.get_vertex(name)
+    assert not v.in_edges and not v.out_edges, f'vertex {name} still has edges'
+    self.vertices[v.id] = None
+    del self.vertex_name_to_id[name]
+    return v
+
+  def add_edge(self, name: str, props: Dict) -> IREdge:
+    assert name not in self.edge_name_to_id, f'duplicated edge {name}'
+    e = IREdge(len(self.edges), name, props)
+    self.edges.append(e)
+    self.edge_name_to_id[name] = e.id
+
+    self._link_edge(e)
+    for wire in e.get_wires():
+      self.wire_to_edge[wire] = e.id
+
+    return e
+
+  def remove_edge(self, name: str) -> IREdge:
+    e = self.get_edge(name)
+    self._unlink_edge(e)
+    for wire in e.get_wires():
+      if self.wire_to_edge.get(wire) == e.id:
+        del self.wire_to_edge[wire]
+
+    self.edges[e.id] = None
+    del self.edge_name_to_id[name]
+    return e
+
+  def reconnect_edge(self, name: str, src_name: Optional[str], dst_name: Optional[str]) -> IREdge:
+    """Change the producer and consumer of an edge"""
+    e = self.get_edge(name)
+    self._unlink_edge(e)
+    e.props['produced_by'] = src_name
+    e.props['consumed_by'] = dst_name
+    self._link_edge(e)
+    return e
+
+  def rename_edge_wires(self, name: str, old_to_new: Dict[str, str]) -> IREdge:
+    """Rename the wires connected to the stream instance"""
+    e = self.get_edge(name)
+    for ports in e.props.get('port_wire_map', {}).values():
+      for port, wire in ports.items():
+        if wire in old_to_new:
+          ports[port] = old_to_new[wire]
+          if self.wire_to_edge.get(wire) == e.id:
+            del self.wire_to_edge[wire]
+          self.wire_to_edge[old_to_new[wire]] = e.id
+    return e
+
+  def _link_edge(self, e: IREdge) -> None:
+    """Add the edge to the incidence index of its endpoints"""
+    src_name = e.props.get('produced_by')
+    dst_name = e.props.get('consumed_by')
+    if src_name in self.vertex_name_to_id:
+      e.src = self.vertex_name_to_id[src_name]
+      self.vertices[e.src].out_edges[e.id] = None
+    elif src_name is not None:
+      _logger.debug('the producer %s of edge %s is not a vertex', src_name, e.name)
+
+    if dst_name in self.vertex_name_to_id:
+      e.dst = self.vertex_name_to_id[dst_name]
+      self.vertices[e.dst].in_edges[e.id] = None
+    elif dst_name is not None:
+      _logger.debug('the consumer %s of edge %s is not a vertex', dst_name, e.name)
+
+  def _unlink_edge(self, e: IREdge) -> None:
+    if e.src is not None:
+      del self.vertices[e.src].out_edges[e.id]
+    if e.dst is not None:
+      del self.vertices[e.dst].in_edges[e.id]
+    e.src = None
+    e.dst = None
+
+  def get_in_edges(self, vertex_name: str) -> List[str]:
+    return [self.edges[i].name for i in self.get_vertex(vertex_name).in_edges]
+
+  def get_out_edges(self, vertex_name: str) -> List[str]:
+    return [self.edges[i].name for i in self.get_vertex(vertex_name).out_edges]
+
+  def get_stream_of_wire(self, wire: str) -> Optional[str]:
+    if wire in self.wire_to_edge:
+      return self.edges[self.wire_to_edge[wire]].name
+    return None
+
+  def get_internal_and_external_edges(
+    self, vertex_names: List[str]
+  ) -> Tuple[List[str], List[str]]:
+    """Edges with both / one end in the vertex group, in the order of the config
+
+    Only visit the edges incident to the group
+    """
+    vertex_ids = {self.vertex_name_to_id[name] for name in vertex_names}
+    incident_edge_ids = set()
+    for i in vertex_ids:
+      incident_edge_ids.update(self.vertices[i].in_edges)
+      incident_edge_ids.update(self.vertices[i].out_edges)
+
+    internal_edges = []
+    external_edges = []
+    for i in sorted(incident_edge_ids):
+      e = self.edges[i]
+      if e.src in vertex_ids and e.dst in vertex_ids:
+        internal_edges.append(e.name)
+      else:
+        external_edges.append(e.name)
+
+    return internal_edges, external_edges
@@ -1,7 +1,11 @@
 import click
+import hashlib
 import logging
 import json
-from typing import Callable, Dict
+import os
+import re
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import pyverilog.vparser.ast as ast
 from pyverilog.ast_code_generator import codegen
@@ -76,6 +80,19 @@ S_AXI_LITE_BASIC = (
   'interrupt',
 )
 
+# bump when the extracted IR changes so that stale cache entries are ignored
+PARSER_VERSION = 1
+
+RTL_IR_CACHE_DIR = os.path.join(
+  os.getenv('RAPIDSTREAM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.rapidstream')),
+  'rtl_ir',
+)
+
+# lightweight stand-ins of the pyverilog nodes restored from the cache
+CachedPortArg = namedtuple('CachedPortArg', ['portname', 'argname'])
+CachedInstance = namedtuple('CachedInstance', ['name', 'portlist'])
+CachedInstanceList = namedtuple('CachedInstanceList', ['module', 'instances'])
+
 # collect all wire decl
 # collect all wire/port of each FIFO/relay_station
 # collect all wire/port of each task instance
@@ -92,10 +109,33 @@ S_AXI_LITE_BASIC = (
 # 2 the signal will be connected to the internal of the instance
 
 
-def visitor(ast: ast.Node, action: Callable, *args) -> None:
-  action(ast, *args)
-  for c in ast.children():
-    visitor(c, action, *args)
+def traverse(root: ast.Node, handlers: List[Tuple[type, Callable]]) -> None:
+  """Visit all nodes in pre-order and call the handlers registered for the node type
+
+  Use an explicit stack instead of recursion so that deep ASTs do not hit the
+  recursion limit. The handlers of a node run in the order they are registered.
+  """
+  type_to_actions = {}
+  stack = [root]
+  while stack:
+    node = stack.pop()
+    node_type = type(node)
+    if node_type not in type_to_actions:
+      type_to_actions[node_type] = [
+        action for target, action in handlers if isinstance(node, target)
+      ]
+    for action in type_to_actions[node_type]:
+      action(node)
+
+    # reverse so that the first child is visited first
+    stack.extend(reversed(node.children()))
+
+
+def visitor(root: ast.Node, action: Callable, *args) -> None:
+  traverse(root, [(ast.Node, lambda node: action(node, *args))])
+
+
+_code_generator = codegen.ASTCodeGenerator()
 
 
 def _get_width(node: ast.Node) -> str:
@@ -103,7 +143,7 @@ def _get_width(node: ast.Node) -> str:
   if node.width is None:
     width = ''
   else:
-    width = str(codegen.ASTCodeGenerator().visit(node.width))
+    width = str(_code_generator.visit(node.width))
   return width
 
 
@@ -125,43 +165,52 @@ def get_output_info(node: ast.Node, config: Dict):
     config['output_decl'][node.name] = _get_width(node)
 
 
-def get_decl_info(ast: ast.Source, config: Dict):
+def get_decl_handlers(config: Dict) -> List[Tuple[type, Callable]]:
+  """Handlers to collect the wire, input and output declarations"""
   for target in ('wire', 'input', 'output'):
     config[f'{target}_decl'] = {}
-  visitor(ast, get_wire_info, config)
-  visitor(ast, get_input_info, config)
-  visitor(ast, get_output_info, config)
+  return [
+    (ast.Wire, lambda node: get_wire_info(node, config)),
+    (ast.Input, lambda node: get_input_info(node, config)),
+    (ast.Output, lambda node: get_output_info(node, config)),
+  ]
 
 
-def get_stream_info(node: ast.Node, config: Dict, wire_to_stream: Dict):
-  """Collect all port/wire binding of each stream"""
-  if isinstance(node, ast.InstanceList):
-    if node.module in STREAM_TYPES:
-      instance = node.instances[0]
-      edge_name = f'FIFO_EDGE_{instance.name}'
-      assert edge_name in config['edges']
-
-      port_wire_map = {
-        'inbound': {},
-        'outbound': {},
-        'others': {}
-      }
-      for port_arg in instance.portlist:
-        portname = str(port_arg.portname)
-        argname = str(port_arg.argname)
-
-        if portname in INBOUND_STREAM_PORTS:
-          port_wire_map['inbound'][portname] = argname
-        elif portname in OUTBOUND_STREAM_PORTS:
-          port_wire_map['outbound'][portname] = argname
-        elif portname in OTHER_STREAM_PORTS:
-          port_wire_map['others'][portname] = argname
-        else:
-          assert False
-
-        wire_to_stream[argname] = edge_name
-
-      config['edges'][edge_name]['port_wire_map'] = port_wire_map
+def get_decl_info(root: ast.Source, config: Dict):
+  traverse(root, get_decl_handlers(config))
+
+
+def get_stream_info(node: ast.InstanceList, config: Dict, wire_to_stream: Dict):
+  """Collect all port/wire binding of each stream
+
+  node is either an InstanceList or a CachedInstanceList
+  """
+  if node.module in STREAM_TYPES:
+    instance = node.instances[0]
+    edge_name = f'FIFO_EDGE_{instance.name}'
+    assert edge_name in config['edges']
+
+    port_wire_map = {
+      'inbound': {},
+      'outbound': {},
+      'others': {}
+    }
+    for port_arg in instance.portlist:
+      portname = str(port_arg.portname)
+      argname = str(port_arg.argname)
+
+      if portname in INBOUND_STREAM_PORTS:
+        port_wire_map['inbound'][portname] = argname
+      elif portname in OUTBOUND_STREAM_PORTS:
+        port_wire_map['outbound'][portname] = argname
+      elif portname in OTHER_STREAM_PORTS:
+        port_wire_map['others'][portname] = argname
+      else:
+        assert False
+
+      wire_to_stream[argname] = edge_name
+
+    config['edges'][edge_name]['port_wire_map'] = port_wire_map
 def is_peek_port(portname: str):
   return any(portname.endswith(suffix) for suffix in PEEK_PORT_SUFFIX)
 
@@ -276,12 +325,14 @@ def _get_ctrl_vertex_info(
     }
 
 
-def get_vertex_info(node: ast.Node, config: Dict, wire_to_stream: Dict):
-  """Collect all port/wire binding of each task instance"""
-  if isinstance(node, ast.InstanceList):
-    if node.module not in STREAM_TYPES:
-      _get_task_vertex_info(node, config, wire_to_stream)
-      _get_ctrl_vertex_info(node, config)
+def get_vertex_info(node: ast.InstanceList, config: Dict, wire_to_stream: Dict):
+  """Collect all port/wire binding of each task instance
+
+  node is either an InstanceList or a CachedInstanceList
+  """
+  if node.module not in STREAM_TYPES:
+    _get_task_vertex_info(node, config, wire_to_stream)
+    _get_ctrl_vertex_info(node, config)
 
 
 def check_rtl_format(node: ast.Node):
@@ -305,6 +356,106 @@ def collect_in_out_streams(config: Dict):
       config['vertices'][dst]['inbound_streams'].append(edge)
 
 
+def _instance_list_to_json(node: ast.InstanceList) -> Dict:
+  instance = node.instances[0]
+  return {
+    'module': node.module,
+    'name': instance.name,
+    'ports': [[str(p.portname), str(p.argname)] for p in instance.portlist],
+  }
+
+
+def _instance_list_from_json(data: Dict) -> CachedInstanceList:
+  portlist = [CachedPortArg(portname, argname) for portname, argname in data['ports']]
+  return CachedInstanceList(data['module'], [CachedInstance(data['name'], portlist)])
+
+
+def extract_rtl_ir(top_rtl_path: str) -> Dict:
+  """Parse the top RTL and extract everything needed from the AST in one pass
+
+  The result only depends on the RTL so it can be cached
+  """
+  rtl_ast, directives = parse([top_rtl_path])
+
+  rtl_ir = {'parser_version': PARSER_VERSION}
+  handlers = [(ast.InstanceList, check_rtl_format)]
+  handlers += get_decl_handlers(rtl_ir)
+
+  instances = []
+  handlers.append(
+    (ast.InstanceList, lambda node: instances.append(_instance_list_to_json(node)))
+  )
+
+  traverse(rtl_ast, handlers)
+  rtl_ir['instances'] = instances
+  return rtl_ir
+
+
+# the names of the cache entries and of their temp files, see save_rtl_ir
+_RTL_IR_CACHE_FILE_PATTERN = re.compile(r'[0-9a-f]{64}\.json(\.tmp\d+)?')
+
+
+def _get_rtl_ir_cache_path(top_rtl_path: str, cache_dir: str) -> str:
+  sha = hashlib.sha256()
+  sha.update(f'{PARSER_VERSION}'.encode())
+  with open(top_rtl_path, 'rb') as f:
+    sha.update(f.read())
+  return os.path.join(cache_dir, f'{sha.hexdigest()}.json')
+
+
+def load_rtl_ir(top_rtl_path: str, cache_dir: str) -> Optional[Dict]:
+  """Return the cached IR of the top RTL, or None if not cached"""
+  cache_path = _get_rtl_ir_cache_path(top_rtl_path, cache_dir)
+  if not os.path.isfile(cache_path):
+    return None
+
+  rtl_ir = json.load(open(cache_path, 'r'))
+  if rtl_ir.get('parser_version') != PARSER_VERSION:
+    return None
+
+  _logger.info('reuse the parsed RTL in %s', cache_path)
+  return rtl_ir
+
+
+def save_rtl_ir(top_rtl_path: str, cache_dir: str, rtl_ir: Dict) -> None:
+  cache_path = _get_rtl_ir_cache_path(top_rtl_path, cache_dir)
+  os.makedirs(cache_dir, exist_ok=True)
+
+  # write to a temp file first so that concurrent runs never see a partial file
+  temp_path = f'{cache_path}.tmp{os.getpid()}'
+  open(temp_path, 'w').write(json.dumps(rtl_ir))
+  os.replace(temp_path, cache_path)
+  _logger.info('save the parsed RTL to %s', cache_path)
+
+
+def clear_rtl_ir_cache(cache_dir: str) -> None:
+  """Remove the cached IR in cache_dir. Any other file in the dir is kept"""
+  if not os.path.isdir(cache_dir):
+    return
+
+  _logger.info('clear the RTL cache in %s', cache_dir)
+  for name in os.listdir(cache_dir):
+    path = os.path.join(cache_dir, name)
+    if _RTL_IR_CACHE_FILE_PATTERN.fullmatch(name) and os.path.isfile(path):
+      os.remove(path)
+
+
+def apply_rtl_ir(rtl_ir: Dict, config: Dict) -> None:
+  """Fill the RTL information into the config"""
+  for target in ('wire', 'input', 'output'):
+    config[f'{target}_decl'] = dict(rtl_ir[f'{target}_decl'])
+
+  instance_lists = [_instance_list_from_json(data) for data in rtl_ir['instances']]
+
+  # the vertex info depends on all streams
+  wire_to_stream = {}
+  for node in instance_lists:
+    get_stream_info(node, config, wire_to_stream)
+
+  for node in instance_lists:
+    get_vertex_info(node, config, wire_to_stream)
+
+
 @click.command()
 @click.option(
   '--top-rtl-path',
@@ -316,24 +467,44 @@ def collect_in_out_streams(config: Dict):
   required=True,
   help='Path to the configuration file generated by AutoBridge.'
 )
+@click.option(
+  '--no-cache',
+  is_flag=True,
+  help='Always parse the top RTL and do not update the cache.'
+)
+@click.option(
+  '--clear-cache',
+  is_flag=True,
+  help='Remove the cached RTL in the cache dir before running.'
+)
+@click.option(
+  '--cache-dir',
+  default=RTL_IR_CACHE_DIR,
+  show_default=True,
+  help='Where to cache the parsed top RTL.'
+)
 def get_rtl(
   top_rtl_path: str,
   post_floorplan_config_path: str,
+  no_cache: bool,
+  clear_cache: bool,
+  cache_dir: str,
 ):
   """"""
   setup_logging()
 
   config = json.load(open(post_floorplan_config_path, 'r'))
 
-  ast, directives = parse([top_rtl_path])
-  visitor(ast, check_rtl_format)
+  if clear_cache:
+    clear_rtl_ir_cache(cache_dir)
 
-  get_decl_info(ast, config)
-
-  wire_to_stream = {}
-  visitor(ast, get_stream_info, config, wire_to_stream)
+  rtl_ir = None if no_cache else load_rtl_ir(top_rtl_path, cache_dir)
+  if rtl_ir is None:
+    rtl_ir = extract_rtl_ir(top_rtl_path)
+    if not no_cache:
+      save_rtl_ir(top_rtl_path, cache_dir, rtl_ir)
 
-  visitor(ast, get_vertex_info, config, wire_to_stream)
+  apply_rtl_ir(rtl_ir, config)
 
   collect_in_out_streams(config)
   open('test.json', 'w').write(json.dumps(config, indent=2))
@@ -29,6 +29,7 @@ setup(
     python_requires='>=3.6',
     install_requires=[
         'mip',
+        'numpy',
         'pyverilog',
     ],
     entry_points={
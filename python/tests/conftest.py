@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# make the rapidstream package importable without installing it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# keep the on-disk caches of the tests away from the user's cache
+os.environ.setdefault('RAPIDSTREAM_CACHE_DIR', tempfile.mkdtemp(prefix='rapidstream_test_cache_'))
@@ -0,0 +1,166 @@
+import itertools
+import logging
+import re
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mip')
+
+from rapidstream.BE.AnchorPlacement.AssignmentSolver import ASSIGNMENT_SOLVERS, solveAssignment, _solveSparse
+from rapidstream.BE.AnchorPlacement.TransportationSolver import TransportationSolver
+
+
+def _getBruteForceCost(cost, capacity):
+  """
+  the optimal total cost by enumerating all assignments, or None if infeasible
+  """
+  row_num, col_num = cost.shape
+  best = None
+  for row_to_col in itertools.product(range(col_num), repeat=row_num):
+    if any(row_to_col.count(j) > capacity[j] for j in range(col_num)):
+      continue
+    total = sum(cost[i][j] for i, j in enumerate(row_to_col))
+    if np.isfinite(total) and (best is None or total < best):
+      best = total
+  return best
+
+
+def _getTotalCost(cost, capacity, row_to_col):
+  assert row_to_col.shape == (cost.shape[0],)
+  assert all(np.bincount(row_to_col, minlength=cost.shape[1]) <= capacity)
+  return cost[np.arange(cost.shape[0]), row_to_col].sum()
+
+
+def _getRandomInstance(rng):
+  row_num = rng.integers(1, 6)
+  col_num = rng.integers(1, 6)
+  cost = rng.integers(0, 20, size=(row_num, col_num)).astype(float)
+
+  # the pairs that are not allowed
+  cost[rng.random(size=cost.shape) < 0.2] = np.inf
+
+  # some bins are full
+  capacity = rng.integers(0, 4, size=col_num)
+  return cost, capacity
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_solvers_match_brute_force(seed):
+  cost, capacity = _getRandomInstance(np.random.default_rng(seed))
+  expected = _getBruteForceCost(cost, capacity)
+
+  solver_to_total_cost = {}
+  for solver in ASSIGNMENT_SOLVERS:
+    row_to_col = solveAssignment(cost, capacity, solver)
+    if expected is None:
+      assert row_to_col is None, solver
+    else:
+      solver_to_total_cost[solver] = _getTotalCost(cost, capacity, row_to_col)
+      assert solver_to_total_cost[solver] == pytest.approx(expected), solver
+
+  if expected is not None:
+    assert solver_to_total_cost['TRANSPORTATION'] == pytest.approx(solver_to_total_cost['CBC'])
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_transportation_reduced_cost_is_non_negative(seed):
+  cost, capacity = _getRandomInstance(np.random.default_rng(seed))
+  solver = TransportationSolver(cost, capacity)
+  if not solver.solve():
+    assert _getBruteForceCost(cost, capacity) is None
+    return
+
+  reduced_cost = solver.getReducedCost()
+  assert (reduced_cost >= -1e-9).all()
+
+  # the assigned pairs are tight
+  assert reduced_cost[np.arange(cost.shape[0]), solver.row_to_col] == pytest.approx(0)
+
+  # a column with spare capacity has a potential of 0
+  spare = capacity - np.bincount(solver.row_to_col, minlength=cost.shape[1])
+  assert (solver.col_potential[spare > 0] == 0).all()
+  assert (solver.col_potential <= 0).all()
+
+  assert solver.getTotalCost() == pytest.approx(_getBruteForceCost(cost, capacity))
+
+
+@pytest.mark.parametrize('solver', ASSIGNMENT_SOLVERS)
+def test_infeasible_instances(solver):
+  # not enough capacity in total
+  assert solveAssignment(np.zeros((3, 2)), np.array([1, 1]), solver) is None
+
+  # all bins are full
+  assert solveAssignment(np.zeros((1, 2)), np.array([0, 0]), solver) is None
+
+  # a row with no allowed bin
+  cost = np.array([[1., 2.], [np.inf, np.inf]])
+  assert solveAssignment(cost, np.array([2, 2]), solver) is None
+
+  # two rows can only use the same bin of capacity 1
+  cost = np.array([[1., np.inf, 3.], [2., np.inf, np.inf], [np.inf, 5., 1.]])
+  assert solveAssignment(cost, np.array([1, 1, 1]), solver) is not None
+  cost[0][2] = np.inf
+  assert solveAssignment(cost, np.array([1, 1, 1]), solver) is None
+
+
+def _getCandidateNums(caplog):
+  return [int(re.match(r'solve with (\d+) candidate', record.getMessage()).group(1))
+    for record in caplog.records if record.getMessage().startswith('solve with')]
+
+
+def _checkSparseMatchesDense(cost, capacity, solver):
+  row_to_col = _solveSparse(cost, capacity, solver, 1)
+  dense_row_to_col = solveAssignment(cost, capacity, solver)
+  assert _getTotalCost(cost, capacity, row_to_col) == pytest.approx(_getTotalCost(cost, capacity, dense_row_to_col))
+  return row_to_col
+
+
+@pytest.mark.parametrize('solver', ASSIGNMENT_SOLVERS)
+def test_sparse_grows_when_infeasible(solver, caplog):
+  caplog.set_level(logging.INFO)
+
+  # both rows prefer bin 0 of capacity 1, thus the problem with one candidate per row is infeasible
+  cost = np.array([
+    [0., 1., 5.],
+    [0., 2., 6.],
+  ])
+  capacity = np.array([1, 1, 1])
+  row_to_col = _checkSparseMatchesDense(cost, capacity, solver)
+
+  assert row_to_col.tolist() == [1, 0]
+  assert any('the sparse problem with 1 candidates is infeasible' in record.getMessage() for record in caplog.records)
+  assert _getCandidateNums(caplog) == [1, 2]
+
+
+@pytest.mark.parametrize('solver', ASSIGNMENT_SOLVERS)
+def test_sparse_grows_when_a_cut_bin_is_better(solver, caplog):
+  caplog.set_level(logging.INFO)
+
+  # with 2 candidates per row, row 3 must take bin 3 at a cost of 50.
+  # The full optimum moves row 0 to bin 4, which is not a candidate of any row, and row 3 to bin 0
+  cost = np.array([
+    [0., 1., 60., 61., 2.],
+    [0., 62., 1., 63., 64.],
+    [65., 0., 1., 66., 67.],
+    [0., 68., 69., 50., 70.],
+  ])
+  capacity = np.array([1, 1, 1, 1, 1])
+
+  caplog.clear()
+  assert _solveSparse(cost, capacity, solver, 2).tolist() == [4, 2, 1, 0]
+  assert any(re.match('a cut bin has a reduced cost of -[0-9.]+ with 2 candidates', record.getMessage())
+    for record in caplog.records)
+  assert _getCandidateNums(caplog) == [2, 4]
+
+  assert _getTotalCost(cost, capacity, _checkSparseMatchesDense(cost, capacity, solver)) == pytest.approx(3)
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_sparse_matches_dense(seed):
+  cost, capacity = _getRandomInstance(np.random.default_rng(seed))
+  for solver in ASSIGNMENT_SOLVERS:
+    if solveAssignment(cost, capacity, solver) is None:
+      assert _solveSparse(cost, capacity, solver, 1) is None
+    else:
+      _checkSparseMatchesDense(cost, capacity, solver)
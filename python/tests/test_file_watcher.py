@@ -0,0 +1,74 @@
+import os
+import struct
+import threading
+
+import pytest
+
+from rapidstream.BE import FileWatcher as file_watcher
+from rapidstream.BE.FileWatcher import EVENT_HEADER_FORMAT, IN_CREATE, IN_Q_OVERFLOW, FileWatcher
+
+
+def _getEvent(wd, mask, name=b''):
+  name = name + b'\0' * (-len(name) % 16) if name else b''
+  return struct.pack(EVENT_HEADER_FORMAT, wd, mask, 0, len(name)) + name
+
+
+@pytest.fixture
+def watcher_with_fake_events(tmp_path, monkeypatch):
+  """
+  a watcher on a file in a dir that does not exist yet
+  the events it reads are replaced by the ones given to the returned function
+  """
+  watcher = FileWatcher([str(tmp_path / 'a' / 'b' / 'done.flag')])
+  if watcher.fd is None:
+    pytest.skip('inotify is not available')
+
+  fake_events = []
+  real_read = os.read
+  monkeypatch.setattr(file_watcher.select, 'select', lambda r, w, x, timeout: (r, w, x))
+  monkeypatch.setattr(file_watcher.os, 'read', lambda fd, n: fake_events.pop(0) if fd == watcher.fd else real_read(fd, n))
+
+  def readEvents(*events):
+    fake_events.append(b''.join(events))
+    watcher._FileWatcher__readEvents(0)
+
+  yield watcher, readEvents
+  watcher.close()
+
+
+def test_files_in_new_dirs_are_noticed(tmp_path):
+  flag = tmp_path / 'a' / 'b' / 'done.flag'
+  watcher = FileWatcher([str(flag)])
+
+  def create():
+    flag.parent.mkdir(parents=True)
+    flag.write_text('')
+
+  thread = threading.Timer(0.2, create)
+  thread.start()
+  try:
+    assert watcher.wait(timeout=10) == [str(flag)]
+    assert not watcher.pending
+  finally:
+    thread.join()
+    watcher.close()
+
+
+def test_overflow_rescans_the_pending_files(tmp_path, watcher_with_fake_events):
+  watcher, readEvents = watcher_with_fake_events
+  assert str(tmp_path) in watcher.watched_dirs
+
+  # the creation of the dirs is lost in the overflow
+  (tmp_path / 'a' / 'b').mkdir(parents=True)
+  readEvents(_getEvent(-1, IN_Q_OVERFLOW))
+
+  assert str(tmp_path / 'a' / 'b') in watcher.watched_dirs
+
+
+def test_events_of_unknown_watches_are_skipped(tmp_path, watcher_with_fake_events):
+  watcher, readEvents = watcher_with_fake_events
+
+  (tmp_path / 'a' / 'b').mkdir(parents=True)
+  readEvents(_getEvent(12345, IN_CREATE, b'a'))
+
+  assert str(tmp_path / 'a' / 'b') in watcher.watched_dirs
@@ -0,0 +1,118 @@
+import pytest
+
+pytest.importorskip('autobridge')
+
+from autobridge.Device.DeviceManager import DeviceManager
+from autobridge.Opt.DataflowGraph import Edge, Vertex
+from autobridge.Opt.SlotManager import SlotManager
+
+from rapidstream.FE import Manager as manager_module
+from rapidstream.FE.Manager import Manager, pickBestFloorplanCandidate
+
+SLOT_0 = 'CR_X0Y0_To_CR_X1Y1'
+SLOT_1 = 'CR_X2Y0_To_CR_X3Y1'
+
+
+def _getCandidate(method, ratio, congestion, wire_count, s2v=None):
+  return {
+    'FloorplanMethod' : method,
+    'AreaUtilizationRatio' : ratio,
+    'SlotToVertexNames' : s2v or {},
+    'InterSlotWireCount' : wire_count,
+    'Congestion' : congestion,
+  }
+
+
+def test_pick_best_candidate_by_congestion():
+  results = [
+    _getCandidate('A', 0.6, 0.9, 10),
+    _getCandidate('B', 0.6, 0.3, 1000),
+    None,
+    _getCandidate('C', 0.6, 0.5, 1),
+  ]
+  assert pickBestFloorplanCandidate(results)['FloorplanMethod'] == 'B'
+
+
+def test_pick_best_candidate_breaks_ties_by_wire_count():
+  # the congestion is only compared up to 2 decimals
+  results = [
+    _getCandidate('A', 0.6, 0.501, 300),
+    _getCandidate('B', 0.7, 0.499, 400),
+    _getCandidate('C', 0.8, 0.504, 200),
+    _getCandidate('D', 0.8, 0.506, 100),
+  ]
+  assert pickBestFloorplanCandidate(results)['FloorplanMethod'] == 'C'
+
+
+def test_pick_best_candidate_drops_failed_candidates():
+  assert pickBestFloorplanCandidate([None, _getCandidate('A', 0.6, 2.0, 10), None])['FloorplanMethod'] == 'A'
+
+  with pytest.raises(AssertionError):
+    pickBestFloorplanCandidate([None, None])
+
+
+class _Graph:
+  def __init__(self, vertices):
+    self.name_to_vertex = {v.name : v for v in vertices}
+
+  def getAllVertices(self):
+    return list(self.name_to_vertex.values())
+
+  def getVertex(self, name):
+    return self.name_to_vertex[name]
+
+
+class _HLSProjectManager:
+  def getTotalArea(self):
+    return {'BRAM': 0, 'DSP': 0, 'FF': 1000, 'LUT': 1000, 'URAM': 0}
+
+
+def _getGraph():
+  vertices = [Vertex('', name) for name in ('a', 'b', 'c')]
+  for name, src, dst in (('a_to_b', 0, 1), ('b_to_c', 1, 2)):
+    e = Edge(name)
+    e.src = vertices[src]
+    e.dst = vertices[dst]
+    e.width = 32
+    vertices[src].out_edges.append(e)
+    vertices[dst].in_edges.append(e)
+  return _Graph(vertices)
+
+
+def _fakeFloorplanCandidate(candidate):
+  method, ratio = candidate
+  if method == 'Broken':
+    return None
+  congestion = {0.6: 0.8, 0.7: 0.2}[ratio]
+  return _getCandidate(method, ratio, congestion, 32, {SLOT_0: ['a', 'b'], SLOT_1: ['c']})
+
+
+def test_portfolio_uses_the_winner_without_searching_again(monkeypatch):
+  monkeypatch.setattr(manager_module, '_runFloorplanCandidate', _fakeFloorplanCandidate)
+
+  def searchAgain(*args, **kwargs):
+    assert False, 'the winner of the portfolio should not be floorplanned again'
+  monkeypatch.setattr(Manager, 'runFloorplanning', searchAgain)
+
+  manager = Manager.__new__(Manager)
+  manager.device_manager = DeviceManager('U250')
+  manager.floorplan_portfolio = {
+    'FloorplanMethods' : ['Broken', 'Good'],
+    'AreaUtilizationRatios' : [0.6, 0.7],
+    'Workers' : 2,
+  }
+
+  graph = _getGraph()
+  slot_manager = SlotManager(manager.device_manager.getBoard())
+  method, ratio, floorplan = manager.runPortfolioFloorplanning(graph, slot_manager, _HLSProjectManager(), [], [])
+
+  assert (method, ratio) == ('Good', 0.7)
+  assert {s.getRTLModuleName() : sorted(v.name for v in v_group) for s, v_group in floorplan.getSlotToVertices().items()} == \
+    {SLOT_0: ['a', 'b'], SLOT_1: ['c']}
+  assert {v.name : s.getRTLModuleName() for v, s in floorplan.getVertexToSlot().items()} == {'a': SLOT_0, 'b': SLOT_0, 'c': SLOT_1}
+
+  # an edge between two slots belongs to the slot of its destination
+  assert {s.getRTLModuleName() : [e.name for e in e_list] for s, e_list in floorplan.getSlotToEdges().items()} == \
+    {SLOT_0: ['a_to_b'], SLOT_1: ['b_to_c']}
+
+  assert sorted(s.getRTLModuleName() for s in slot_manager.getComputeSlots()) == [SLOT_0, SLOT_1]
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip('autobridge')
+
+from autobridge.Device.DeviceManager import DeviceU250
+from autobridge.Opt.DataflowGraph import Edge, Vertex
+from autobridge.Opt.Slot import Slot
+
+from rapidstream.FE.GlobalRouting import GlobalRouting
+
+U250 = DeviceU250()
+
+
+def _getDistance(src_name, path_names, dst_name):
+  router = GlobalRouting.__new__(GlobalRouting)
+
+  e = Edge('e')
+  e.src = Vertex('', 'src')
+  e.dst = Vertex('', 'dst')
+  router.v2s = {e.src: Slot(U250, src_name), e.dst: Slot(U250, dst_name)}
+  router.e_name2path = {e.name: [Slot(U250, name) for name in path_names]}
+
+  return router._GlobalRouting__getDistanceOfEdge(e)
+
+
+def test_distance_of_2x2_slots_matches_the_original_count():
+  path = ['CR_X2Y0_To_CR_X3Y1', 'CR_X2Y2_To_CR_X3Y3']
+  assert _getDistance('CR_X0Y0_To_CR_X1Y1', path, 'CR_X4Y2_To_CR_X5Y3') == (len(path) + 1) * 2
+  assert _getDistance('CR_X0Y0_To_CR_X1Y1', [], 'CR_X0Y0_To_CR_X1Y1') == 2
+
+
+def test_distance_follows_the_slot_size():
+  # 4-CR wide and 2-CR high slots
+  path = ['CR_X4Y0_To_CR_X7Y1']
+  assert _getDistance('CR_X0Y0_To_CR_X3Y1', path, 'CR_X4Y2_To_CR_X7Y3') == 4 + 2
+  assert _getDistance('CR_X0Y0_To_CR_X3Y1', [], 'CR_X0Y2_To_CR_X3Y3') == 2
+  assert _getDistance('CR_X0Y0_To_CR_X3Y1', [], 'CR_X4Y0_To_CR_X7Y1') == 4
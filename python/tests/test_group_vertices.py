@@ -0,0 +1,96 @@
+from rapidstream.group_vertices import coarsen_graph, get_heavy_edge_clusters, get_stream_width
+from rapidstream.tapa_ir import TapaGraph
+
+
+def _getConfig(vertex_to_location, edges):
+  """
+  vertex_to_location: name -> (floorplan_region, SLR)
+  edges: [(name, src, dst, width), ...]
+  """
+  config = {'vertices': {}, 'edges': {}, 'wire_decl': {}}
+  for name, (region, slr) in vertex_to_location.items():
+    config['vertices'][name] = {
+      'category': 'TASK_VERTEX',
+      'floorplan_region': region,
+      'SLR': slr,
+      'area': {'LUT': 100, 'FF': 200},
+      'port_wire_map': {'axi_ports': {}, 'ctrl_ports': {}, 'constant_ports': {}, 'stream_ports': {}},
+    }
+
+  for name, src, dst, width in edges:
+    din, dout = f'{name}_if_din', f'{name}_if_dout'
+    config['wire_decl'][din] = f'[{width - 1}:0]'
+    config['wire_decl'][dout] = f'[{width - 1}:0]'
+    config['edges'][name] = {
+      'category': 'FIFO_EDGE',
+      'produced_by': src,
+      'consumed_by': dst,
+      'port_wire_map': {'inbound': {'if_din': din}, 'outbound': {'if_dout': dout}},
+    }
+    config['vertices'][src]['port_wire_map']['stream_ports'][name] = {'out': din}
+    config['vertices'][dst]['port_wire_map']['stream_ports'][name] = {'in': dout}
+
+  return config
+
+
+def test_stream_width_is_read_from_the_din_wire():
+  graph = TapaGraph.from_json(_getConfig({'a': ('R0', 0), 'b': ('R0', 0)}, [('ab', 'a', 'b', 64)]))
+  assert get_stream_width(graph, 'ab') == 64
+
+
+def test_clusters_stay_in_one_region_and_slr():
+  vertex_to_location = {
+    'a': ('R0', 0), 'b': ('R0', 0),
+    'c': ('R1', 0),  # same SLR, different region
+    'd': ('R0', 1),  # same region, different SLR
+  }
+  edges = [('ab', 'a', 'b', 8), ('ac', 'a', 'c', 512), ('bd', 'b', 'd', 512)]
+  graph = TapaGraph.from_json(_getConfig(vertex_to_location, edges))
+
+  clusters = get_heavy_edge_clusters(graph, max_group_size=8)
+  assert clusters == [['a', 'b']]
+  for cluster in clusters:
+    assert len({vertex_to_location[v] for v in cluster}) == 1
+
+
+def test_heavy_edges_are_matched_first():
+  # a chain where the middle edge is the widest
+  vertex_to_location = {name: ('R0', 0) for name in 'abcd'}
+  edges = [('ab', 'a', 'b', 32), ('bc', 'b', 'c', 256), ('cd', 'c', 'd', 32)]
+  graph = TapaGraph.from_json(_getConfig(vertex_to_location, edges))
+
+  # with a group size of 2, b is matched with c instead of a
+  assert get_heavy_edge_clusters(graph, max_group_size=2) == [['b', 'c']]
+
+
+def test_group_size_is_bounded():
+  vertex_to_location = {f'v{i}': ('R0', 0) for i in range(6)}
+  edges = [(f'e{i}', f'v{i}', f'v{i + 1}', 32) for i in range(5)]
+  graph = TapaGraph.from_json(_getConfig(vertex_to_location, edges))
+
+  clusters = get_heavy_edge_clusters(graph, max_group_size=3)
+  assert all(len(cluster) <= 3 for cluster in clusters)
+  # each vertex is in at most one cluster
+  grouped = sum(clusters, [])
+  assert len(grouped) == len(set(grouped))
+
+
+def test_coarsen_graph_reports_the_counts():
+  vertex_to_location = {'a': ('R0', 0), 'b': ('R0', 0), 'c': ('R0', 0), 'd': ('R1', 0)}
+  edges = [('ab', 'a', 'b', 64), ('bc', 'b', 'c', 64), ('cd', 'c', 'd', 64)]
+  graph = TapaGraph.from_json(_getConfig(vertex_to_location, edges))
+
+  report = coarsen_graph(graph, max_group_size=8)
+  assert report == {'vertices_before': 4, 'edges_before': 3, 'vertices_after': 2, 'edges_after': 1}
+
+  group = graph.get_vertex('GROUP_VERTEX_0')
+  assert set(group.props['sub_vertices']) == {'a', 'b', 'c'}
+  assert set(group.props['sub_streams']) == {'ab', 'bc'}
+  assert group.props['outbound_streams'] == ['cd']
+  assert group.props['floorplan_region'] == 'R0'
+
+  # the external stream is moved to the group vertex and the inner wires are removed
+  cd = graph.get_edge('cd')
+  assert cd.props['produced_by'] == 'GROUP_VERTEX_0'
+  assert cd.src == group.id
+  assert set(graph.others['wire_decl']) == {'cd_if_din', 'cd_if_dout'}
@@ -0,0 +1,173 @@
+import pytest
+
+pytest.importorskip('mip')
+pytest.importorskip('autobridge')
+
+from autobridge.Device.DeviceManager import DeviceU250
+from autobridge.Opt.DataflowGraph import Edge, Vertex
+from autobridge.Opt.Slot import Slot
+
+from rapidstream.FE.ILPGlobalRouting import ILPRouter, RoutingGraph
+
+U250 = DeviceU250()
+
+
+def _getSlot(x, y):
+  return Slot(U250, f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}')
+
+
+def _getRouter(bridge_specs):
+  """
+  bridge_specs: [(name, src (x, y), dst (x, y), width), ...]
+  """
+  v2s = {}
+  bridges = []
+  for name, src, dst, width in bridge_specs:
+    src_v = Vertex('', f'{name}_src')
+    dst_v = Vertex('', f'{name}_dst')
+    v2s[src_v] = _getSlot(*src)
+    v2s[dst_v] = _getSlot(*dst)
+
+    bridge = Edge(name)
+    bridge.src = src_v
+    bridge.dst = dst_v
+    bridge.width = width
+    bridges.append(bridge)
+
+  # make some slots more expensive to pass so that the path costs differ
+  util = {}
+  for x in range(0, 8, 2):
+    for y in range(0, 16, 2):
+      ratio = ((x * 7 + y * 3) % 10) / 10
+      util[_getSlot(x, y)] = {'DSP': ratio, 'BRAM': ratio / 2, 'LUT': ratio}
+
+  return ILPRouter(bridges, v2s, util)
+
+
+def _getTotalCost(router, e_name_to_slots):
+  routing_graph = RoutingGraph(router.util, 0.7, 4)
+  bridge_to_unit_cost = {}
+  for bridge in router.bridge_list:
+    src = router.v2s[bridge.src].getRTLModuleName()
+    dst = router.v2s[bridge.dst].getRTLModuleName()
+    middle = [s.getRTLModuleName() for s in e_name_to_slots[bridge.name]]
+    path = tuple(routing_graph.slot_name_to_vertex[name].index for name in [src] + middle + [dst])
+    bridge_to_unit_cost[bridge] = routing_graph.getUnitCostOfPath(path)
+  return sum(bridge.width * cost for bridge, cost in bridge_to_unit_cost.items())
+
+
+BRIDGE_SPECS = [
+  ('a', (0, 0), (4, 4), 32),
+  ('b', (0, 0), (4, 4), 64),
+  ('c', (0, 0), (4, 4), 16),
+  ('d', (2, 2), (6, 8), 128),
+  ('e', (6, 0), (0, 6), 48),
+  ('f', (4, 10), (4, 2), 8),
+]
+
+
+def test_bundled_ilp_has_the_same_path_cost_as_per_bridge_ilp():
+  router = _getRouter(BRIDGE_SPECS)
+  per_bridge = router.ILPRouting()
+  bundled = router.BundledILPRouting()
+
+  assert set(per_bridge) == set(bundled) == {spec[0] for spec in BRIDGE_SPECS}
+  assert _getTotalCost(router, bundled) == pytest.approx(_getTotalCost(router, per_bridge))
+
+
+def test_repair_moves_bridges_off_over_used_boundaries():
+  router = _getRouter(BRIDGE_SPECS[:3])
+  routing_graph = RoutingGraph(router.util, 0.7, 4)
+
+  src, dst = _getSlot(0, 0).getRTLModuleName(), _getSlot(4, 4).getRTLModuleName()
+  paths = routing_graph.getCandidatePaths(src, dst)
+  first_edge = routing_graph.getEdgesOfPath(paths[0])[0]
+
+  # all bridges are packed onto the same path, which only has room for two of them
+  for e in routing_graph.edges:
+    e.capacity = 1000
+  first_edge.capacity = 100
+  bridge_to_path = {bridge: paths[0] for bridge in router.bridge_list}
+  bridge_to_candidate_paths = {bridge: paths for bridge in router.bridge_list}
+
+  assert router._repairOverusedBoundaries(bridge_to_path, bridge_to_candidate_paths, routing_graph)
+
+  usage = sum(bridge.width for bridge, path in bridge_to_path.items() if first_edge in routing_graph.getEdgesOfPath(path))
+  assert usage <= first_edge.capacity
+
+
+def test_repair_fails_when_no_path_has_room():
+  router = _getRouter(BRIDGE_SPECS[:3])
+  routing_graph = RoutingGraph(router.util, 0.7, 4)
+
+  src, dst = _getSlot(0, 0).getRTLModuleName(), _getSlot(4, 4).getRTLModuleName()
+  paths = routing_graph.getCandidatePaths(src, dst)
+  for e in routing_graph.edges:
+    e.capacity = 10
+
+  bridge_to_path = {bridge: paths[0] for bridge in router.bridge_list}
+  bridge_to_candidate_paths = {bridge: paths for bridge in router.bridge_list}
+
+  assert not router._repairOverusedBoundaries(bridge_to_path, bridge_to_candidate_paths, routing_graph)
+
+
+class _StatusModel:
+  """
+  reports a fixed status for each routing usage limit
+  """
+  def __init__(self, routing_graph, limit_to_status):
+    self.routing_graph = routing_graph
+    self.limit_to_status = limit_to_status
+    self.attempts = []
+
+  def optimize(self, max_seconds):
+    limit = round(self.routing_graph.limit, 6)
+    self.attempts.append(limit)
+    return self.limit_to_status(limit)
+
+
+class _LimitGraph:
+  def setRoutingUsageLimit(self, limit):
+    self.limit = limit
+
+
+def _searchLimit(limit_to_status):
+  router = _getRouter(BRIDGE_SPECS[:1])
+  routing_graph = _LimitGraph()
+  m = _StatusModel(routing_graph, limit_to_status)
+  router._searchRoutingUsageLimit(m, routing_graph, {}, {}, 0.7, 1)
+  return routing_graph.limit, m.attempts
+
+
+def test_timeout_is_not_recorded_as_infeasible_while_growing():
+  from mip import OptimizationStatus
+
+  # 0.7 times out, 0.73 is infeasible, 0.79 is solved
+  def getStatus(limit):
+    if limit < 0.71:
+      return OptimizationStatus.NO_SOLUTION_FOUND
+    if limit < 0.75:
+      return OptimizationStatus.INFEASIBLE
+    return OptimizationStatus.OPTIMAL
+
+  limit, attempts = _searchLimit(getStatus)
+  assert attempts[:3] == [0.7, 0.73, 0.79]
+  # the bisection never goes below the limit proven infeasible
+  assert all(attempt > 0.73 for attempt in attempts[2:])
+  assert 0.75 <= limit <= 0.75 + 0.01
+
+
+def test_bisection_stops_at_a_timeout():
+  from mip import OptimizationStatus
+
+  def getStatus(limit):
+    if limit <= 0.7:
+      return OptimizationStatus.INFEASIBLE
+    if limit < 0.8:
+      return OptimizationStatus.NO_SOLUTION_FOUND
+    return OptimizationStatus.OPTIMAL
+
+  limit, attempts = _searchLimit(getStatus)
+  # 0.7525 times out, thus the search stops there instead of treating it as infeasible
+  assert attempts == [0.7, 0.73, 0.79, 0.91, 0.805, 0.7525]
+  assert limit == pytest.approx(0.805)
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('autobridge')
+
+from rapidstream.FE.IncrementalWrappers import (
+  SIGNATURE_FILE,
+  IncrementalWrappers,
+  getDirtySlotsOfRestoredWrappers,
+  loadSignatures,
+)
+
+SLOT_A = 'CR_X0Y0_To_CR_X1Y1'
+SLOT_B = 'CR_X2Y0_To_CR_X3Y1'
+
+
+def _writeWrappers(dir, global_key, level_to_name_to_sig):
+  os.makedirs(dir, exist_ok=True)
+  for name in level_to_name_to_sig.get('Compute', {}):
+    open(os.path.join(dir, f'{name}.v'), 'w').close()
+    open(os.path.join(dir, f'{name}_routing.v'), 'w').close()
+    open(os.path.join(dir, f'{name}_ctrl.v'), 'w').close()
+  signatures = {'GlobalKey' : global_key, 'Signatures' : level_to_name_to_sig}
+  open(os.path.join(dir, SIGNATURE_FILE), 'w').write(json.dumps(signatures))
+
+
+def test_restored_wrappers_are_compared_per_level(tmp_path):
+  dir = str(tmp_path / 'wrapper_rtl')
+
+  # the wrappers of config B are in the dir, the cache restores the wrappers of config A
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'b', SLOT_B : 'same'}, 'Ctrl' : {SLOT_A : 'same'}})
+  prev = loadSignatures(dir)
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'a', SLOT_B : 'same'}, 'Ctrl' : {SLOT_A : 'same'}})
+
+  assert getDirtySlotsOfRestoredWrappers(prev, dir) == {'Compute' : [SLOT_A], 'Ctrl' : []}
+
+
+def test_all_restored_slots_are_dirty_without_previous_signatures(tmp_path):
+  dir = str(tmp_path / 'wrapper_rtl')
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'a', SLOT_B : 'b'}})
+
+  assert getDirtySlotsOfRestoredWrappers(None, dir) == {'Compute' : [SLOT_A, SLOT_B]}
+
+  # a different global key
+  other = {'GlobalKey' : 'other', 'Signatures' : {'Compute' : {SLOT_A : 'a', SLOT_B : 'b'}}}
+  assert getDirtySlotsOfRestoredWrappers(other, dir) == {'Compute' : [SLOT_A, SLOT_B]}
+
+
+def test_restored_wrappers_without_signatures_are_all_dirty(tmp_path):
+  dir = str(tmp_path / 'wrapper_rtl')
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'a'}})
+  os.remove(os.path.join(dir, SIGNATURE_FILE))
+  open(os.path.join(dir, 'kernel0.v'), 'w').close()
+
+  prev = {'GlobalKey' : 'key', 'Signatures' : {'Compute' : {SLOT_A : 'a'}}}
+  assert getDirtySlotsOfRestoredWrappers(prev, dir) == {'Compute' : [SLOT_A], 'Routing' : [SLOT_A], 'Ctrl' : [SLOT_A]}
+
+
+def test_previous_wrappers_are_detected(tmp_path):
+  dir = str(tmp_path / 'wrapper_rtl')
+  assert not IncrementalWrappers(dir, 'key').hasPrevWrappers()
+
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'a'}})
+  assert IncrementalWrappers(dir, 'key').hasPrevWrappers()
+
+  _writeWrappers(dir, 'key', {'Compute' : {SLOT_A : 'a'}})
+  assert not IncrementalWrappers(dir, 'new key').hasPrevWrappers()
+
+
+def test_wrapper_global_key_covers_the_code(tmp_path, monkeypatch):
+  from rapidstream.FE import Manager as manager_module
+
+  class _HLSProject:
+    def getTopRTLPath(self):
+      path = tmp_path / 'top.v'
+      path.write_text('module top(); endmodule\n')
+      return str(path)
+
+  manager = manager_module.Manager.__new__(manager_module.Manager)
+  manager.target, manager.pipeline_style, manager.anchor_plan = 'hw', 'REG', 3
+  key = manager.getWrapperGlobalKey(_HLSProject())
+  assert key == manager.getWrapperGlobalKey(_HLSProject())
+
+  monkeypatch.setattr(manager_module, 'getCodeVersion', lambda: 'upgraded')
+  assert manager.getWrapperGlobalKey(_HLSProject()) != key
@@ -0,0 +1,70 @@
+import importlib
+import json
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('autobridge')
+pytest.importorskip('mip')
+
+
+@pytest.fixture
+def placement(tmp_path, monkeypatch):
+  # the module opens ILP-placement.log in the working directory on import
+  monkeypatch.chdir(tmp_path)
+  return importlib.import_module('rapidstream.BE.PairwiseAnchorPlacement')
+
+
+def _getRandomAnchorConnections(rng, anchor_num):
+  anchor_connections = {}
+  for i in range(anchor_num):
+    anchor_connections[f'anchor_{i}'] = [
+      {
+        'normalized_coordinate': [rng.randint(0, 200), rng.randint(0, 400)],
+        'num_lut_on_path': rng.randint(0, 3),
+      }
+      for _ in range(rng.randint(1, 6))
+    ]
+  return anchor_connections
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cost_matrix_equals_the_scalar_cost(placement, seed):
+  rng = random.Random(seed)
+  anchor_connections = _getRandomAnchorConnections(rng, rng.randint(1, 40))
+  bins = [(rng.randint(0, 200), rng.randint(0, 400)) for _ in range(rng.randint(1, 60))]
+
+  get_cost_matrix = getattr(placement, '__getCostMatrix')
+  get_edge_cost = getattr(placement, '__getEdgeCost')
+
+  # a small chunk size also covers the chunk boundaries
+  anchors, cost = get_cost_matrix(anchor_connections, bins, chunk_size=7)
+  assert anchors == list(anchor_connections)
+  for i, anchor in enumerate(anchors):
+    for j, bin in enumerate(bins):
+      assert cost[i, j] == get_edge_cost(anchor_connections[anchor], bin)
+
+
+def test_quality_report_of_the_arrays(placement):
+  rng = random.Random(0)
+  anchor_connections = _getRandomAnchorConnections(rng, 20)
+  # duplicated costs check the rank of ties
+  bins = [(x, y) for x in range(0, 40, 8) for y in range(0, 80, 16)] * 2
+
+  anchors, cost = getattr(placement, '__getCostMatrix')(anchor_connections, bins)
+  anchor_to_bin_idx = np.array([rng.randrange(len(bins)) for _ in anchors])
+  getattr(placement, '__analyzeILPResults')(anchors, bins, cost, anchor_to_bin_idx)
+  report = json.loads(open('ilp_quality_report.json').read())
+
+  for i, anchor in enumerate(anchors):
+    costs = cost[i].tolist()
+    chosen = costs[anchor_to_bin_idx[i]]
+    sorted_costs = sorted(costs)
+    assert report[anchor]['curr_cost'] == chosen
+    assert report[anchor]['min_cost'] == sorted_costs[0]
+    assert report[anchor]['max_cost'] == sorted_costs[-1]
+    assert report[anchor]['rank_of_chosen_bin'] == sorted_costs.index(chosen)
+    assert report[anchor]['total_bin_num'] == len(bins)
+    assert report[anchor]['bin_location'] == list(bins[anchor_to_bin_idx[i]])
+    assert report[anchor]['optimal_location'] == list(bins[costs.index(sorted_costs[0])])
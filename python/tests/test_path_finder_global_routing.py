@@ -0,0 +1,143 @@
+import logging
+
+import pytest
+
+pytest.importorskip('mip')
+pytest.importorskip('autobridge')
+
+from autobridge.Device.DeviceManager import DeviceU250
+from autobridge.Opt.DataflowGraph import Edge, Vertex
+from autobridge.Opt.Slot import Slot
+from autobridge.Opt.SlotManager import SlotManager
+
+from rapidstream.FE.GlobalRouting import GlobalRouting
+from rapidstream.FE.ILPGlobalRouting import RoutingGraph
+from rapidstream.FE.PathFinderGlobalRouting import PathFinderRouter
+
+U250 = DeviceU250()
+
+
+def _getSlot(x, y):
+  return Slot(U250, f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}')
+
+
+def _getUtil():
+  util = {}
+  for x in range(0, 8, 2):
+    for y in range(0, 16, 2):
+      ratio = ((x * 7 + y * 3) % 10) / 10
+      util[_getSlot(x, y)] = {'DSP': ratio, 'BRAM': ratio / 2, 'LUT': ratio}
+  return util
+
+
+def _getMinCapacity():
+  return min(e.capacity for e in RoutingGraph(_getUtil(), 0.7, 4).edges)
+
+
+class _Floorplan:
+  def __init__(self, bridge_specs):
+    """
+    bridge_specs: [(name, src (x, y), dst (x, y), width), ...]
+    """
+    self.v2s = {}
+    self.s2e = {}
+    for name, src, dst, width in bridge_specs:
+      e = Edge(name)
+      e.src = Vertex('', f'{name}_src')
+      e.dst = Vertex('', f'{name}_dst')
+      e.width = width
+      self.v2s[e.src] = _getSlot(*src)
+      self.v2s[e.dst] = _getSlot(*dst)
+      self.s2e.setdefault(self.v2s[e.dst], []).append(e)
+
+  def getVertexToSlot(self):
+    return self.v2s
+
+  def getSlotToVertices(self):
+    s2v = {}
+    for v, s in self.v2s.items():
+      s2v.setdefault(s, []).append(v)
+    return s2v
+
+  def getSlotToEdges(self):
+    return self.s2e
+
+  def getUtilization(self):
+    return _getUtil()
+
+
+def _getBridgeSpecs(width):
+  # a and b share the same endpoints and their cheapest path only has room for one of them
+  return [
+    ('a', (0, 0), (2, 2), width),
+    ('b', (0, 0), (2, 2), width),
+    ('c', (0, 2), (4, 2), 32),
+    ('d', (2, 0), (2, 0), 64),
+  ]
+
+
+def _getGlobalRouting(bridge_specs, routing_method):
+  floorplan = _Floorplan(bridge_specs)
+  return GlobalRouting(floorplan, None, SlotManager(U250), 'REG', 2, routing_method), floorplan
+
+
+def _checkPaths(global_router, floorplan):
+  """
+  each path connects the source slot to the destination slot through neighbor slots
+  """
+  for e_list in floorplan.getSlotToEdges().values():
+    for e in e_list:
+      if floorplan.v2s[e.src] == floorplan.v2s[e.dst]:
+        assert global_router.e_name2path[e.name] == []
+        continue
+
+      path = [floorplan.v2s[e.src]] + global_router.e_name2path[e.name] + [floorplan.v2s[e.dst]]
+      for s1, s2 in zip(path, path[1:]):
+        dist = abs(s1.down_left_x - s2.down_left_x) + abs(s1.down_left_y - s2.down_left_y)
+        assert dist == 2, f'{e.name}: {s1.getRTLModuleName()} and {s2.getRTLModuleName()} are not neighbors'
+
+
+def test_path_finder_result_has_the_same_shape_as_ilp():
+  specs = _getBridgeSpecs(32)
+  path_finder, floorplan = _getGlobalRouting(specs, 'PathFinder')
+  ilp, _ = _getGlobalRouting(specs, 'ILP')
+
+  assert set(path_finder.e_name2path) == set(ilp.e_name2path) == {spec[0] for spec in specs}
+  for e_name, path in path_finder.e_name2path.items():
+    assert isinstance(path, list) and all(isinstance(s, Slot) for s in path)
+    assert len(path) == len(ilp.e_name2path[e_name]), e_name
+
+  # slot2e_names is the inverse of e_name2path
+  for global_router in (path_finder, ilp):
+    assert all(isinstance(s, Slot) for s in global_router.slot2e_names)
+    assert sorted((s.getRTLModuleName(), e_name) for s, e_names in global_router.slot2e_names.items() for e_name in e_names) == \
+      sorted((s.getRTLModuleName(), e_name) for e_name, path in global_router.e_name2path.items() for s in path)
+    _checkPaths(global_router, floorplan)
+
+  assert path_finder.getEdgeNameToPathSlotNames().keys() == ilp.getEdgeNameToPathSlotNames().keys()
+
+
+def test_path_finder_resolves_overflow(caplog):
+  caplog.set_level(logging.INFO)
+  floorplan = _Floorplan(_getBridgeSpecs(int(_getMinCapacity() * 0.6)))
+  router = PathFinderRouter(sum(floorplan.s2e.values(), []), floorplan.v2s, _getUtil())
+  e_name2path = router.PathFinderRouting()
+
+  assert router.total_overflow == 0
+
+  # the first iteration puts a and b on the same cheapest path, then they are negotiated apart
+  assert 'PathFinder iteration 1:' in caplog.text
+  assert [s.getRTLModuleName() for s in e_name2path['a']] != [s.getRTLModuleName() for s in e_name2path['b']]
+  assert len(e_name2path['a']) == len(e_name2path['b']) == 1
+
+
+def test_path_finder_reports_overflow_when_capacity_is_not_enough(caplog):
+  floorplan = _Floorplan(_getBridgeSpecs(_getMinCapacity() * 10))
+  router = PathFinderRouter(sum(floorplan.s2e.values(), []), floorplan.v2s, _getUtil())
+  e_name2path = router.PathFinderRouting(max_iteration=5)
+
+  assert router.total_overflow > 0
+  assert 'ends with a total overflow' in caplog.text
+
+  # every bridge is still routed
+  assert set(e_name2path) == {'a', 'b', 'c', 'd'}
@@ -0,0 +1,115 @@
+import re
+
+from rapidstream.rtl_gen import create_wrapper
+from rapidstream.tapa_ir import TapaGraph
+
+
+def _getStream(name, producer, consumer, pipeline_level=None):
+  props = {
+    'category': 'FIFO_EDGE',
+    'produced_by': producer,
+    'consumed_by': consumer,
+    'depth': 2,
+    'port_wire_map': {
+      'inbound': {'if_din': f'{name}_din', 'if_full_n': f'{name}_full_n', 'if_write': f'{name}_write'},
+      'outbound': {'if_dout': f'{name}_dout', 'if_empty_n': f'{name}_empty_n', 'if_read': f'{name}_read'},
+      'others': {'clk': 'ap_clk', 'reset': 'ap_rst'},
+    },
+  }
+  if pipeline_level is not None:
+    props['pipeline_level'] = pipeline_level
+  return props
+
+
+def _getTask(module, in_streams, out_streams):
+  stream_ports = {}
+  for s in in_streams:
+    stream_ports[s] = {f'{s}_dout': f'{s}_dout', f'{s}_empty_n': f'{s}_empty_n', f'{s}_read': f'{s}_read'}
+  for s in out_streams:
+    stream_ports[s] = {f'{s}_din': f'{s}_din', f'{s}_full_n': f'{s}_full_n', f'{s}_write': f'{s}_write'}
+
+  return {
+    'category': 'TASK_VERTEX',
+    'module': module,
+    'instance': f'{module}_0',
+    'floorplan_region': 'CR_X0Y0_To_CR_X3Y3',
+    'SLR': 0,
+    'area': {'LUT': 10},
+    'port_wire_map': {
+      'ctrl_ports': {'ap_clk': 'ap_clk', 'ap_rst_n': 'ap_rst_n', 'ap_start': 'ap_start', 'ap_done': f'{module}_ap_done'},
+      'axi_ports': {},
+      'constant_ports': {'n': 'n'},
+      'stream_ports': stream_ports,
+    },
+  }
+
+
+def _getGraph():
+  config = {
+    'vertices': {
+      'TASK_VERTEX_src': _getTask('src', [], ['in_s']),
+      'TASK_VERTEX_a': _getTask('a', ['in_s'], ['ab']),
+      'TASK_VERTEX_b': _getTask('b', ['ab'], ['out_s']),
+      'TASK_VERTEX_dst': _getTask('dst', ['out_s'], []),
+    },
+    'edges': {
+      'FIFO_EDGE_in_s': _getStream('in_s', 'TASK_VERTEX_src', 'TASK_VERTEX_a'),
+      'FIFO_EDGE_ab': _getStream('ab', 'TASK_VERTEX_a', 'TASK_VERTEX_b', pipeline_level=1),
+      'FIFO_EDGE_out_s': _getStream('out_s', 'TASK_VERTEX_b', 'TASK_VERTEX_dst'),
+    },
+    'wire_decl': {},
+    'input_decl': {'ap_clk': '', 'ap_rst_n': '', 'ap_start': '', 'n': '[31:0]'},
+    'output_decl': {},
+  }
+  for s in ('in_s', 'ab', 'out_s'):
+    config['wire_decl'].update({
+      f'{s}_din': '[31:0]', f'{s}_full_n': '', f'{s}_write': '',
+      f'{s}_dout': '[31:0]', f'{s}_empty_n': '', f'{s}_read': '',
+    })
+  config['wire_decl'].update({'a_ap_done': '', 'b_ap_done': '', 'ap_rst': ''})
+  return TapaGraph.from_json(config)
+
+
+def _getPins(rtl):
+  return dict((pin, (direction, width.strip())) for direction, width, pin in
+    re.findall(r'^  (input|output) wire (.*?) ?(\w+_PARTITION_PIN);$', rtl, re.M))
+
+
+def test_wrapper_pins_wires_and_fifo(tmp_path):
+  graph = _getGraph()
+  output_path = tmp_path / 'wrapper.v'
+  pin_to_signal = create_wrapper(graph, ['TASK_VERTEX_a', 'TASK_VERTEX_b'], 'wrapper', str(output_path))
+  rtl = output_path.read_text()
+
+  # the external stream wires are pins, the internal stream wires are not
+  pins = _getPins(rtl)
+  assert pins['in_s_dout_PARTITION_PIN'] == ('input', '[31:0]')
+  assert pins['in_s_read_PARTITION_PIN'] == ('output', '')
+  assert pins['out_s_din_PARTITION_PIN'] == ('output', '[31:0]')
+  assert pins['out_s_full_n_PARTITION_PIN'] == ('input', '')
+  assert pins['ap_clk_PARTITION_PIN'] == ('input', '')
+  assert pins['n_PARTITION_PIN'] == ('input', '[31:0]')
+  assert pins['a_ap_done_PARTITION_PIN'] == ('output', '')
+  assert pins['ap_rst_PARTITION_PIN'] == ('input', '')
+  assert not any(pin.startswith('ab_') for pin in pins)
+  assert set(pins) == set(pin_to_signal)
+
+  # the internal stream wires are declared inside the wrapper
+  assert '  wire [31:0] ab_din;\n' in rtl
+  assert '  wire  ab_full_n;\n' in rtl
+
+  # the internal stream is an almost-full FIFO that keeps its capacity after the grace period
+  fifo = re.search(r'fifo_almost_full #\((.*?)\) ab \(', rtl, re.S).group(1)
+  params = dict(re.findall(r'\.(\w+)\((\d+)\)', fifo))
+  assert params == {'DATA_WIDTH': '32', 'ADDR_WIDTH': '3', 'DEPTH': '5', 'GRACE_PERIOD': '3'}
+  assert int(params['DEPTH']) - int(params['GRACE_PERIOD']) == 2
+  assert 2 ** int(params['ADDR_WIDTH']) > int(params['DEPTH'])
+  assert '.clk(ap_rst_INTERNAL)' not in rtl and '.clk(ap_clk_INTERNAL)' in rtl
+
+  # the wrapper replaces the grouped vertices and the external wires are renamed
+  assert not graph.has_vertex('TASK_VERTEX_a') and not graph.has_edge('FIFO_EDGE_ab')
+  assert graph.get_edge('FIFO_EDGE_in_s').props['consumed_by'] == 'wrapper'
+  assert pin_to_signal['in_s_dout_PARTITION_PIN'] == 'in_s_dout_EXTERNAL'
+  assert pin_to_signal['ap_clk_PARTITION_PIN'] == 'ap_clk'
+  assert 'in_s_dout_EXTERNAL' in graph.others['wire_decl'] and 'in_s_dout' not in graph.others['wire_decl']
+  assert 'ab_din' not in graph.others['wire_decl']
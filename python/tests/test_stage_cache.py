@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+pytest.importorskip('autobridge')
+
+from rapidstream.FE import StageCache as stage_cache_module
+from rapidstream.FE.StageCache import StageCache
+
+
+@pytest.fixture
+def rtl_dir(tmp_path):
+  rtl_dir = tmp_path / 'rtl'
+  rtl_dir.mkdir()
+  (rtl_dir / 'top.v').write_text('module top(); endmodule\n')
+  return str(rtl_dir)
+
+
+def _getKeys(tmp_path, rtl_dir, config):
+  return StageCache(str(tmp_path / 'cache'), config, rtl_dir).stage_to_key
+
+
+def test_keys_are_stable(tmp_path, rtl_dir):
+  config = {'TopName': 'top', 'GlobalRoutingMethod': 'ILP'}
+  assert _getKeys(tmp_path, rtl_dir, config) == _getKeys(tmp_path, rtl_dir, config)
+
+
+def test_only_later_stages_change_with_their_config(tmp_path, rtl_dir):
+  keys = _getKeys(tmp_path, rtl_dir, {'TopName': 'top', 'GlobalRoutingMethod': 'ILP'})
+  new_keys = _getKeys(tmp_path, rtl_dir, {'TopName': 'top', 'GlobalRoutingMethod': 'PathFinder'})
+  assert keys['floorplan'] == new_keys['floorplan']
+  assert all(keys[stage] != new_keys[stage] for stage in ('global_routing', 'latency_balancing', 'wrappers'))
+
+
+def test_code_change_invalidates_all_stages(tmp_path, rtl_dir, monkeypatch):
+  config = {'TopName': 'top'}
+  keys = _getKeys(tmp_path, rtl_dir, config)
+
+  # a new version of the code
+  fake_package = tmp_path / 'rapidstream'
+  fake_package.mkdir()
+  (fake_package / '__init__.py').write_text('# changed\n')
+  monkeypatch.setattr(stage_cache_module.rapidstream, '__file__', str(fake_package / '__init__.py'))
+
+  new_keys = _getKeys(tmp_path, rtl_dir, config)
+  assert all(keys[stage] != new_keys[stage] for stage in keys)
+
+
+def test_report_change_invalidates_all_stages(tmp_path, rtl_dir):
+  config = {'TopName': 'top'}
+  report_dir = tmp_path / 'report'
+  report_dir.mkdir()
+  (report_dir / 'top_csynth.rpt').write_text('LUT 100\n')
+  (report_dir / 'top.adb').write_text('database\n')
+
+  def getKeys():
+    return StageCache(str(tmp_path / 'cache'), config, rtl_dir, [str(report_dir)]).stage_to_key
+
+  keys = getKeys()
+
+  # the HLS databases next to the schedule reports are not hashed
+  (report_dir / 'top.adb').write_text('new database\n')
+  assert getKeys() == keys
+
+  # a re-synthesis changes the area of a module
+  (report_dir / 'top_csynth.rpt').write_text('LUT 200\n')
+  new_keys = getKeys()
+  assert all(keys[stage] != new_keys[stage] for stage in keys)
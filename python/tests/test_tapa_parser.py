@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip('click')
+pytest.importorskip('pyverilog')
+
+from rapidstream.tapa_parser import clear_rtl_ir_cache, save_rtl_ir, _get_rtl_ir_cache_path
+
+
+def test_clear_cache_only_removes_the_rtl_ir_entries(tmp_path):
+  top_rtl_path = tmp_path / 'top.v'
+  top_rtl_path.write_text('module top(); endmodule\n')
+
+  cache_dir = tmp_path / 'cache'
+  save_rtl_ir(str(top_rtl_path), str(cache_dir), {'parser_version': 0})
+  entry = _get_rtl_ir_cache_path(str(top_rtl_path), str(cache_dir))
+  (cache_dir / f'{"0" * 64}.json.tmp123').write_text('')
+
+  # files that the parser does not own
+  (cache_dir / 'notes.txt').write_text('keep')
+  (cache_dir / 'other.json').write_text('{}')
+  (cache_dir / 'sub').mkdir()
+  (cache_dir / 'sub' / f'{"1" * 64}.json').write_text('{}')
+
+  clear_rtl_ir_cache(str(cache_dir))
+
+  assert sorted(path.name for path in cache_dir.iterdir()) == ['notes.txt', 'other.json', 'sub']
+  assert (cache_dir / 'sub' / f'{"1" * 64}.json').exists()
+  assert not (tmp_path / entry).exists()
+
+
+def test_clear_cache_ignores_a_missing_dir(tmp_path):
+  clear_rtl_ir_cache(str(tmp_path / 'missing'))
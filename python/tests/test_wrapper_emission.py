@@ -0,0 +1,81 @@
+import filecmp
+import glob
+import json
+import os
+
+import pytest
+
+pytest.importorskip('autobridge')
+
+from autobridge.Device.DeviceManager import DeviceU250
+from autobridge.Opt.Slot import Slot
+
+from rapidstream.FE.WrapperEmitter import emitWrappers
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'examples')
+EXAMPLE_CONFIGS = sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*', '*_config.json')))
+
+
+def _assertSameFiles(dir1, dir2):
+  files1 = sorted(os.path.relpath(p, dir1) for p in glob.glob(f'{dir1}/**', recursive=True) if os.path.isfile(p))
+  files2 = sorted(os.path.relpath(p, dir2) for p in glob.glob(f'{dir2}/**', recursive=True) if os.path.isfile(p))
+  assert files1 and files1 == files2
+  _, mismatch, errors = filecmp.cmpfiles(dir1, dir2, files1, shallow=False)
+  assert not mismatch and not errors, f'different outputs: {mismatch + errors}'
+
+
+def _getWrapper(slot):
+  return [f'module {slot.getRTLModuleName()} ();'] + [f'  // {i} {slot.getName()}' for i in range(100)] + ['endmodule']
+
+
+@pytest.mark.parametrize('worker_num', [2, 4])
+def test_parallel_emission_is_byte_identical(tmp_path, worker_num):
+  u250 = DeviceU250()
+  slots = [Slot(u250, f'CR_X{x}Y{y}_To_CR_X{x+1}Y{y+1}') for x in range(0, 8, 2) for y in range(0, 16, 2)]
+
+  outputs = {}
+  for n in (1, worker_num):
+    out_dir = tmp_path / f'workers_{n}'
+    out_dir.mkdir()
+    outputs[n] = emitWrappers(slots, _getWrapper, lambda s: f'{out_dir}/{s.getRTLModuleName()}.v', n, keep_wrappers=True)
+
+  assert outputs[1] == outputs[worker_num]
+  _assertSameFiles(str(tmp_path / 'workers_1'), str(tmp_path / f'workers_{worker_num}'))
+
+
+def _getRunnableConfig(config_path, run_dir, worker_num):
+  """
+  the example config with its relative inputs resolved, or None if the inputs are not unpacked
+  """
+  example_dir = os.path.dirname(config_path)
+  config = json.loads(open(config_path, 'r').read())
+  for key in ('HLSProjectPath', 'ResultReuse'):
+    if key in config:
+      config[key] = os.path.abspath(os.path.join(example_dir, config[key]))
+      if not os.path.exists(config[key]):
+        return None
+
+  config['WrapperEmissionWorkers'] = worker_num
+  config['StageCacheDir'] = ''
+  path = os.path.join(run_dir, os.path.basename(config_path))
+  open(path, 'w').write(json.dumps(config))
+  return path
+
+
+@pytest.mark.parametrize('config_path', EXAMPLE_CONFIGS, ids=lambda p: os.path.basename(os.path.dirname(p)))
+def test_example_wrappers_are_byte_identical(tmp_path, monkeypatch, config_path):
+  from rapidstream.FE.Manager import Manager
+
+  run_dirs = {}
+  for worker_num in (1, 4):
+    run_dir = tmp_path / f'workers_{worker_num}'
+    run_dir.mkdir()
+    runnable_config = _getRunnableConfig(config_path, str(run_dir), worker_num)
+    if runnable_config is None:
+      pytest.skip(f'the HLS project of {config_path} is not unpacked')
+
+    monkeypatch.chdir(run_dir)
+    Manager(runnable_config)
+    run_dirs[worker_num] = str(run_dir / 'wrapper_rtl')
+
+  _assertSameFiles(run_dirs[1], run_dirs[4])